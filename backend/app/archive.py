@@ -0,0 +1,285 @@
+import os
+import re
+from datetime import date
+
+from config import ARCHIVE_BATCH_SIZE, ARCHIVE_DIR, ARCHIVE_HORIZON_MONTHS
+from database import db_path_for, is_postgres, table_columns
+
+# Hot/cold partitioning (SQLite only). Transactions older than the horizon
+# live in ARCHIVE_DIR/<db name>/transactions_<year>.db, one file per year with
+# its own indexes. Queries attach an archive only when the requested date
+# range reaches into that year; balances use archived_balances instead.
+# SQLite allows only 10 attached databases per connection: lookups that may
+# touch every year (by id, existence checks, full syncs) go through
+# each_archive(), which attaches one year at a time, and a range spanning
+# more than ATTACH_BUDGET years reads its oldest years from temp copies.
+
+_ARCHIVE_FILE = re.compile(r"^transactions_(\d{4})\.db$")
+ATTACH_BUDGET = 8  # most archives one statement attaches (SQLite allows 10)
+
+ARCHIVE_INDEXES = {
+    "idx_archive_user_date": "user_id, date",
+    "idx_archive_user_category_date": "user_id, category_id, date",
+    "idx_archive_account": "account_id",
+    "idx_archive_user_account_amount_date": "user_id, account_id, amount, date",
+}
+
+# Signed effect of a transaction on its account balance
+BALANCE_DELTA_SQL = """
+    CASE WHEN transaction_type = 'INCOME' THEN amount
+         WHEN transaction_type = 'EXPENSE' THEN -amount ELSE 0 END
+"""
+
+
+# === DATE RANGES ===
+def month_range(year, month):
+    """[start, end) ISO dates covering one calendar month."""
+    year, month = int(year), int(month)
+    end = date(year + month // 12, month % 12 + 1, 1)
+    return date(year, month, 1).isoformat(), end.isoformat()
+
+
+def year_range(year):
+    year = int(year)
+    return f"{year:04d}-01-01", f"{year + 1:04d}-01-01"
+
+
+def horizon_cutoff(months=ARCHIVE_HORIZON_MONTHS, today=None):
+    """First day of the month ``months`` before the current one; older rows are cold."""
+    today = today or date.today()
+    index = today.year * 12 + today.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1).isoformat()
+
+
+# === LAYOUT ===
+def archive_dir(db_path):
+    return os.path.join(ARCHIVE_DIR, os.path.splitext(os.path.basename(db_path))[0])
+
+
+def archive_path(db_path, year):
+    return os.path.join(archive_dir(db_path), f"transactions_{year}.db")
+
+
+def archive_years(db_path):
+    try:
+        names = os.listdir(archive_dir(db_path))
+    except FileNotFoundError:
+        return []
+    return sorted(int(m.group(1)) for m in map(_ARCHIVE_FILE.match, names) if m)
+
+
+def _overlapping_years(db_path, start, end):
+    return [
+        year
+        for year in archive_years(db_path)
+        if (start is None or f"{year + 1:04d}-01-01" > start) and (end is None or f"{year:04d}-01-01" < end)
+    ]
+
+
+def attach(conn, db_path, year):
+    schema = f"archive_{year}"
+    if schema not in {row[1] for row in conn.execute("PRAGMA database_list")}:
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (archive_path(db_path, year),))
+    return schema
+
+
+def detach(conn, schema):
+    # DETACH is refused inside a transaction; the archive then stays attached
+    # until the connection closes
+    if not conn.in_transaction:
+        conn.execute(f"DETACH DATABASE {schema}")
+
+
+def detach_all(conn):
+    for row in conn.execute("PRAGMA database_list").fetchall():
+        if row[1].startswith("archive_"):
+            conn.execute(f"DETACH DATABASE {row[1]}")
+
+
+# === READS ===
+def transactions_source(conn, user_id, start=None, end=None):
+    """FROM-clause source for transactions dated in [start, end) (None = unbounded).
+
+    Plain ``transactions`` while the range stays in the hot table; otherwise a
+    UNION ALL of the hot table and each overlapping archive, attached to
+    ``conn`` on demand. Callers still filter by user and date themselves.
+    """
+    if is_postgres():
+        return "transactions"
+    db_path = db_path_for(user_id)
+    years = _overlapping_years(db_path, start, end)
+    if not years:
+        return "transactions"
+
+    cols = table_columns(conn, "transactions")
+    parts = [f"SELECT {', '.join(cols)} FROM main.transactions"]
+    # Years beyond what fits attached at once (an unbounded range over a long
+    # history) are copied, oldest first, into temp tables
+    spilled = years[:-ATTACH_BUDGET] if len(years) > ATTACH_BUDGET else []
+    for year in spilled:
+        parts.append(f"SELECT {', '.join(cols)} FROM {_spill(conn, db_path, year, cols)}")
+    for year in years[len(spilled):]:
+        parts.append(_archived_select(conn, attach(conn, db_path, year), cols))
+    return "(" + " UNION ALL ".join(parts) + ")"
+
+
+def _spill(conn, db_path, year, cols):
+    name = f"archive_copy_{year}"
+    schema = attach(conn, db_path, year)
+    # Reused if this connection already copied the year
+    conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {name} AS {_archived_select(conn, schema, cols)}")
+    detach(conn, schema)
+    return f"temp.{name}"
+
+
+def _archived_select(conn, schema, cols):
+    # Archives written before a column was added just report NULL for it
+    archived = set(table_columns(conn, "transactions", schema))
+    select = ", ".join(c if c in archived else f"NULL AS {c}" for c in cols)
+    # A read snapshot taken before the archiver ran still holds the moved
+    # rows, so skip archived ids the hot side already returns
+    return (
+        f"SELECT {select} FROM {schema}.transactions arc "
+        f"WHERE NOT EXISTS (SELECT 1 FROM main.transactions hot WHERE hot.id = arc.id)"
+    )
+
+
+def each_archive(conn, user_id, start=None, end=None):
+    """Yield a FROM-clause source per archive overlapping [start, end), oldest first.
+
+    Only the current year is attached; it is detached when the caller asks
+    for the next one, so any number of years stays under SQLite's limit.
+    Nothing on PostgreSQL.
+    """
+    if is_postgres():
+        return
+    db_path = db_path_for(user_id)
+    cols = table_columns(conn, "transactions")
+    for year in _overlapping_years(db_path, start, end):
+        schema = attach(conn, db_path, year)
+        try:
+            yield f"({_archived_select(conn, schema, cols)})"
+        finally:
+            detach(conn, schema)
+
+
+def transactions_exist(conn, user_id, where, params):
+    """True if any of the user's transactions, hot or archived, matches ``where``."""
+    sql = "SELECT 1 FROM {} t WHERE t.user_id = ? AND " + where + " LIMIT 1"
+    if conn.execute(sql.format("transactions"), [user_id] + list(params)).fetchone():
+        return True
+    for source in each_archive(conn, user_id):
+        if conn.execute(sql.format(source), [user_id] + list(params)).fetchone():
+            return True  # closing the generator detaches the year
+    return False
+
+
+def find_transaction(conn, user_id, tx_id):
+    """Return ``(row, table)`` for a user's transaction, hot or archived; ``(None, None)`` if missing.
+
+    An archived row's year stays attached so the caller can restore it.
+    """
+    row = conn.execute("SELECT * FROM transactions WHERE id = ? AND user_id = ?", (tx_id, user_id)).fetchone()
+    if row or is_postgres():
+        return row, ("transactions" if row else None)
+    db_path = db_path_for(user_id)
+    for year in archive_years(db_path):
+        schema = attach(conn, db_path, year)
+        table = f"{schema}.transactions"
+        row = conn.execute(f"SELECT * FROM {table} WHERE id = ? AND user_id = ?", (tx_id, user_id)).fetchone()
+        if row:
+            return row, table
+        detach(conn, schema)
+    return None, None
+
+
+# === WRITES ===
+def _add_archived_balance(conn, where, params, sign=1):
+    conn.execute(
+        f"""
+        INSERT INTO archived_balances (account_id, user_id, net)
+        SELECT account_id, user_id, {sign} * SUM({BALANCE_DELTA_SQL}) FROM {where}
+        GROUP BY account_id, user_id
+        ON CONFLICT (account_id) DO UPDATE SET net = net + excluded.net
+        """,
+        params,
+    )
+
+
+def restore_transaction(conn, user_id, tx_id, table):
+    """Move an archived transaction back into the hot table so it can be edited or deleted.
+
+    The row comes back without its fingerprint: a live copy may hold the same
+    one, and the caller's edit sets a fresh one anyway.
+    """
+    schema = table.split(".")[0]
+    archived = set(table_columns(conn, "transactions", schema))
+    cols = ", ".join(c for c in table_columns(conn, "transactions") if c in archived and c != "fingerprint")
+    conn.execute(
+        f"INSERT INTO main.transactions ({cols}) SELECT {cols} FROM {table} WHERE id = ? AND user_id = ?",
+        (tx_id, user_id),
+    )
+    _add_archived_balance(conn, f"{table} WHERE id = ? AND user_id = ?", (tx_id, user_id), sign=-1)
+    conn.execute(f"DELETE FROM {table} WHERE id = ? AND user_id = ?", (tx_id, user_id))
+
+
+def ensure_archive(conn, db_path, year):
+    """Attach (creating if needed) the archive for ``year`` with the hot table's columns."""
+    os.makedirs(archive_dir(db_path), exist_ok=True)
+    schema = attach(conn, db_path, year)
+    existing = set(table_columns(conn, "transactions", schema))
+    hot = conn.execute("PRAGMA main.table_info(transactions)").fetchall()
+    if not existing:
+        defs = ", ".join(f"{r[1]} {r[2]}" + (" PRIMARY KEY" if r[5] else "") for r in hot)
+        conn.execute(f"CREATE TABLE {schema}.transactions ({defs})")
+    else:
+        for r in hot:
+            if r[1] not in existing:
+                conn.execute(f"ALTER TABLE {schema}.transactions ADD COLUMN {r[1]} {r[2]}")
+    for name, cols in ARCHIVE_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {schema}.{name} ON transactions ({cols})")
+    return schema
+
+
+def archive_batch(conn, db_path, cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move up to ``batch_size`` of the oldest transactions dated before ``cutoff``.
+
+    ``conn`` must be in autocommit mode (isolation_level=None). Each batch is
+    one short write transaction, so the API keeps writing in between.
+    Returns the number of rows moved.
+    """
+    rows = conn.execute(
+        "SELECT id, substr(date, 1, 4) AS year FROM transactions WHERE date < ? ORDER BY date LIMIT ?",
+        (cutoff, batch_size),
+    ).fetchall()
+    if not rows:
+        return 0
+
+    by_year = {}
+    for tx_id, year in rows:
+        if int(year) not in by_year and len(by_year) == ATTACH_BUDGET:
+            break  # the rest go in the next batch
+        by_year.setdefault(int(year), []).append(tx_id)
+    # ATTACH and DDL cannot run inside the move transaction
+    for year in by_year:
+        ensure_archive(conn, db_path, year)
+
+    cols = ", ".join(table_columns(conn, "transactions"))
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for year, ids in by_year.items():
+            marks = ",".join("?" * len(ids))
+            conn.execute(
+                f"INSERT OR IGNORE INTO archive_{year}.transactions ({cols}) "
+                f"SELECT {cols} FROM main.transactions WHERE id IN ({marks})",
+                ids,
+            )
+            _add_archived_balance(conn, f"main.transactions WHERE id IN ({marks})", ids)
+            conn.execute(f"DELETE FROM main.transactions WHERE id IN ({marks})", ids)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        detach_all(conn)
+    return sum(len(ids) for ids in by_year.values())
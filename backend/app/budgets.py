@@ -0,0 +1,130 @@
+from archive import month_range, transactions_source
+from database import lock_user
+from money import to_major
+
+# Budget status is evaluated when a write touches a budget's category and
+# month, and stored in budget_status; the dashboard reads it back. Budgets
+# with no stored row yet (saved before the table existed, and not touched by
+# a write since) are evaluated on read instead.
+
+
+def budget_status(spent, limit_amount):
+    """green under 75% of the limit, yellow below it, red at or over it (minor units)."""
+    if spent * 4 < limit_amount * 3:
+        return "green"
+    if spent < limit_amount:
+        return "yellow"
+    return "red"
+
+
+def evaluate_budgets(conn, user_id, keys):
+    """Recompute spent/status of the user's budgets at ``(category_id, year, month)`` keys.
+
+    Leaves the work in an open transaction for the caller to commit and
+    returns the budgets whose spent amount or status changed, shaped like the
+    dashboard's budget alerts plus ``previous_status`` (a transition when it
+    differs from ``status``).
+    """
+    keys = {(int(category_id), int(year), int(month)) for category_id, year, month in keys}
+    # Resolve sources (which may ATTACH archives) before the transaction starts
+    sources = {key: transactions_source(conn, user_id, *month_range(key[1], key[2])) for key in keys}
+    lock_user(conn, user_id)
+
+    changed = []
+    for (category_id, year, month), source in sources.items():
+        budget = conn.execute(
+            """
+            SELECT b.id, b.limit_amount, c.name, s.spent, s.status
+            FROM budgets b
+            JOIN categories c ON c.id = b.category_id
+            LEFT JOIN budget_status s ON s.budget_id = b.id
+            WHERE b.user_id = ? AND b.category_id = ? AND b.year = ? AND b.month = ?
+            """,
+            (user_id, category_id, year, month),
+        ).fetchone()
+        if not budget:
+            continue
+
+        start, end = month_range(year, month)
+        spent = conn.execute(
+            f"""
+            SELECT COALESCE(SUM(amount), 0) AS spent FROM {source}
+            WHERE user_id = ? AND category_id = ? AND transaction_type = 'EXPENSE' AND date >= ? AND date < ?
+            """,
+            (user_id, category_id, start, end),
+        ).fetchone()["spent"]
+        status = budget_status(spent, budget["limit_amount"])
+        conn.execute(
+            """
+            INSERT INTO budget_status (budget_id, user_id, spent, status) VALUES (?, ?, ?, ?)
+            ON CONFLICT (budget_id) DO UPDATE SET spent = excluded.spent, status = excluded.status,
+                updated_at = CURRENT_TIMESTAMP
+            """,
+            (budget["id"], user_id, spent, status),
+        )
+        if (spent, status) != (budget["spent"], budget["status"]):
+            changed.append(
+                {
+                    "id": budget["id"],
+                    "name": budget["name"],
+                    "year": year,
+                    "month": month,
+                    "spent": to_major(spent),
+                    "limit": to_major(budget["limit_amount"]),
+                    "status": status,
+                    "previous_status": budget["status"],
+                }
+            )
+    return changed
+
+
+def month_budgets(conn, user_id, year, month):
+    """Every budget of the month shaped like the dashboard's budget alerts.
+
+    Uses the stored spent/status, or computes them (without storing) for
+    budgets that have no budget_status row.
+    """
+    rows = conn.execute(
+        """
+        SELECT b.id, b.category_id, c.name, b.limit_amount, s.spent, s.status
+        FROM budgets b
+        JOIN categories c ON b.category_id = c.id
+        LEFT JOIN budget_status s ON s.budget_id = b.id
+        WHERE b.user_id = ? AND b.month = ? AND b.year = ?
+        """,
+        (user_id, int(month), int(year)),
+    ).fetchall()
+
+    missing = sorted({row["category_id"] for row in rows if row["status"] is None})
+    computed = {}
+    if missing:
+        start, end = month_range(year, month)
+        computed = {
+            row["category_id"]: row["spent"]
+            for row in conn.execute(
+                f"""
+                SELECT category_id, SUM(amount) AS spent FROM {transactions_source(conn, user_id, start, end)}
+                WHERE user_id = ? AND transaction_type = 'EXPENSE' AND date >= ? AND date < ?
+                    AND category_id IN ({','.join('?' * len(missing))})
+                GROUP BY category_id
+                """,
+                [user_id, start, end] + missing,
+            )
+        }
+
+    budgets = []
+    for row in rows:
+        spent, status = row["spent"], row["status"]
+        if status is None:
+            spent = computed.get(row["category_id"], 0)
+            status = budget_status(spent, row["limit_amount"])
+        budgets.append(
+            {
+                "id": row["id"],
+                "name": row["name"],
+                "spent": to_major(spent),
+                "limit": to_major(row["limit_amount"]),
+                "status": status,
+            }
+        )
+    return budgets
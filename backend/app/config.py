@@ -0,0 +1,148 @@
+import os
+
+# === PATHS ===
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.getenv("PFT_DB_PATH", os.path.join(BASE_DIR, "finance.db"))
+
+# === SQLITE ===
+# Seconds a connection waits on a locked database before raising
+SQLITE_BUSY_TIMEOUT = float(os.getenv("PFT_SQLITE_BUSY_TIMEOUT", "5"))
+
+# === SHARDING ===
+# 0 keeps every user in DB_PATH. N > 0 routes each user to one of N shard files
+# under SHARD_DIR, with users/auth kept in a small directory database.
+SHARD_COUNT = int(os.getenv("PFT_SHARD_COUNT", "0"))
+SHARD_DIR = os.getenv("PFT_SHARD_DIR", os.path.join(BASE_DIR, "shards"))
+DIRECTORY_DB_PATH = os.path.join(SHARD_DIR, "directory.db")
+
+# === STORAGE BACKEND ===
+# Empty uses SQLite (DB_PATH / shards). A postgresql:// URL switches every
+# route to the pooled PostgreSQL backend; sharding is ignored in that mode.
+DATABASE_URL = os.getenv("PFT_DATABASE_URL", "")
+PG_POOL_MIN = int(os.getenv("PFT_PG_POOL_MIN", "1"))
+PG_POOL_MAX = int(os.getenv("PFT_PG_POOL_MAX", "10"))
+# Rows pulled per round trip when streaming large result sets
+FETCH_CHUNK_SIZE = int(os.getenv("PFT_FETCH_CHUNK_SIZE", "2000"))
+
+# === READ SNAPSHOTS ===
+# Seconds an analytics read (dashboard, budgets, reports) may lag behind the
+# primary. 0 sends those reads to the primary database like everything else.
+READ_SNAPSHOT_MAX_STALENESS = float(os.getenv("PFT_READ_SNAPSHOT_MAX_STALENESS", "0"))
+READ_SNAPSHOT_DIR = os.getenv("PFT_READ_SNAPSHOT_DIR", os.path.join(BASE_DIR, "snapshots"))
+# The copy holds the primary's read lock for this many pages at a time and
+# sleeps this many seconds between steps, so writers are never held up long
+READ_SNAPSHOT_BACKUP_PAGES = int(os.getenv("PFT_READ_SNAPSHOT_BACKUP_PAGES", "256"))
+READ_SNAPSHOT_BACKUP_PAUSE = float(os.getenv("PFT_READ_SNAPSHOT_BACKUP_PAUSE", "0.005"))
+
+# === RESPONSES ===
+# Bodies at least this large are compressed when the client accepts br/gzip
+COMPRESS_MIN_BYTES = int(os.getenv("PFT_COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_LEVEL = int(os.getenv("PFT_COMPRESS_LEVEL", "5"))
+
+# === MONEY ===
+# Amounts are stored as integer minor units of this currency (paise for INR)
+MONEY_CURRENCY = os.getenv("PFT_MONEY_CURRENCY", "INR")
+
+# === ARCHIVE ===
+# Transactions older than ARCHIVE_HORIZON_MONTHS (counted from the start of the
+# current month) are moved into per-year SQLite files under ARCHIVE_DIR by
+# scripts/archive_transactions.py; queries attach them only when needed.
+ARCHIVE_DIR = os.getenv("PFT_ARCHIVE_DIR", os.path.join(BASE_DIR, "archive"))
+ARCHIVE_HORIZON_MONTHS = int(os.getenv("PFT_ARCHIVE_HORIZON_MONTHS", "24"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("PFT_ARCHIVE_BATCH_SIZE", "500"))
+
+# === PUSH EVENTS (SSE) ===
+# GET /api/events streams new transactions, balance changes and budget status
+# transitions. Writes queue events in the events table; every worker tails it
+# every SSE_POLL_INTERVAL seconds and fans out to its own subscribers. An idle
+# subscriber costs one small queue, but the threaded dev server also pins a
+# thread per stream; serve thousands per worker with a cooperative worker
+# (e.g. gunicorn -k gevent).
+SSE_POLL_INTERVAL = float(os.getenv("PFT_SSE_POLL_INTERVAL", "0.5"))
+SSE_HEARTBEAT = float(os.getenv("PFT_SSE_HEARTBEAT", "15"))
+SSE_MAX_SUBSCRIBERS = int(os.getenv("PFT_SSE_MAX_SUBSCRIBERS", "5000"))
+# Undelivered events per subscriber before a slow client is dropped (it reconnects and replays)
+SSE_QUEUE_SIZE = int(os.getenv("PFT_SSE_QUEUE_SIZE", "100"))
+# Seconds events stay replayable for reconnecting clients (Last-Event-ID)
+SSE_EVENT_RETENTION = int(os.getenv("PFT_SSE_EVENT_RETENTION", "3600"))
+
+# === SLOW QUERY LOG ===
+# Statements slower than this many milliseconds are logged to the
+# "pft.slow_query" logger with their bound parameters, route and query plan.
+# 0 turns the log (and its per-statement timing) off.
+SLOW_QUERY_MS = float(os.getenv("PFT_SLOW_QUERY_MS", "200"))
+
+# === ADMISSION CONTROL ===
+# Per-user token buckets and in-flight caps for each route class, keyed by the
+# JWT identity; a request over either limit gets 429 with Retry-After.
+# "memory" limits every worker on its own, "sqlite" shares the counters
+# between the workers of one host through RATE_LIMIT_DB_PATH (best on a tmpfs
+# such as /dev/shm), "off" admits everything.
+RATE_LIMIT_BACKEND = os.getenv("PFT_RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_DB_PATH = os.getenv("PFT_RATE_LIMIT_DB_PATH", os.path.join(BASE_DIR, "limits.db"))
+# class: (requests per second, burst, requests in flight); 0 turns that check off
+RATE_LIMITS = {
+    "read": (
+        float(os.getenv("PFT_RATE_READ", "20")),
+        int(os.getenv("PFT_BURST_READ", "60")),
+        int(os.getenv("PFT_CONCURRENCY_READ", "8")),
+    ),
+    "write": (
+        float(os.getenv("PFT_RATE_WRITE", "5")),
+        int(os.getenv("PFT_BURST_WRITE", "20")),
+        int(os.getenv("PFT_CONCURRENCY_WRITE", "2")),
+    ),
+    "ml": (
+        float(os.getenv("PFT_RATE_ML", "2")),
+        int(os.getenv("PFT_BURST_ML", "10")),
+        int(os.getenv("PFT_CONCURRENCY_ML", "1")),
+    ),
+}
+# Seconds an in-flight slot counts in the sqlite backend if its worker died before releasing it
+RATE_LIMIT_SLOT_TTL = float(os.getenv("PFT_RATE_LIMIT_SLOT_TTL", "60"))
+
+# === ML INFERENCE ===
+# suggest-category runs the classifier in ML_WORKERS processes, each loading
+# the model once; 0 predicts inline on the request thread. Requests arriving
+# within ML_BATCH_WINDOW_MS of the first one (or while every worker is busy)
+# go to a worker as one batch of at most ML_MAX_BATCH descriptions.
+ML_WORKERS = int(os.getenv("PFT_ML_WORKERS", "2"))
+ML_BATCH_WINDOW_MS = float(os.getenv("PFT_ML_BATCH_WINDOW_MS", "2"))
+ML_MAX_BATCH = int(os.getenv("PFT_ML_MAX_BATCH", "64"))
+# Seconds a request waits for its prediction before answering 503
+ML_TIMEOUT = float(os.getenv("PFT_ML_TIMEOUT", "2"))
+
+# === MERCHANT INDEX ===
+# suggest-category first looks for similar past descriptions of the same user
+# (MinHash over character n-grams, see ml/merchants.py) and only asks the
+# classifier when none is at least MERCHANT_MATCH_THRESHOLD similar (Jaccard).
+# Each worker keeps the indexes of its MERCHANT_INDEX_USERS most recent users,
+# built from their latest MERCHANT_INDEX_MAX_ROWS transactions.
+MERCHANT_MATCH_THRESHOLD = float(os.getenv("PFT_MERCHANT_MATCH_THRESHOLD", "0.5"))
+MERCHANT_INDEX_USERS = int(os.getenv("PFT_MERCHANT_INDEX_USERS", "1000"))
+MERCHANT_INDEX_MAX_ROWS = int(os.getenv("PFT_MERCHANT_INDEX_MAX_ROWS", "20000"))
+
+# === DUPLICATE DETECTION ===
+# A new transaction on the same account with the same amount within this many
+# days of an existing one is reported as a possible duplicate (409, or
+# skipped by the import) unless the client passes allow_duplicate(s).
+DUPLICATE_WINDOW_DAYS = int(os.getenv("PFT_DUPLICATE_WINDOW_DAYS", "3"))
+# Rows accepted by one POST /api/transactions/import
+IMPORT_MAX_ROWS = int(os.getenv("PFT_IMPORT_MAX_ROWS", "5000"))
+
+# === DATABASE MAINTENANCE ===
+# A background thread in each worker keeps the SQLite files healthy (see
+# maintenance.py); the work itself runs in one worker at a time. Every
+# MAINTENANCE_INTERVAL seconds: PRAGMA optimize and reclaiming free pages in
+# steps of MAINTENANCE_VACUUM_STEP. ANALYZE and quick_check run on their own,
+# longer periods. 0 turns the thread off
+# (scripts/maintain_database.py runs the same pass from cron). Files created
+# before the maintenance_log table existed get it from scripts/create_table.py.
+MAINTENANCE_INTERVAL = float(os.getenv("PFT_MAINTENANCE_INTERVAL", "3600"))
+MAINTENANCE_ANALYZE_EVERY = float(os.getenv("PFT_MAINTENANCE_ANALYZE_EVERY", "86400"))
+MAINTENANCE_CHECK_EVERY = float(os.getenv("PFT_MAINTENANCE_CHECK_EVERY", "86400"))
+MAINTENANCE_VACUUM_STEP = int(os.getenv("PFT_MAINTENANCE_VACUUM_STEP", "256"))
+# Seconds between vacuum steps, so writers get the lock in between
+MAINTENANCE_STEP_PAUSE = float(os.getenv("PFT_MAINTENANCE_STEP_PAUSE", "0.05"))
+# Rows ANALYZE samples per index (PRAGMA analysis_limit); 0 reads everything
+MAINTENANCE_ANALYSIS_LIMIT = int(os.getenv("PFT_MAINTENANCE_ANALYSIS_LIMIT", "1000"))
@@ -0,0 +1,845 @@
+import itertools
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from urllib.parse import quote
+
+from config import (
+    DATABASE_URL,
+    DB_PATH,
+    DIRECTORY_DB_PATH,
+    FETCH_CHUNK_SIZE,
+    PG_POOL_MAX,
+    PG_POOL_MIN,
+    READ_SNAPSHOT_BACKUP_PAGES,
+    READ_SNAPSHOT_BACKUP_PAUSE,
+    READ_SNAPSHOT_DIR,
+    READ_SNAPSHOT_MAX_STALENESS,
+    SHARD_COUNT,
+    SHARD_DIR,
+    SLOW_QUERY_MS,
+    SQLITE_BUSY_TIMEOUT,
+)
+from flask import has_request_context, request
+
+try:  # PostgreSQL support is optional
+    import psycopg
+    from psycopg.rows import dict_row, tuple_row
+    from psycopg.types.string import TextLoader
+    from psycopg_pool import ConnectionPool
+except ImportError:
+    psycopg = None
+
+# === SCHEMA ===
+# Every SQLite file (the single DB, the shard directory and each shard) starts with this part
+USERS_SCHEMA = """
+-- ======================
+-- USERS TABLE
+-- ======================
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL UNIQUE,
+    email TEXT NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ======================
+-- MAINTENANCE LOG
+-- Last run of each maintenance task on this file (see maintenance.py);
+-- last_run is a Unix time, set when a worker claims the task.
+-- ======================
+CREATE TABLE IF NOT EXISTS maintenance_log (
+    task TEXT PRIMARY KEY,
+    last_run REAL NOT NULL,
+    seconds REAL,
+    result TEXT
+);
+"""
+
+DATA_SCHEMA = """
+-- ======================
+-- CATEGORIES TABLE
+-- ======================
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL CHECK (type IN ('INCOME', 'EXPENSE')),
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(user_id, name),
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- ======================
+-- ACCOUNTS TABLE
+-- ======================
+CREATE TABLE IF NOT EXISTS accounts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL CHECK (type IN ('CHECKING', 'SAVINGS', 'CREDIT_CARD')),
+    initial_balance INTEGER NOT NULL DEFAULT 0,
+    currency TEXT NOT NULL DEFAULT 'INR',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(user_id, name),
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- ======================
+-- TRANSACTIONS TABLE
+-- ======================
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    description TEXT,
+    amount INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    transaction_type TEXT NOT NULL CHECK (transaction_type IN ('INCOME', 'EXPENSE', 'TRANSFER')),
+    account_id INTEGER NOT NULL,
+    category_id INTEGER NOT NULL,
+    target_account_id INTEGER,
+    is_anomaly BOOLEAN DEFAULT 0,
+    fingerprint TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+    FOREIGN KEY (account_id) REFERENCES accounts (id) ON DELETE RESTRICT,
+    FOREIGN KEY (category_id) REFERENCES categories (id) ON DELETE RESTRICT,
+    FOREIGN KEY (target_account_id) REFERENCES accounts (id) ON DELETE SET NULL
+);
+-- Date filters are written as ranges (date >= ? AND date < ?) so these apply
+CREATE INDEX IF NOT EXISTS idx_transactions_user_date ON transactions (user_id, date);
+CREATE INDEX IF NOT EXISTS idx_transactions_user_category_date ON transactions (user_id, category_id, date);
+CREATE INDEX IF NOT EXISTS idx_transactions_account ON transactions (account_id);
+CREATE INDEX IF NOT EXISTS idx_transactions_target_account ON transactions (target_account_id);
+-- Duplicate detection (see duplicates.py): fingerprints of kept duplicates stay NULL
+CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_fingerprint ON transactions (user_id, fingerprint) WHERE fingerprint IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_transactions_user_account_amount_date ON transactions (user_id, account_id, amount, date);
+
+-- ======================
+-- BUDGETS TABLE
+-- ======================
+CREATE TABLE IF NOT EXISTS budgets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    category_id INTEGER NOT NULL,
+    month INTEGER NOT NULL CHECK (month BETWEEN 1 AND 12),
+    year INTEGER NOT NULL,
+    limit_amount INTEGER NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(user_id, category_id, month, year),
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+    FOREIGN KEY (category_id) REFERENCES categories (id) ON DELETE CASCADE
+);
+
+-- ======================
+-- ARCHIVED BALANCES
+-- Net effect of each account's archived transactions (see archive.py), so
+-- balances never have to scan the archive files.
+-- ======================
+CREATE TABLE IF NOT EXISTS archived_balances (
+    account_id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    net INTEGER NOT NULL DEFAULT 0
+);
+
+-- ======================
+-- CHANGE LOG
+-- Append-only history of row changes per user for GET /api/sync. The
+-- latest op per (entity, entity_id) wins; 'delete' rows are tombstones.
+-- ======================
+CREATE TABLE IF NOT EXISTS change_log (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    entity TEXT NOT NULL,
+    entity_id INTEGER NOT NULL,
+    op TEXT NOT NULL CHECK (op IN ('upsert', 'delete')),
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_change_log_user_version ON change_log (user_id, version);
+
+-- ======================
+-- BUDGET STATUS
+-- Spent amount and green/yellow/red status of each budget, re-evaluated by
+-- the writes that touch its category and month (see budgets.py).
+-- ======================
+CREATE TABLE IF NOT EXISTS budget_status (
+    budget_id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    spent INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (budget_id) REFERENCES budgets (id) ON DELETE CASCADE
+);
+
+-- ======================
+-- EVENTS
+-- Outbox for GET /api/events; every worker tails it (see events.py).
+-- ======================
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_events_user ON events (user_id, id);
+"""
+
+SCHEMA = USERS_SCHEMA + DATA_SCHEMA
+
+# Money columns hold integer minor units (see money.py)
+MONEY_COLUMNS = {
+    "accounts": ("initial_balance",),
+    "transactions": ("amount",),
+    "budgets": ("limit_amount",),
+}
+
+POSTGRES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id BIGSERIAL PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    email TEXT NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS categories (
+    id BIGSERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL CHECK (type IN ('INCOME', 'EXPENSE')),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(user_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS accounts (
+    id BIGSERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL CHECK (type IN ('CHECKING', 'SAVINGS', 'CREDIT_CARD')),
+    initial_balance BIGINT NOT NULL DEFAULT 0,
+    currency TEXT NOT NULL DEFAULT 'INR',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(user_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS transactions (
+    id BIGSERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    description TEXT,
+    amount BIGINT NOT NULL,
+    date DATE NOT NULL,
+    transaction_type TEXT NOT NULL CHECK (transaction_type IN ('INCOME', 'EXPENSE', 'TRANSFER')),
+    account_id BIGINT NOT NULL REFERENCES accounts (id) ON DELETE RESTRICT,
+    category_id BIGINT NOT NULL REFERENCES categories (id) ON DELETE RESTRICT,
+    target_account_id BIGINT REFERENCES accounts (id) ON DELETE SET NULL,
+    is_anomaly SMALLINT DEFAULT 0,
+    fingerprint TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_user_date ON transactions (user_id, date);
+CREATE INDEX IF NOT EXISTS idx_transactions_user_category_date ON transactions (user_id, category_id, date);
+CREATE INDEX IF NOT EXISTS idx_transactions_account ON transactions (account_id);
+CREATE INDEX IF NOT EXISTS idx_transactions_target_account ON transactions (target_account_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_fingerprint ON transactions (user_id, fingerprint) WHERE fingerprint IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_transactions_user_account_amount_date ON transactions (user_id, account_id, amount, date);
+
+CREATE TABLE IF NOT EXISTS budgets (
+    id BIGSERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    category_id BIGINT NOT NULL REFERENCES categories (id) ON DELETE CASCADE,
+    month INTEGER NOT NULL CHECK (month BETWEEN 1 AND 12),
+    year INTEGER NOT NULL,
+    limit_amount BIGINT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(user_id, category_id, month, year)
+);
+
+CREATE TABLE IF NOT EXISTS archived_balances (
+    account_id BIGINT PRIMARY KEY,
+    user_id BIGINT NOT NULL,
+    net BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS change_log (
+    version BIGSERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL,
+    entity TEXT NOT NULL,
+    entity_id BIGINT NOT NULL,
+    op TEXT NOT NULL CHECK (op IN ('upsert', 'delete')),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_change_log_user_version ON change_log (user_id, version);
+
+CREATE TABLE IF NOT EXISTS budget_status (
+    budget_id BIGINT PRIMARY KEY REFERENCES budgets (id) ON DELETE CASCADE,
+    user_id BIGINT NOT NULL,
+    spent BIGINT NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS events (
+    id BIGSERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL,
+    type TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_events_user ON events (user_id, id);
+
+CREATE TABLE IF NOT EXISTS maintenance_log (
+    task TEXT PRIMARY KEY,
+    last_run DOUBLE PRECISION NOT NULL,
+    seconds DOUBLE PRECISION,
+    result TEXT
+);
+"""
+
+# Copy order that satisfies the foreign keys above
+DATA_TABLES = (
+    "categories",
+    "accounts",
+    "transactions",
+    "budgets",
+    "archived_balances",
+    "change_log",
+    "budget_status",
+    "events",
+)
+
+
+# === BACKEND SELECTION ===
+def is_postgres():
+    return DATABASE_URL.startswith(("postgres://", "postgresql://"))
+
+
+# Exceptions routes can catch regardless of backend
+Error = (sqlite3.Error,) + ((psycopg.Error,) if psycopg else ())
+IntegrityError = (sqlite3.IntegrityError,) + ((psycopg.IntegrityError,) if psycopg else ())
+
+
+# === DIALECTS ===
+# SQL fragments that differ between backends. Routes interpolate these into
+# their queries; everything else is written once with ? placeholders.
+class SQLiteDialect:
+    name = "sqlite"
+
+    def year(self, col):
+        return f"strftime('%Y', {col})"
+
+    def month(self, col):
+        return f"strftime('%m', {col})"
+
+    def year_month(self, col):
+        return f"strftime('%Y-%m', {col})"
+
+
+class PostgresDialect:
+    name = "postgresql"
+
+    def year(self, col):
+        return f"to_char({col}, 'YYYY')"
+
+    def month(self, col):
+        return f"to_char({col}, 'MM')"
+
+    def year_month(self, col):
+        return f"to_char({col}, 'YYYY-MM')"
+
+
+dialect = PostgresDialect() if is_postgres() else SQLiteDialect()
+
+
+# === SLOW QUERY LOG ===
+# Connections time every execute() when SLOW_QUERY_MS > 0 and log the slow
+# ones with the plan the database chose, so a query that quietly stopped using
+# an index shows up with the reason attached. The time covers execute() only:
+# on SQLite that is the work up to the first row, which for aggregates and
+# unindexed ORDER BYs is the whole scan.
+slow_query_log = logging.getLogger("pft.slow_query")
+
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def _sqlite_plan(conn, sql, params):
+    # The base class execute() skips the timing wrapper below
+    rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    depth = {0: -1}
+    lines = []
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node] + detail)
+    return lines
+
+
+def _pg_plan(pg_conn, sql, params):
+    # A savepoint keeps a failed EXPLAIN from aborting the caller's transaction
+    with pg_conn.transaction():
+        cur = pg_conn.cursor(row_factory=tuple_row)
+        return [row[0] for row in cur.execute("EXPLAIN " + _pg_sql(sql), params)]
+
+
+def log_slow_query(plan_of, conn, sql, params, elapsed_ms):
+    """Log one slow statement; ``plan_of(conn, sql, params)`` returns its plan lines."""
+    plan = []
+    if sql.lstrip()[:7].upper().startswith(_EXPLAINABLE):
+        try:
+            plan = plan_of(conn, sql, params)
+        except Error as e:
+            plan = [f"(no plan: {e})"]
+    route = f"{request.method} {request.path}" if has_request_context() else None
+    slow_query_log.warning(
+        "%.1f ms %s\n%s\nparams: %r\nplan:\n%s",
+        elapsed_ms,
+        route or "-",
+        " ".join(sql.split()),
+        params,
+        "\n".join(plan),
+        extra={"query_sql": sql, "query_params": params, "query_plan": plan, "query_route": route, "query_ms": elapsed_ms},
+    )
+
+
+# "SCAN <name>" in a SQLite plan line; the name is a table, a schema-qualified table or an alias
+_SCAN_LINE = re.compile(r"\bSCAN (\S+)")
+_NOT_ALIASES = {"WHERE", "JOIN", "LEFT", "INNER", "ON", "GROUP", "ORDER", "LIMIT", "UNION", "SELECT", "VALUES"}
+
+
+def table_scans(sql, plan, table="transactions"):
+    """Lines of a logged ``plan`` that fully scan ``table`` (hot or archived) as named in ``sql``."""
+    names = set()
+    ref = re.compile(rf"\b(?:FROM|JOIN|INTO)\s+((?:\w+\.)?{table})\b(?:\s+(?:AS\s+)?(\w+))?", re.I)
+    for name, alias in ref.findall(sql):
+        names.add(name)
+        if alias and alias.upper() not in _NOT_ALIASES:
+            names.add(alias)
+    return [line.strip() for line in plan if (m := _SCAN_LINE.search(line)) and m.group(1) in names]
+
+
+class TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, params=()):
+        start = time.perf_counter()
+        super().execute(sql, params)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms >= SLOW_QUERY_MS:
+            log_slow_query(_sqlite_plan, self.connection, sql, params, elapsed_ms)
+        return self
+
+
+class TimedConnection(sqlite3.Connection):
+    """sqlite3 connection whose statements go through TimedCursor."""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+
+def _sqlite_factory():
+    return TimedConnection if SLOW_QUERY_MS > 0 else sqlite3.Connection
+
+
+# === POSTGRESQL ===
+_pool = None
+_pool_lock = threading.Lock()
+_cursor_names = itertools.count()
+
+
+@lru_cache(maxsize=512)
+def _pg_sql(sql):
+    # Routes use sqlite-style ? placeholders; psycopg wants %s and literal % doubled
+    return sql.replace("%", "%%").replace("?", "%s")
+
+
+def _configure_pg(conn):
+    # Hand dates back as ISO strings, exactly like the TEXT columns in SQLite
+    for type_name in ("date", "timestamp", "timestamptz"):
+        conn.adapters.register_loader(type_name, TextLoader)
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                if psycopg is None:
+                    raise RuntimeError("PFT_DATABASE_URL is PostgreSQL but psycopg[pool] is not installed")
+                _pool = ConnectionPool(
+                    DATABASE_URL,
+                    min_size=PG_POOL_MIN,
+                    max_size=PG_POOL_MAX,
+                    kwargs={"row_factory": dict_row},
+                    configure=_configure_pg,
+                    open=True,
+                )
+    return _pool
+
+
+class PostgresCursor:
+    def __init__(self, cur):
+        self._cur = cur
+
+    def execute(self, sql, params=()):
+        if SLOW_QUERY_MS <= 0:
+            self._cur.execute(_pg_sql(sql), params)
+            return self
+        start = time.perf_counter()
+        self._cur.execute(_pg_sql(sql), params)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms >= SLOW_QUERY_MS:
+            log_slow_query(_pg_plan, self._cur.connection, sql, params, elapsed_ms)
+        return self
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    def fetchmany(self, size):
+        return self._cur.fetchmany(size)
+
+    def close(self):
+        self._cur.close()
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    def __iter__(self):
+        return iter(self._cur)
+
+
+class PostgresConnection:
+    """Pooled psycopg connection exposing the subset of sqlite3.Connection the routes use."""
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._conn = pool.getconn()
+
+    def cursor(self, tuples=False):
+        if tuples:
+            return PostgresCursor(self._conn.cursor(row_factory=tuple_row))
+        return PostgresCursor(self._conn.cursor())
+
+    def server_cursor(self, tuples=False):
+        # Named cursors stay on the server and are fetched in chunks
+        name = f"pft_{next(_cursor_names)}"
+        if tuples:
+            return PostgresCursor(self._conn.cursor(name=name, row_factory=tuple_row))
+        return PostgresCursor(self._conn.cursor(name=name))
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        # Read-only requests never commit; end their transaction before reuse
+        if self._conn is not None:
+            self._conn.rollback()
+            self._pool.putconn(self._conn)
+            self._conn = None
+
+
+# Columns added to existing tables since their first release: init_db and
+# init_postgres add them to older databases before the schema's indexes
+# refer to them
+ADDED_COLUMNS = (("transactions", "fingerprint", "TEXT"),)
+
+
+def init_postgres(url=DATABASE_URL):
+    with psycopg.connect(url) as conn:
+        for table, column, sql_type in ADDED_COLUMNS:
+            conn.execute(f"ALTER TABLE IF EXISTS {table} ADD COLUMN IF NOT EXISTS {column} {sql_type}")
+        conn.execute(POSTGRES_SCHEMA)
+
+
+# === CONNECTIONS ===
+def connect(path):
+    conn = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT, factory=_sqlite_factory())
+    conn.row_factory = sqlite3.Row
+    # Enforce foreign keys
+    conn.execute("PRAGMA foreign_keys = ON;")
+    return conn
+
+
+def init_db(path, schema=SCHEMA):
+    """Create the schema in ``path``, or bring an older file up to date."""
+    with sqlite3.connect(path) as conn:
+        # Only takes effect on a new, empty file; lets maintenance.py return
+        # free pages in small steps (scripts/maintain_database.py converts old files)
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+        conn.execute("PRAGMA foreign_keys = ON;")
+        for table, column, sql_type in ADDED_COLUMNS:
+            columns = table_columns(conn, table)
+            if columns and column not in columns:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}")
+        conn.executescript(schema)
+
+
+# === SHARDING ===
+# Users live in the directory DB; everything else a user owns lives in exactly
+# one shard. Each shard also keeps a copy of its users' rows so the
+# REFERENCES users (id) constraints keep working inside the shard file.
+def is_sharded():
+    return SHARD_COUNT > 0 and not is_postgres()
+
+
+def shard_index(user_id):
+    return int(user_id) % SHARD_COUNT
+
+
+def shard_path(index, shard_dir=SHARD_DIR):
+    return os.path.join(shard_dir, f"shard_{index:03d}.db")
+
+
+def init_shards(shard_count=SHARD_COUNT, shard_dir=SHARD_DIR):
+    os.makedirs(shard_dir, exist_ok=True)
+    init_db(os.path.join(shard_dir, "directory.db"), USERS_SCHEMA)
+    for i in range(shard_count):
+        init_db(shard_path(i, shard_dir))
+
+
+def upgrade_schema():
+    """Create what is missing in every database the app uses; safe to run on each start."""
+    if is_postgres():
+        init_postgres()
+    elif is_sharded():
+        init_shards()
+    else:
+        init_db(DB_PATH)
+
+
+def get_directory_connection():
+    """Connection holding the users table (auth, registration)."""
+    if is_postgres():
+        return PostgresConnection(get_pool())
+    if not is_sharded():
+        return connect(DB_PATH)
+    return connect(DIRECTORY_DB_PATH)
+
+
+def db_path_for(user_id=None):
+    """SQLite file that owns ``user_id``'s data."""
+    if not is_sharded():
+        return DB_PATH
+    if user_id is None:
+        raise ValueError("user_id is required when sharding is enabled")
+    return shard_path(shard_index(user_id))
+
+
+def data_db_paths():
+    """Every SQLite file holding user data (the single DB or each shard)."""
+    if not is_sharded():
+        return [DB_PATH]
+    return [shard_path(i) for i in range(SHARD_COUNT)]
+
+
+def get_db_connection(user_id=None):
+    """Connection to the database that owns ``user_id``'s data."""
+    if is_postgres():
+        return PostgresConnection(get_pool())
+    return connect(db_path_for(user_id))
+
+
+def provision_user(user_id, username, email, password_hash):
+    """Mirror a freshly registered user into its shard (no-op when unsharded)."""
+    if not is_sharded():
+        return
+    conn = get_db_connection(user_id)
+    conn.execute(
+        "INSERT OR IGNORE INTO users (id, username, email, password_hash) VALUES (?, ?, ?, ?)",
+        (user_id, username, email, password_hash),
+    )
+    conn.commit()
+    conn.close()
+
+
+# === READ SNAPSHOTS ===
+# Long analytic scans read from a copy of the primary made with the SQLite
+# online backup API, so they never hold the primary's lock while
+# POST /api/transactions waits to write. Once the copy is older than
+# READ_SNAPSHOT_MAX_STALENESS a background thread makes a new one, and reads
+# keep using the old copy (reporting its real age) until it is swapped in
+# atomically. The file's mtime is the time its copy started, so every worker
+# process shares the same snapshot.
+snapshot_log = logging.getLogger("pft.snapshot")
+_snapshot_lock = threading.Lock()
+_refreshing = set()  # primaries this worker is copying right now
+
+
+def snapshot_path(path, snapshot_dir=READ_SNAPSHOT_DIR):
+    return os.path.join(snapshot_dir, os.path.basename(path) + ".snapshot")
+
+
+def snapshot_age(path):
+    try:
+        return max(0.0, time.time() - os.path.getmtime(path))
+    except OSError:
+        return None
+
+
+def refresh_snapshot(path, snapshot_dir=READ_SNAPSHOT_DIR, pages=READ_SNAPSHOT_BACKUP_PAGES, pause=READ_SNAPSHOT_BACKUP_PAUSE):
+    """Copy ``path`` into its snapshot, ``pages`` at a time.
+
+    The primary's read lock is only held for one step; between steps the
+    copy sleeps ``pause`` seconds so waiting writers get in. A write the
+    copy sees restarts it, so under heavy writes a refresh takes longer,
+    never the writers.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    target = snapshot_path(path, snapshot_dir)
+    tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    started = time.time()
+    src = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT)
+    dst = sqlite3.connect(tmp)
+    try:
+        src.backup(dst, pages=pages, progress=lambda status, remaining, total: time.sleep(pause))
+    finally:
+        dst.close()
+        src.close()
+    # Age counts from the start of the copy, so it is never understated
+    os.utime(tmp, (started, started))
+    # Readers that already opened the old snapshot keep their file handle
+    os.replace(tmp, target)
+    return target
+
+
+def _refresh_in_background(path):
+    with _snapshot_lock:
+        if path in _refreshing:
+            return
+        _refreshing.add(path)
+
+    def run():
+        try:
+            refresh_snapshot(path)
+        except (sqlite3.Error, OSError):
+            snapshot_log.exception("%s: snapshot refresh failed", path)
+        finally:
+            with _snapshot_lock:
+                _refreshing.discard(path)
+
+    threading.Thread(target=run, name="snapshot-refresh", daemon=True).start()
+
+
+def get_read_connection(user_id=None, max_staleness=READ_SNAPSHOT_MAX_STALENESS):
+    """Connection for analytic reads plus the age of its data in seconds.
+
+    Returns the primary (age 0) when snapshots are disabled or on PostgreSQL,
+    and while there is no snapshot recent enough to serve: none yet, or one
+    left over from long ago (over twice ``max_staleness`` old).
+    """
+    if is_postgres() or max_staleness <= 0:
+        return get_db_connection(user_id), 0.0
+
+    path = db_path_for(user_id)
+    target = snapshot_path(path)
+    age = snapshot_age(target)
+    if age is None or age > max_staleness:
+        _refresh_in_background(path)
+    if age is None or age > 2 * max_staleness:
+        return get_db_connection(user_id), 0.0
+
+    # Snapshots are never written in place, so skip locking entirely
+    conn = sqlite3.connect(f"file:{quote(target)}?mode=ro&immutable=1", uri=True, factory=_sqlite_factory())
+    conn.row_factory = sqlite3.Row
+    return conn, age
+
+
+# === QUERY HELPERS ===
+def insert(conn, sql, params=()):
+    """Run an INSERT and return the new row id on either backend."""
+    if isinstance(conn, PostgresConnection):
+        return conn.execute(sql + " RETURNING id", params).fetchone()["id"]
+    return conn.execute(sql, params).lastrowid
+
+
+def _stream_cursor(conn, tuples=False):
+    if isinstance(conn, PostgresConnection):
+        return conn.server_cursor(tuples=tuples)
+    cur = conn.cursor()
+    if tuples:
+        cur.row_factory = None
+    return cur
+
+
+def iter_rows(conn, sql, params=(), size=FETCH_CHUNK_SIZE):
+    """Yield rows ``size`` at a time (server-side cursor on PostgreSQL)."""
+    cur = _stream_cursor(conn)
+    try:
+        cur.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cur.close()
+
+
+def fetch_table(conn, sql, params=(), size=FETCH_CHUNK_SIZE):
+    """Run a read and return ``(column names, rows as plain tuples)``.
+
+    Skips the per-row sqlite3.Row / dict_row objects; pair with
+    responses.table_response for list endpoints.
+    """
+    cur = _stream_cursor(conn, tuples=True)
+    try:
+        cur.execute(sql, params)
+        columns = [d[0] for d in cur.description]
+        rows = []
+        while True:
+            chunk = cur.fetchmany(size)
+            if not chunk:
+                break
+            rows.extend(chunk)
+        return columns, rows
+    finally:
+        cur.close()
+
+
+def lock_user(conn, user_id):
+    """Serialize this transaction with the user's other writers until commit.
+
+    SQLite takes the database write lock up front (BEGIN IMMEDIATE) unless a
+    write already holds it; PostgreSQL takes a per-user advisory lock. Besides
+    read-then-write consistency, this keeps sequence values (change_log,
+    events) committing in order per user, so a tailing reader never skips a
+    row that becomes visible after it moved past its id.
+    """
+    if isinstance(conn, PostgresConnection):
+        conn.execute("SELECT pg_advisory_xact_lock(?)", (int(user_id),))
+    elif not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+
+
+def record_change(conn, user_id, entity, entity_ids, op="upsert"):
+    """Append ``entity_ids`` to the user's change log in the caller's transaction."""
+    if isinstance(entity_ids, (int, str)):
+        entity_ids = (entity_ids,)
+    lock_user(conn, user_id)
+    for entity_id in entity_ids:
+        conn.execute(
+            "INSERT INTO change_log (user_id, entity, entity_id, op) VALUES (?, ?, ?, ?)",
+            (user_id, entity, int(entity_id), op),
+        )
+
+
+def table_columns(conn, table, schema="main"):
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
@@ -0,0 +1,171 @@
+import hashlib
+import re
+from datetime import date, timedelta
+
+from archive import transactions_source
+from config import DUPLICATE_WINDOW_DAYS
+from database import iter_rows
+from money import to_major
+
+# Duplicate detection. Each transaction stores a fingerprint: a hash of its
+# account, date, amount and normalized description. The unique index on
+# (user_id, fingerprint) stops the same bank line from being saved twice even
+# when two requests race. Before a row is written, one probe of
+# idx_transactions_user_account_amount_date finds both the exact copy and
+# the same amount on the same account a few days away (posting date vs
+# entry date, or a statement exported with different cut-offs). Only an
+# exact copy is refused (409, or skipped by an import); a same-amount row a
+# few days away is saved and reported as possible_duplicate, since repeat
+# purchases (a daily coffee, a weekly subscription) look just like it. Exact
+# copies the user keeps on purpose are stored with a NULL fingerprint.
+
+_NOISE = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_description(description):
+    """Case, punctuation and spacing differences do not make a new transaction."""
+    return " ".join(_NOISE.sub(" ", (description or "").lower()).split())
+
+
+def fingerprint(account_id, date_str, amount, description):
+    """Hex digest identifying a transaction; ``amount`` is in minor units."""
+    key = f"{int(account_id)}|{date_str}|{int(amount)}|{normalize_description(description)}"
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def refused(duplicate, allow_duplicate=False):
+    """Whether a write stops at the ``duplicate`` check() found: only an exact copy, unless allowed."""
+    return duplicate is not None and duplicate["match"] == "exact" and not allow_duplicate
+
+
+def _day(value):
+    return date.fromisoformat(str(value)[:10])
+
+
+class DuplicateChecker:
+    """Finds existing transactions a new row would duplicate.
+
+    Resolves the transactions source (which may ATTACH archives) up front
+    for every date in ``dates``, so checks can run inside the caller's write
+    transaction. Rows inserted through the same connection are seen by later
+    checks, which covers duplicates within one import.
+    """
+
+    def __init__(self, conn, user_id, dates, window=DUPLICATE_WINDOW_DAYS):
+        self.conn = conn
+        self.user_id = user_id
+        self.window = timedelta(days=window)
+        days = [_day(d) for d in dates]
+        start = (min(days) - self.window).isoformat() if days else None
+        end = (max(days) + self.window + timedelta(days=1)).isoformat() if days else None
+        self.source = transactions_source(conn, user_id, start, end)
+
+    def check(self, account_id, date_str, amount, description, exclude_id=None):
+        """``(fingerprint to store, possible duplicate or None)``.
+
+        The duplicate is the exact copy if there is one, else the nearest
+        same-amount row within the window; the fingerprint is None when an
+        exact copy exists (storing it would violate the unique index).
+        """
+        fp = fingerprint(account_id, date_str, amount, description)
+        day = _day(date_str)
+        rows = self.conn.execute(
+            f"""
+            SELECT id, date, description, amount FROM {self.source} t
+            WHERE user_id = ? AND account_id = ? AND amount = ? AND date >= ? AND date < ?
+            """,
+            (
+                self.user_id,
+                account_id,
+                amount,
+                (day - self.window).isoformat(),
+                (day + self.window + timedelta(days=1)).isoformat(),
+            ),
+        ).fetchall()
+        best = None
+        for row in rows:
+            if exclude_id is not None and row["id"] == int(exclude_id):
+                continue
+            exact = fingerprint(account_id, row["date"], row["amount"], row["description"]) == fp
+            rank = (not exact, abs((_day(row["date"]) - day).days))
+            if best is None or rank < best[0]:
+                best = (rank, row, exact)
+        if best is None:
+            return fp, None
+        _, row, exact = best
+        duplicate = {
+            "id": row["id"],
+            "date": row["date"],
+            "description": row["description"],
+            "amount": to_major(row["amount"]),
+            "match": "exact" if exact else "window",
+        }
+        return (None if exact else fp), duplicate
+
+
+def duplicate_groups(conn, user_id, start=None, end=None, window=DUPLICATE_WINDOW_DAYS):
+    """Groups of the user's transactions with the same account and amount, each within ``window`` days of the next.
+
+    One ordered pass over the (user_id, account_id, amount, date) index,
+    then one lookup for the details of the rows that were flagged.
+    """
+    source = transactions_source(conn, user_id, start, end)
+    query = f"SELECT id, account_id, amount, date FROM {source} t WHERE user_id = ?"
+    params = [user_id]
+    if start:
+        query += " AND date >= ?"
+        params.append(start)
+    if end:
+        query += " AND date < ?"
+        params.append(end)
+    query += " ORDER BY account_id, amount, date, id"
+
+    clusters = []
+    current = []
+    for row in iter_rows(conn, query, params):
+        key, day = (row["account_id"], row["amount"]), _day(row["date"])
+        if current and current[-1][0] == key and (day - current[-1][1]).days <= window:
+            current.append((key, day, row["id"]))
+            continue
+        if len(current) > 1:
+            clusters.append([tx_id for _, _, tx_id in current])
+        current = [(key, day, row["id"])]
+    if len(current) > 1:
+        clusters.append([tx_id for _, _, tx_id in current])
+
+    ids = [tx_id for cluster in clusters for tx_id in cluster]
+    details = {}
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        for row in conn.execute(
+            f"""
+            SELECT t.id, t.date, t.description, t.amount, t.account_id, a.name AS account_name, c.name AS category
+            FROM {source} t
+            JOIN accounts a ON t.account_id = a.id
+            JOIN categories c ON t.category_id = c.id
+            WHERE t.user_id = ? AND t.id IN ({','.join('?' * len(chunk))})
+            """,
+            [user_id] + chunk,
+        ):
+            details[row["id"]] = row
+
+    groups = []
+    for cluster in clusters:
+        rows = [details[tx_id] for tx_id in cluster if tx_id in details]
+        if len(rows) < 2:
+            continue
+        prints = [fingerprint(r["account_id"], r["date"], r["amount"], r["description"]) for r in rows]
+        groups.append(
+            {
+                "account_id": rows[0]["account_id"],
+                "account_name": rows[0]["account_name"],
+                "amount": to_major(rows[0]["amount"]),
+                "match": "exact" if len(set(prints)) < len(prints) else "window",
+                "transactions": [
+                    {"id": r["id"], "date": r["date"], "description": r["description"], "category": r["category"]}
+                    for r in rows
+                ],
+            }
+        )
+    groups.sort(key=lambda group: group["transactions"][-1]["date"], reverse=True)
+    return groups
@@ -0,0 +1,254 @@
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+from config import (
+    SSE_EVENT_RETENTION,
+    SSE_HEARTBEAT,
+    SSE_MAX_SUBSCRIBERS,
+    SSE_POLL_INTERVAL,
+    SSE_QUEUE_SIZE,
+)
+from database import Error, connect, data_db_paths, db_path_for, get_db_connection, is_postgres
+from responses import dumps
+
+# Server-Sent Events. Writes add rows to the events table (an outbox written
+# next to the change); each worker runs one dispatcher thread that tails the
+# table and hands new rows to the queues of that worker's subscribers, so any
+# worker can serve any user's stream.
+
+log = logging.getLogger("pft.events")
+
+# Ids a PostgreSQL sequence handed out may commit out of order across users;
+# re-read this many ids behind the high-water mark and skip the ones seen
+PG_TAIL_LOOKBACK = 200
+PRUNE_EVERY = 300  # seconds between pruning runs of each dispatcher
+
+
+# === WRITING ===
+def record_event(conn, user_id, type_, data):
+    """Queue an event for the user's streams in the caller's transaction."""
+    conn.execute(
+        "INSERT INTO events (user_id, type, data) VALUES (?, ?, ?)",
+        (user_id, type_, dumps(data).decode()),
+    )
+
+
+def format_event(event_id, type_, data):
+    """One SSE frame; ``data`` is already JSON text."""
+    return f"id: {event_id}\nevent: {type_}\ndata: {data}\n\n"
+
+
+def replay(user_id, after_id, limit=500):
+    """Events for ``user_id`` newer than ``after_id`` (for Last-Event-ID reconnects)."""
+    conn = get_db_connection(user_id)
+    try:
+        return [
+            (row["id"], row["type"], row["data"])
+            for row in conn.execute(
+                "SELECT id, type, data FROM events WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?",
+                (user_id, after_id, limit),
+            )
+        ]
+    finally:
+        conn.close()
+
+
+def prune_events(conn, retention=SSE_EVENT_RETENTION):
+    cutoff = (datetime.now(timezone.utc) - timedelta(seconds=retention)).strftime("%Y-%m-%d %H:%M:%S")
+    conn.execute("DELETE FROM events WHERE created_at < ?", (cutoff,))
+    conn.commit()
+
+
+# === SUBSCRIBERS ===
+class Subscriber:
+    """One open stream: pending (id, type, data) tuples plus a wake-up flag.
+
+    A deque and an Event rather than queue.Queue (three Conditions) halves
+    the memory of an idle subscriber to about 2 KB.
+    """
+
+    __slots__ = ("user_id", "pending", "wakeup", "dropped", "start_id")
+
+    def __init__(self, user_id):
+        self.user_id = str(user_id)
+        self.pending = deque()
+        self.wakeup = threading.Event()
+        self.dropped = False
+        self.start_id = 0  # last event id when the stream opened
+
+    def put(self, event):
+        if len(self.pending) >= SSE_QUEUE_SIZE:
+            # Never let a stalled client grow without bound; it replays on reconnect
+            self.dropped = True
+        else:
+            self.pending.append(event)
+        self.wakeup.set()
+
+    def next_event(self, timeout=SSE_HEARTBEAT):
+        """Next queued event, or None after ``timeout`` seconds of silence."""
+        if not self.pending:
+            self.wakeup.wait(timeout)
+            self.wakeup.clear()
+        try:
+            return self.pending.popleft()
+        except IndexError:
+            return None
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class Broker:
+    """Per-worker registry of open streams, keyed by user id."""
+
+    def __init__(self, max_subscribers=SSE_MAX_SUBSCRIBERS):
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._count = 0
+        self._dispatcher = None
+        # Per events file (a SQLite path or "postgres"): the dispatcher's
+        # high-water mark and, on PostgreSQL, the ids seen near it. Seeded by
+        # the first subscriber on the file; until then it is not polled.
+        self._tails = {}
+        self._seen = {}
+        self._tail_lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        sub = Subscriber(user_id)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise TooManySubscribers()
+            self._subscribers.setdefault(sub.user_id, set()).add(sub)
+            self._count += 1
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, name="sse-dispatcher", daemon=True)
+                self._dispatcher.start()
+        try:
+            sub.start_id = self._mark(sub.user_id)
+        except Error:
+            self.unsubscribe(sub)
+            raise
+        return sub
+
+    def _mark(self, user_id):
+        """Last event id in the user's file, seeding the high-water mark there.
+
+        Runs once the subscriber is registered, so every event after the
+        returned id reaches it.
+        """
+        path = "postgres" if is_postgres() else db_path_for(user_id)
+        conn = get_db_connection(user_id)
+        try:
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) AS id FROM events").fetchone()["id"]
+            with self._tail_lock:
+                if path in self._tails:
+                    return last_id
+                seen = set()
+                if is_postgres():
+                    seen.update(
+                        row["id"] for row in conn.execute("SELECT id FROM events WHERE id > ?", (last_id - PG_TAIL_LOOKBACK,))
+                    )
+                self._seen[path] = seen
+                self._tails[path] = last_id
+        finally:
+            conn.close()
+        return last_id
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.user_id)
+            if subs and sub in subs:
+                subs.discard(sub)
+                self._count -= 1
+                if not subs:
+                    del self._subscribers[sub.user_id]
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subs = list(self._subscribers.get(str(user_id), ()))
+        for sub in subs:
+            sub.put(event)
+
+    # === DISPATCHER ===
+    def _dispatch(self):
+        paths = ["postgres"] if is_postgres() else data_db_paths()
+        last_prune = time.monotonic()
+        while True:
+            time.sleep(SSE_POLL_INTERVAL)
+            if not self._count:
+                continue
+            prune = time.monotonic() - last_prune > PRUNE_EVERY
+            for path in paths:
+                with self._tail_lock:
+                    high_water = self._tails.get(path)
+                if high_water is None and not prune:
+                    continue  # nobody has subscribed to this file yet
+                try:
+                    conn = get_db_connection() if path == "postgres" else connect(path)
+                except Error:
+                    continue
+                try:
+                    if high_water is not None:
+                        high_water = self._poll(conn, high_water, self._seen[path])
+                        with self._tail_lock:
+                            self._tails[path] = high_water
+                    if prune:
+                        prune_events(conn)
+                except Error:
+                    log.exception("%s: dispatcher poll failed", path)
+                finally:
+                    conn.close()
+            if prune:
+                last_prune = time.monotonic()
+
+    def _poll(self, conn, high_water, seen):
+        lookback = PG_TAIL_LOOKBACK if is_postgres() else 0
+        floor = max(0, high_water - lookback)
+        rows = conn.execute(
+            "SELECT id, user_id, type, data FROM events WHERE id > ? ORDER BY id LIMIT 1000",
+            (floor,),
+        ).fetchall()
+        for row in rows:
+            if row["id"] in seen:
+                continue
+            if lookback:
+                seen.add(row["id"])
+            high_water = max(high_water, row["id"])
+            self.publish(row["user_id"], (row["id"], row["type"], row["data"]))
+        if lookback:
+            seen.difference_update([i for i in seen if i <= high_water - lookback])
+        return high_water
+
+
+broker = Broker()
+
+
+def stream(sub, last_event_id=None):
+    """Generator of SSE frames for one subscriber; unsubscribes when the client goes away."""
+    try:
+        yield "retry: 3000\n\n"  # client reconnect delay (ms)
+        delivered = 0
+        if last_event_id is not None:
+            for event in replay(sub.user_id, last_event_id):
+                delivered = event[0]
+                yield format_event(*event)
+        else:
+            # An id with no data only sets the client's Last-Event-ID, so a
+            # reconnect before the first event replays from here
+            delivered = sub.start_id
+            yield f"id: {sub.start_id}\n\n"
+        while not sub.dropped:
+            event = sub.next_event()
+            if event is None:
+                yield ": ping\n\n"  # keeps proxies from timing out and detects closed clients
+                continue
+            if event[0] <= delivered:
+                continue  # already sent by replay
+            yield format_event(*event)
+    finally:
+        broker.unsubscribe(sub)
@@ -0,0 +1,48 @@
+from flask import request
+
+# Field selection. ``?fields=a,b`` picks the columns of a route's rows and
+# ``?include=x,y`` the sections of a summary; ``?profile=NAME`` supplies
+# defaults for a known client (e.g. "mobile") that explicit parameters
+# override. Routes build their SQL from the selection, so the joins and
+# sub-queries behind fields nobody asked for are never run.
+
+
+class SelectionError(ValueError):
+    pass
+
+
+def select_profile(profiles):
+    """Defaults of the ``?profile=`` the request names (empty without one)."""
+    name = request.args.get("profile")
+    if name is None:
+        return {}
+    if name not in profiles:
+        raise SelectionError(f"Unknown profile: {name}. Allowed: {', '.join(profiles)}")
+    return profiles[name]
+
+
+def select_fields(param, allowed, default, defaults=None):
+    """Names listed in ``?param=a,b`` (else in ``defaults``, else ``default``), in ``allowed`` order."""
+    raw = request.args.get(param)
+    if raw is None:
+        return tuple((defaults or {}).get(param, default))
+    names = {name.strip() for name in raw.split(",") if name.strip()}
+    unknown = sorted(names - set(allowed))
+    if unknown:
+        raise SelectionError(f"Unknown {param}: {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    if not names:
+        raise SelectionError(f"{param} must name at least one of: {', '.join(allowed)}")
+    return tuple(name for name in allowed if name in names)
+
+
+def select_sql(fields, columns):
+    """SELECT list for ``fields`` plus the joins they need.
+
+    ``columns`` maps each field to ``(SQL expression, JOIN clause or None)``.
+    """
+    joins = []
+    for field in fields:
+        join = columns[field][1]
+        if join and join not in joins:
+            joins.append(join)
+    return ", ".join(f"{columns[field][0]} AS {field}" for field in fields), " ".join(joins)
@@ -0,0 +1,236 @@
+import logging
+import math
+import sqlite3
+import threading
+import time
+
+import metrics
+from config import (
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_DB_PATH,
+    RATE_LIMIT_SLOT_TTL,
+    RATE_LIMITS,
+    SQLITE_BUSY_TIMEOUT,
+)
+
+# Admission control. Every authenticated request takes one token from the
+# user's bucket for its route class and holds one in-flight slot until it
+# finishes, so one client flooding writes or the classifier is turned away
+# with 429 instead of queueing everyone else behind the SQLite writer lock
+# or the CPU.
+
+log = logging.getLogger("pft.limits")
+
+ML_ENDPOINTS = {"suggest_category"}
+# Not counted: long-lived streams have their own cap, auth runs before a
+# user exists, and scrapers must always get through
+EXEMPT_ENDPOINTS = {"events", "login", "register", "metrics"}
+
+PRUNE_EVERY = 60  # seconds between clean-ups of idle buckets and dead slots
+
+metrics.describe("pft_admission_requests_total", "counter", "Requests by route class and admission outcome")
+metrics.describe("pft_admission_in_flight", "gauge", "Admitted requests still running in this worker")
+metrics.describe("pft_admission_errors_total", "counter", "Limiter backend failures (requests were admitted)")
+
+
+def route_class(endpoint, method):
+    if endpoint in ML_ENDPOINTS:
+        return "ml"
+    return "read" if method in ("GET", "HEAD") else "write"
+
+
+class Rejected(Exception):
+    def __init__(self, cls, reason, retry_after):
+        super().__init__(reason)
+        self.cls = cls
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+def refill(tokens, updated, now, rate, burst):
+    return min(burst, tokens + max(0.0, now - updated) * rate)
+
+
+class Limiter:
+    """Common bookkeeping; backends implement ``_acquire`` and ``_release``."""
+
+    def __init__(self, limits=RATE_LIMITS):
+        self.limits = limits
+
+    def acquire(self, user_id, cls):
+        """Admit one request or raise Rejected; pass the result to ``release``."""
+        rate, burst, concurrency = self.limits[cls]
+        try:
+            slot = self._acquire(str(user_id), cls, rate, burst, concurrency)
+        except Rejected as e:
+            metrics.inc("pft_admission_requests_total", route_class=cls, outcome=e.reason)
+            raise
+        except sqlite3.Error as e:
+            # A broken limiter must not take the API down with it
+            log.warning("acquire failed, admitting %s request: %s", cls, e)
+            metrics.inc("pft_admission_errors_total", route_class=cls)
+            return None
+        metrics.inc("pft_admission_requests_total", route_class=cls, outcome="admitted")
+        metrics.inc("pft_admission_in_flight", route_class=cls)
+        return cls, slot
+
+    def release(self, admission):
+        if admission is None:
+            return
+        cls, slot = admission
+        metrics.inc("pft_admission_in_flight", -1, route_class=cls)
+        try:
+            self._release(slot)
+        except sqlite3.Error as e:
+            log.warning("release failed for %s request: %s", cls, e)
+            metrics.inc("pft_admission_errors_total", route_class=cls)
+
+
+class MemoryLimiter(Limiter):
+    """Buckets and slot counts in this process only."""
+
+    def __init__(self, limits=RATE_LIMITS):
+        super().__init__(limits)
+        self._lock = threading.Lock()
+        self._buckets = {}  # (user_id, cls) -> (tokens, updated)
+        self._in_flight = {}  # (user_id, cls) -> count
+        self._last_prune = time.monotonic()
+
+    def _acquire(self, user_id, cls, rate, burst, concurrency):
+        key = (user_id, cls)
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_prune > PRUNE_EVERY:
+                self._prune(now)
+            if concurrency and self._in_flight.get(key, 0) >= concurrency:
+                raise Rejected(cls, "concurrency_limited", 1)
+            if rate:
+                tokens, updated = self._buckets.get(key, (burst, now))
+                tokens = refill(tokens, updated, now, rate, burst)
+                if tokens < 1:
+                    raise Rejected(cls, "rate_limited", (1 - tokens) / rate)
+                self._buckets[key] = (tokens - 1, now)
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+        return key
+
+    def _release(self, key):
+        with self._lock:
+            count = self._in_flight.get(key, 0) - 1
+            if count > 0:
+                self._in_flight[key] = count
+            else:
+                self._in_flight.pop(key, None)
+
+    def _prune(self, now):
+        # A bucket that has refilled completely is the same as no bucket
+        self._buckets = {
+            (user_id, cls): (tokens, updated)
+            for (user_id, cls), (tokens, updated) in self._buckets.items()
+            if refill(tokens, updated, now, *self.limits[cls][:2]) < self.limits[cls][1]
+        }
+        self._last_prune = now
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    user_id TEXT NOT NULL,
+    cls TEXT NOT NULL,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (user_id, cls)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS slots (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    cls TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_slots_user ON slots (user_id, cls, expires);
+"""
+
+
+class SQLiteLimiter(Limiter):
+    """Buckets and slots in a small SQLite file shared by every worker on the host.
+
+    Each decision is one short BEGIN IMMEDIATE transaction on that file,
+    never on the finance databases. Wall-clock time is used because
+    monotonic clocks are not comparable across processes. A slot whose
+    worker died counts until RATE_LIMIT_SLOT_TTL passes.
+    """
+
+    def __init__(self, path=RATE_LIMIT_DB_PATH, limits=RATE_LIMITS):
+        super().__init__(limits)
+        self.path = path
+        self._local = threading.local()
+        self._last_prune = 0.0
+        conn = self._conn()
+        conn.executescript(SQLITE_SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            # Losing limiter state in a crash only resets the buckets
+            conn.execute("PRAGMA synchronous = OFF")
+            self._local.conn = conn
+        return conn
+
+    def _acquire(self, user_id, cls, rate, burst, concurrency):
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if now - self._last_prune > PRUNE_EVERY:
+                self._prune(conn, now)
+            if concurrency:
+                count = conn.execute(
+                    "SELECT COUNT(*) FROM slots WHERE user_id = ? AND cls = ? AND expires > ?",
+                    (user_id, cls, now),
+                ).fetchone()[0]
+                if count >= concurrency:
+                    raise Rejected(cls, "concurrency_limited", 1)
+            if rate:
+                row = conn.execute(
+                    "SELECT tokens, updated FROM buckets WHERE user_id = ? AND cls = ?", (user_id, cls)
+                ).fetchone()
+                tokens = refill(*row, now, rate, burst) if row else burst
+                if tokens < 1:
+                    raise Rejected(cls, "rate_limited", (1 - tokens) / rate)
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (user_id, cls, tokens, updated) VALUES (?, ?, ?, ?)",
+                    (user_id, cls, tokens - 1, now),
+                )
+            slot = None
+            if concurrency:
+                slot = conn.execute(
+                    "INSERT INTO slots (user_id, cls, expires) VALUES (?, ?, ?)",
+                    (user_id, cls, now + RATE_LIMIT_SLOT_TTL),
+                ).lastrowid
+            conn.execute("COMMIT")
+            return slot
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _release(self, slot):
+        if slot is not None:
+            self._conn().execute("DELETE FROM slots WHERE id = ?", (slot,))
+
+    def _prune(self, conn, now):
+        conn.execute("DELETE FROM slots WHERE expires <= ?", (now,))
+        # Any bucket idle this long has refilled; dropping it changes nothing
+        idle = max((burst / rate for rate, burst, _ in self.limits.values() if rate), default=0)
+        conn.execute("DELETE FROM buckets WHERE updated < ?", (now - idle,))
+        self._last_prune = now
+
+
+def make_limiter(backend=RATE_LIMIT_BACKEND):
+    if backend == "off":
+        return None
+    if backend == "sqlite":
+        return SQLiteLimiter()
+    return MemoryLimiter()
+
+
+limiter = make_limiter()
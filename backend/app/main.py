@@ -1,8 +1,7 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
-import sqlite3
 import os
-import joblib
+from concurrent.futures import TimeoutError as FuturesTimeout
 from datetime import datetime, timedelta, date
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import (
@@ -10,38 +9,121 @@ from flask_jwt_extended import (
     create_access_token,
     jwt_required,
     get_jwt_identity,
+    verify_jwt_in_request,
 )
 
+from config import DUPLICATE_WINDOW_DAYS, IMPORT_MAX_ROWS, ML_TIMEOUT, MONEY_CURRENCY, READ_SNAPSHOT_MAX_STALENESS
+from database import (
+    Error,
+    IntegrityError,
+    dialect,
+    fetch_table,
+    get_db_connection,
+    get_directory_connection,
+    get_read_connection,
+    insert,
+    iter_rows,
+    lock_user,
+    provision_user,
+    record_change,
+    upgrade_schema,
+)
+from archive import (
+    each_archive,
+    find_transaction,
+    month_range,
+    restore_transaction,
+    transactions_exist,
+    transactions_source,
+    year_range,
+)
+from budgets import evaluate_budgets, month_budgets
+from duplicates import DuplicateChecker, duplicate_groups, refused
+from events import TooManySubscribers, broker, record_event, stream
+from fields import SelectionError, select_fields, select_profile, select_sql
+from limits import EXEMPT_ENDPOINTS, Rejected, limiter, route_class
+from maintenance import scheduler as maintenance_scheduler
+from metrics import render as render_metrics
+from ml.inference import inference, model_available
+from ml.merchants import best_category, merchant_indexes
+from money import Money, major_sql, supported_currency, to_major, to_minor
+from responses import json_response, table_response
+
 app = Flask(__name__)
 
 # Adjust origins as n
 CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True)
 
 # === CONFIG ===
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DB_PATH = os.path.join(BASE_DIR, "finance.db")
-
 # Replace with environment variable in production
 app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY", "super-secret-key")
 jwt = JWTManager(app)
 
+# === SCHEMA ===
+# Tables, columns and indexes added since the database was created are
+# created here, so an existing finance.db (or shard set, or PostgreSQL
+# database) works without running scripts/create_table.py first
+upgrade_schema()
+
 # === Helpers ===
-def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    # Enforce foreign keys
-    conn.execute("PRAGMA foreign_keys = ON;")
+def get_analytics_connection(user_id):
+    """Connection for aggregate-only routes; may serve a slightly stale snapshot."""
+    conn, g.data_age = get_read_connection(user_id)
     return conn
 
-# Load ML models (if present)
-try:
-    with open(os.path.join(BASE_DIR, "models/tfidf_vectorizer.pkl"), "rb") as f:
-        vectorizer = joblib.load(f)
-    with open(os.path.join(BASE_DIR, "models/logistic_regression_model.pkl"), "rb") as f:
-        classifier = joblib.load(f)
-except Exception:
-    vectorizer = None
-    classifier = None
+
+@app.after_request
+def add_freshness_headers(response):
+    age = g.get("data_age")
+    if age is not None:
+        response.headers["Age"] = str(int(age))
+        response.headers["Cache-Control"] = f"private, max-age={max(0, int(READ_SNAPSHOT_MAX_STALENESS - age))}"
+    return response
+
+
+# === DATABASE MAINTENANCE ===
+# The scheduler thread starts with the worker's first request and does its
+# work off the request path (see maintenance.py)
+@app.before_request
+def start_maintenance():
+    maintenance_scheduler.ensure_started()
+
+
+# === ADMISSION CONTROL ===
+# Per-user rate and concurrency limits by route class (see limits.py)
+@app.before_request
+def admit_request():
+    if limiter is None or request.endpoint is None or request.endpoint in EXEMPT_ENDPOINTS:
+        return None
+    if request.method == "OPTIONS":
+        return None
+    # Same check @jwt_required() makes; anonymous requests are left to it
+    verify_jwt_in_request(optional=True)
+    user_id = get_jwt_identity()
+    if user_id is None:
+        return None
+    try:
+        g.admission = limiter.acquire(user_id, route_class(request.endpoint, request.method))
+    except Rejected as e:
+        response = jsonify({"error": "Too many requests", "limit": e.cls, "reason": e.reason})
+        response.status_code = 429
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response
+    return None
+
+
+@app.teardown_request
+def release_admission(exc):
+    admission = g.pop("admission", None)
+    if admission is not None:
+        limiter.release(admission)
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+# ML models are loaded by the inference workers (see ml/inference.py)
 
 # === AUTH ROUTES ===
 @app.route("/api/register", methods=["POST"])
@@ -54,7 +136,7 @@ def register():
     if not username or not password:
         return jsonify({"message": "username and password required"}), 400
 
-    conn = get_db_connection()
+    conn = get_directory_connection()
     cur = conn.cursor()
     # check duplicates by username or email (if email provided)
     q = "SELECT id FROM users WHERE username = ?"
@@ -69,13 +151,14 @@ def register():
         return jsonify({"message": "User already exists"}), 409
 
     password_hash = generate_password_hash(password)
-    cur.execute(
+    user_id = insert(
+        conn,
         "INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)",
         (username, email, password_hash),
     )
     conn.commit()
-    user_id = cur.lastrowid
     conn.close()
+    provision_user(user_id, username, email, password_hash)
 
     return jsonify({"message": "User created", "user_id": user_id}), 201
 
@@ -91,7 +174,7 @@ def login():
     if not password or (not username and not email):
         return jsonify({"message": "username/email and password required"}), 400
 
-    conn = get_db_connection()
+    conn = get_directory_connection()
     cur = conn.cursor()
 
     if username:
@@ -122,11 +205,49 @@ def login():
 # Note: all routes below are decorated with @jwt_required() and scope DB ops by user_id
 
 # === DASHBOARD ===
+DASHBOARD_SECTIONS = ("totals", "month", "recent_transactions", "budget_alerts", "accounts")
+# Columns of recent_transactions: SQL expression and the join it needs
+RECENT_TRANSACTION_COLUMNS = {
+    "id": ("t.id", None),
+    "name": ("t.description", None),
+    "amount": (major_sql("t.amount"), None),
+    "date": ("t.date", None),
+    "transaction_type": ("t.transaction_type", None),
+    "category_id": ("t.category_id", None),
+    "category": ("c.name", "LEFT JOIN categories c ON t.category_id = c.id"),
+    "account_id": ("t.account_id", None),
+    "account_name": ("a.name", "LEFT JOIN accounts a ON t.account_id = a.id"),
+    "is_anomaly": ("t.is_anomaly", None),
+}
+RECENT_TRANSACTION_FIELDS = ("id", "name", "amount", "date", "category", "account_name", "is_anomaly")
+# Budget alerts: every budget of the month, or only those at yellow/red
+BUDGET_ALERT_FILTERS = ("all", "active")
+DASHBOARD_PROFILES = {
+    # The phone layout: no accounts list, short rows, only budgets that need attention
+    "mobile": {
+        "include": ("totals", "month", "recent_transactions", "budget_alerts"),
+        "fields": ("id", "name", "amount", "transaction_type", "is_anomaly"),
+        "alerts": "active",
+    },
+}
+
+
 @app.route("/api/dashboard", methods=["GET"])
 @jwt_required()
 def dashboard():
     user_id = get_jwt_identity()
-    conn = get_db_connection()
+    # ?include= sections, ?fields= columns of recent_transactions, ?alerts=active
+    try:
+        defaults = select_profile(DASHBOARD_PROFILES)
+        include = select_fields("include", DASHBOARD_SECTIONS, DASHBOARD_SECTIONS, defaults)
+        fields = select_fields("fields", RECENT_TRANSACTION_COLUMNS, RECENT_TRANSACTION_FIELDS, defaults)
+    except SelectionError as e:
+        return jsonify({"error": str(e)}), 400
+    alerts = request.args.get("alerts", defaults.get("alerts", "all"))
+    if alerts not in BUDGET_ALERT_FILTERS:
+        return jsonify({"error": f"alerts must be one of: {', '.join(BUDGET_ALERT_FILTERS)}"}), 400
+
+    conn = get_analytics_connection(user_id)
 
     # Get selected month/year from query params or default to current
     month_param = request.args.get("month")
@@ -136,128 +257,127 @@ def dashboard():
         now = datetime.now()
         month = now.strftime("%m")
         year = now.strftime("%Y")
+    start, end = month_range(year, month)
+    payload = {"month": month, "year": year}
+    if "month" in include or "recent_transactions" in include:
+        source = transactions_source(conn, user_id, start, end)
 
     # === Total balance (all accounts for user) ===
-    total_balance_row = conn.execute(
-        "SELECT SUM(initial_balance) AS total FROM accounts WHERE user_id = ?",
-        (user_id,),
-    ).fetchone()
-    total_balance = total_balance_row["total"] or 0
+    if "totals" in include:
+        total_balance_row = conn.execute(
+            "SELECT SUM(initial_balance) AS total FROM accounts WHERE user_id = ?",
+            (user_id,),
+        ).fetchone()
+        payload["total_balance"] = to_major(total_balance_row["total"] or 0)
 
     # === Monthly income and expense ===
-    monthly_income_row = conn.execute(
-        """
-        SELECT SUM(amount) AS total FROM transactions
-        WHERE user_id = ? AND transaction_type='INCOME'
-          AND strftime('%m', date) = ? AND strftime('%Y', date) = ?
-        """,
-        (user_id, month, year),
-    ).fetchone()
-
-    monthly_expense_row = conn.execute(
-        """
-        SELECT SUM(amount) AS total FROM transactions
-        WHERE user_id = ? AND transaction_type='EXPENSE'
-          AND strftime('%m', date) = ? AND strftime('%Y', date) = ?
-        """,
-        (user_id, month, year),
-    ).fetchone()
-
-    monthly_income = monthly_income_row["total"] or 0
-    monthly_expense = abs(monthly_expense_row["total"] or 0)
-
-    savings_rate = (
-        round((monthly_income - monthly_expense) / monthly_income * 100, 1)
-        if monthly_income
-        else 0
-    )
+    if "month" in include:
+        monthly_income_row = conn.execute(
+            f"""
+            SELECT SUM(amount) AS total FROM {source}
+            WHERE user_id = ? AND transaction_type='INCOME' AND date >= ? AND date < ?
+            """,
+            (user_id, start, end),
+        ).fetchone()
+
+        monthly_expense_row = conn.execute(
+            f"""
+            SELECT SUM(amount) AS total FROM {source}
+            WHERE user_id = ? AND transaction_type='EXPENSE' AND date >= ? AND date < ?
+            """,
+            (user_id, start, end),
+        ).fetchone()
+
+        monthly_income = monthly_income_row["total"] or 0
+        monthly_expense = abs(monthly_expense_row["total"] or 0)
+
+        # Integer minor units: the ratio is exact, only the final rounding remains
+        payload["savings_rate"] = (
+            round((monthly_income - monthly_expense) / monthly_income * 100, 1)
+            if monthly_income
+            else 0
+        )
+        payload["monthly_income"] = to_major(monthly_income)
+        payload["monthly_expense"] = to_major(monthly_expense)
 
     # === Recent transactions (limit 5) ===
-    recent_transactions = conn.execute(
-        """
-        SELECT t.id, t.description AS name, t.amount, t.date, c.name AS category,
-               a.name AS account_name, t.is_anomaly
-        FROM transactions t
-        LEFT JOIN categories c ON t.category_id = c.id
-        LEFT JOIN accounts a ON t.account_id = a.id
-        WHERE t.user_id = ?
-          AND strftime('%m', t.date) = ?
-          AND strftime('%Y', t.date) = ?
-        ORDER BY t.date DESC
-        LIMIT 5
-        """,
-        (user_id, month, year),
-    ).fetchall()
-    recent_transactions_list = [dict(tx) for tx in recent_transactions]
+    if "recent_transactions" in include:
+        columns, joins = select_sql(fields, RECENT_TRANSACTION_COLUMNS)
+        recent_transactions = conn.execute(
+            f"""
+            SELECT {columns}
+            FROM {source} t
+            {joins}
+            WHERE t.user_id = ? AND t.date >= ? AND t.date < ?
+            ORDER BY t.date DESC
+            LIMIT 5
+            """,
+            (user_id, start, end),
+        ).fetchall()
+        payload["recent_transactions"] = [dict(tx) for tx in recent_transactions]
 
     # === Budget alerts ===
-    budget_alerts_rows = conn.execute(
-        """
-        SELECT b.id, c.name AS name, b.limit_amount,
-               COALESCE(SUM(t.amount), 0) AS spent
-        FROM budgets b
-        JOIN categories c ON b.category_id = c.id
-        LEFT JOIN transactions t ON t.category_id = c.id
-            AND t.user_id = b.user_id
-            AND t.transaction_type = 'EXPENSE'
-            AND strftime('%m', t.date) = ?
-            AND strftime('%Y', t.date) = ?
-        WHERE b.user_id = ? AND b.month = ?
-        GROUP BY b.id
-        """,
-        (month, year, user_id, int(month) if month.isdigit() else int(month)),
-    ).fetchall()
-
-    budget_alerts_list = []
-    for row in budget_alerts_rows:
-        spent = row["spent"] or 0
-        limit_amt = row["limit_amount"]
-        if limit_amt is None:
-            status = "none"
-        elif spent < limit_amt * 0.75:
-            status = "green"
-        elif spent < limit_amt:
-            status = "yellow"
-        else:
-            status = "red"
-        budget_alerts_list.append(
-            {"name": row["name"], "spent": spent, "limit": limit_amt, "status": status}
-        )
+    # spent/status are evaluated at write time (budgets.evaluate_budgets)
+    if "budget_alerts" in include:
+        budget_alerts = month_budgets(conn, user_id, year, month)
+        if alerts == "active":
+            budget_alerts = [budget for budget in budget_alerts if budget["status"] in ("yellow", "red")]
+        payload["budget_alerts"] = budget_alerts
 
     # === Accounts overview ===
-    accounts_rows = conn.execute(
-        """
-        SELECT id, name, type, initial_balance AS current_balance
-        FROM accounts
-        WHERE user_id = ?
-        """,
-        (user_id,),
-    ).fetchall()
-    accounts_list = [dict(acc) for acc in accounts_rows]
+    # Same balance as /api/accounts and the pushed "balance" events
+    if "accounts" in include:
+        accounts_rows = conn.execute(
+            f"""
+            SELECT a.id, a.name, a.type, {major_sql(ACCOUNT_BALANCE_SQL)} AS current_balance
+            FROM accounts a
+            WHERE a.user_id = ?
+            """,
+            (user_id, user_id),
+        ).fetchall()
+        payload["accounts"] = [dict(acc) for acc in accounts_rows]
 
     conn.close()
 
     # === Final JSON response ===
-    return jsonify(
-        {
-            "month": month,
-            "year": year,
-            "total_balance": total_balance,
-            "monthly_income": monthly_income,
-            "monthly_expense": monthly_expense,
-            "savings_rate": savings_rate,
-            "recent_transactions": recent_transactions_list,
-            "budget_alerts": budget_alerts_list,
-            "accounts": accounts_list,  # ✅ added for frontend
-        }
-    )
+    return json_response(payload)
 
 # TRANSACTIONS: GET (list) - POST (create)
+# Columns of the list: SQL expression and the join it needs
+TRANSACTION_LIST_COLUMNS = {
+    "id": ("t.id", None),
+    "date": ("t.date", None),
+    "description": ("t.description", None),
+    "amount": (major_sql("t.amount"), None),
+    "transaction_type": ("t.transaction_type", None),
+    "account_id": ("t.account_id", None),
+    "account_name": ("a.name", "JOIN accounts a ON t.account_id = a.id"),
+    "category_id": ("t.category_id", None),
+    "category": ("c.name", "JOIN categories c ON t.category_id = c.id"),
+    "is_anomaly": ("t.is_anomaly", None),
+}
+TRANSACTION_LIST_FIELDS = ("id", "date", "description", "amount", "transaction_type", "account_name", "category", "is_anomaly")
+TRANSACTION_LIST_PROFILES = {
+    # Names come from the synced accounts/categories, rows as arrays
+    "mobile": {
+        "fields": ("id", "date", "description", "amount", "transaction_type", "category_id", "is_anomaly"),
+        "layout": "columns",
+    },
+}
+
+
 @app.route("/api/transactions", methods=["GET", "POST"])
 @jwt_required()
 def transactions_list_create():
     user_id = get_jwt_identity()
-    conn = get_db_connection()
+    if request.method == "GET":
+        try:
+            defaults = select_profile(TRANSACTION_LIST_PROFILES)
+            fields = select_fields("fields", TRANSACTION_LIST_COLUMNS, TRANSACTION_LIST_FIELDS, defaults)
+        except SelectionError as e:
+            return jsonify({"error": str(e)}), 400
+
+    conn = get_db_connection(user_id)
     cursor = conn.cursor()
 
     if request.method == "GET":
@@ -266,13 +386,19 @@ def transactions_list_create():
         description = request.args.get("description")
         year = request.args.get("year")
         month = request.args.get("month")
+        if year and month:
+            date_range = month_range(year, month)
+        elif year:
+            date_range = year_range(year)
+        else:
+            date_range = (None, None)
 
-        query = """
-            SELECT t.id, t.date, t.description, t.amount, t.transaction_type,
-                   a.name AS account_name, c.name AS category, t.is_anomaly
-            FROM transactions t
-            JOIN accounts a ON t.account_id = a.id
-            JOIN categories c ON t.category_id = c.id
+        # Only the joins the requested fields need (?fields=, see TRANSACTION_LIST_COLUMNS)
+        columns, joins = select_sql(fields, TRANSACTION_LIST_COLUMNS)
+        query = f"""
+            SELECT {columns}
+            FROM {transactions_source(conn, user_id, *date_range)} t
+            {joins}
             WHERE t.user_id = ?
         """
         params = [user_id]
@@ -286,21 +412,18 @@ def transactions_list_create():
         if description:
             query += " AND t.description LIKE ?"
             params.append(f"%{description}%")
-        if year and month:
-            query += " AND strftime('%Y', t.date) = ? AND strftime('%m', t.date) = ?"
-            params.extend([year, month.zfill(2)])
-        elif year:
-            query += " AND strftime('%Y', t.date) = ?"
-            params.append(year)
+        if year:
+            query += " AND t.date >= ? AND t.date < ?"
+            params.extend(date_range)
         elif month:
-            query += " AND strftime('%m', t.date) = ?"
+            # Every year's copy of the month; still narrowed by user through the index
+            query += f" AND {dialect.month('t.date')} = ?"
             params.append(month.zfill(2))
 
         query += " ORDER BY t.date DESC"
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+        columns, rows = fetch_table(conn, query, params)
         conn.close()
-        return jsonify([dict(row) for row in rows])
+        return table_response(columns, rows, layout=defaults.get("layout"))
 
     # POST -> create transaction
     data = request.get_json() or {}
@@ -325,15 +448,19 @@ def transactions_list_create():
     if transaction_date > date.today():
         conn.close()
         return jsonify({"error": "Future transactions not allowed"}), 400
+    date_str = transaction_date.isoformat()
 
     try:
-        amount = float(amount)
+        amount = Money.parse(amount).minor
         if amount <= 0:
             raise ValueError()
-    except (ValueError, TypeError):
+    except ValueError:
         conn.close()
         return jsonify({"error": "Amount must be positive number"}), 400
 
+    allow_duplicate = bool(data.get("allow_duplicate"))
+    checker = DuplicateChecker(conn, user_id, [date_str])
+
     try:
         # Determine transaction_type from category if not provided
         if not transaction_type:
@@ -351,19 +478,34 @@ def transactions_list_create():
             if not acct1 or not acct2:
                 return jsonify({"error": "Accounts must belong to current user"}), 400
 
-            cursor.execute(
-                "INSERT INTO transactions (user_id, date, description, amount, account_id, category_id, transaction_type) VALUES (?, ?, ?, ?, ?, ?, 'EXPENSE')",
-                (user_id, date_str, f"Transfer to {target_account_id}", amount, account_id, category_id),
+            expense_description = f"Transfer to {target_account_id}"
+            income_description = f"Transfer from {account_id}"
+            expense_fp, expense_duplicate = checker.check(account_id, date_str, amount, expense_description)
+            income_fp, income_duplicate = checker.check(target_account_id, date_str, amount, income_description)
+            for duplicate in (expense_duplicate, income_duplicate):
+                if refused(duplicate, allow_duplicate):
+                    conn.close()
+                    return duplicate_response(duplicate)
+            duplicate = expense_duplicate or income_duplicate
+
+            expense_id = insert(
+                conn,
+                "INSERT INTO transactions (user_id, date, description, amount, account_id, category_id, transaction_type, fingerprint) VALUES (?, ?, ?, ?, ?, ?, 'EXPENSE', ?)",
+                (user_id, date_str, expense_description, amount, account_id, category_id, expense_fp),
             )
-            expense_id = cursor.lastrowid
-            cursor.execute(
-                "INSERT INTO transactions (user_id, date, description, amount, account_id, category_id, transaction_type) VALUES (?, ?, ?, ?, ?, ?, 'INCOME')",
-                (user_id, date_str, f"Transfer from {account_id}", amount, target_account_id, category_id),
+            income_id = insert(
+                conn,
+                "INSERT INTO transactions (user_id, date, description, amount, account_id, category_id, transaction_type, fingerprint) VALUES (?, ?, ?, ?, ?, ?, 'INCOME', ?)",
+                (user_id, date_str, income_description, amount, target_account_id, category_id, income_fp),
             )
-            income_id = cursor.lastrowid
+            record_change(conn, user_id, "transactions", (expense_id, income_id))
+            record_change(conn, user_id, "accounts", (account_id, target_account_id))
             conn.commit()
+            after_write(conn, user_id, transaction_ids=(expense_id, income_id), account_ids=(account_id, target_account_id))
             conn.close()
-            return jsonify({"message": "Transfer recorded", "expense_id": expense_id, "income_id": income_id}), 201
+            return with_possible_duplicate(
+                {"message": "Transfer recorded", "expense_id": expense_id, "income_id": income_id}, duplicate
+            )
 
         # Non-transfer
         # Ensure account and category belong to user
@@ -373,18 +515,144 @@ def transactions_list_create():
             conn.close()
             return jsonify({"error": "Account or category not found for current user"}), 400
 
-        cursor.execute(
-            "INSERT INTO transactions (user_id, date, description, amount, account_id, category_id, transaction_type, is_anomaly) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (user_id, date_str, description, amount, account_id, category_id, transaction_type, data.get("is_anomaly", 0)),
+        fp, duplicate = checker.check(account_id, date_str, amount, description)
+        if refused(duplicate, allow_duplicate):
+            conn.close()
+            return duplicate_response(duplicate)
+
+        new_id = insert(
+            conn,
+            "INSERT INTO transactions (user_id, date, description, amount, account_id, category_id, transaction_type, is_anomaly, fingerprint) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (user_id, date_str, description, amount, account_id, category_id, transaction_type, data.get("is_anomaly", 0), fp),
         )
-        new_id = cursor.lastrowid
+        record_change(conn, user_id, "transactions", new_id)
+        record_change(conn, user_id, "accounts", account_id)
         conn.commit()
+        after_write(conn, user_id, transaction_ids=(new_id,), account_ids=(account_id,))
         conn.close()
-        return jsonify({"message": "Transaction added", "id": new_id}), 201
+        return with_possible_duplicate({"message": "Transaction added", "id": new_id}, duplicate)
 
-    except sqlite3.Error as e:
+    except IntegrityError as e:
+        conn.close()
+        if "fingerprint" in str(e):
+            # Lost a race with an identical request; the unique index kept one copy
+            return jsonify({"error": "Duplicate transaction"}), 409
+        return jsonify({"error": str(e)}), 500
+    except Error as e:
+        conn.close()
+        return jsonify({"error": str(e)}), 500
+
+
+def duplicate_response(duplicate):
+    return jsonify({"error": "Possible duplicate transaction", "duplicate_of": duplicate}), 409
+
+
+def with_possible_duplicate(body, duplicate):
+    """201 for a saved row; names the nearby same-amount row it may repeat, if any."""
+    if duplicate is not None:
+        body["possible_duplicate"] = duplicate
+    return jsonify(body), 201
+
+
+# IMPORT: many income/expense rows (e.g. a bank statement) in one transaction.
+# Rows that exactly copy an existing transaction, or an earlier row of the
+# same import, are skipped and reported unless allow_duplicates is set.
+@app.route("/api/transactions/import", methods=["POST"])
+@jwt_required()
+def transactions_import():
+    user_id = get_jwt_identity()
+    data = request.get_json() or {}
+    rows = data.get("transactions")
+    allow_duplicates = bool(data.get("allow_duplicates"))
+    if not isinstance(rows, list) or not rows:
+        return jsonify({"error": "transactions must be a non-empty list"}), 400
+    if len(rows) > IMPORT_MAX_ROWS:
+        return jsonify({"error": f"At most {IMPORT_MAX_ROWS} transactions per import"}), 400
+
+    conn = get_db_connection(user_id)
+    accounts = {row["id"] for row in conn.execute("SELECT id FROM accounts WHERE user_id = ?", (user_id,))}
+    categories = {
+        row["id"]: row["type"] for row in conn.execute("SELECT id, type FROM categories WHERE user_id = ?", (user_id,))
+    }
+
+    results = []
+    valid = []
+    for index, row in enumerate(rows):
+        row = row if isinstance(row, dict) else {}
+        try:
+            transaction_date = datetime.strptime(str(row.get("date")), "%Y-%m-%d").date()
+            amount = Money.parse(row.get("amount")).minor
+            account_id = int(row.get("account_id"))
+            category_id = int(row.get("category_id"))
+        except (TypeError, ValueError):
+            results.append({"index": index, "status": "invalid", "error": "date, amount, account_id and category_id are required"})
+            continue
+        transaction_type = row.get("transaction_type") or categories.get(category_id)
+        if not row.get("description"):
+            error = "Missing description"
+        elif amount <= 0:
+            error = "Amount must be positive number"
+        elif transaction_date > date.today():
+            error = "Future transactions not allowed"
+        elif account_id not in accounts or category_id not in categories:
+            error = "Account or category not found for current user"
+        elif transaction_type not in ("INCOME", "EXPENSE"):
+            error = "Only INCOME and EXPENSE rows can be imported"
+        else:
+            error = None
+        if error:
+            results.append({"index": index, "status": "invalid", "error": error})
+            continue
+        valid.append((index, transaction_date.isoformat(), row["description"], amount, account_id, category_id, transaction_type))
+
+    try:
+        checker = DuplicateChecker(conn, user_id, [row[1] for row in valid])
+        lock_user(conn, user_id)
+        created = []
+        for index, date_str, description, amount, account_id, category_id, transaction_type in valid:
+            fp, duplicate = checker.check(account_id, date_str, amount, description)
+            if refused(duplicate, allow_duplicates):
+                results.append({"index": index, "status": "duplicate", "duplicate_of": duplicate})
+                continue
+            new_id = insert(
+                conn,
+                "INSERT INTO transactions (user_id, date, description, amount, account_id, category_id, transaction_type, fingerprint) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (user_id, date_str, description, amount, account_id, category_id, transaction_type, fp),
+            )
+            created.append((new_id, account_id))
+            result = {"index": index, "status": "created", "id": new_id}
+            if duplicate is not None:
+                result["possible_duplicate"] = duplicate
+            results.append(result)
+        touched_accounts = sorted({account_id for _, account_id in created})
+        record_change(conn, user_id, "transactions", [tx_id for tx_id, _ in created])
+        record_change(conn, user_id, "accounts", touched_accounts)
+        conn.commit()
+        if created:
+            after_write(conn, user_id, transaction_ids=[tx_id for tx_id, _ in created], account_ids=touched_accounts)
+    except Error as e:
+        conn.rollback()
         conn.close()
         return jsonify({"error": str(e)}), 500
+    conn.close()
+
+    results.sort(key=lambda result: result["index"])
+    counts = {status: sum(r["status"] == status for r in results) for status in ("created", "duplicate", "invalid")}
+    return jsonify({**counts, "results": results}), 200
+
+
+# Likely duplicates already stored: same account and amount within the window
+@app.route("/api/transactions/duplicates", methods=["GET"])
+@jwt_required()
+def transactions_duplicates():
+    user_id = get_jwt_identity()
+    year = request.args.get("year")
+    window = max(0, request.args.get("window", DUPLICATE_WINDOW_DAYS, type=int))
+    start, end = year_range(year) if year else (None, None)
+    conn = get_db_connection(user_id)
+    groups = duplicate_groups(conn, user_id, start, end, window)
+    conn.close()
+    return json_response({"groups": groups})
 
 
 # GET single transaction, UPDATE, DELETE
@@ -392,18 +660,20 @@ def transactions_list_create():
 @jwt_required()
 def transaction_detail(tx_id):
     user_id = get_jwt_identity()
-    conn = get_db_connection()
+    conn = get_db_connection(user_id)
     cur = conn.cursor()
 
     # Fetch and ensure ownership
-    tx = cur.execute("SELECT * FROM transactions WHERE id = ? AND user_id = ?", (tx_id, user_id)).fetchone()
+    tx, table = find_transaction(conn, user_id, tx_id)
     if not tx:
         conn.close()
         return jsonify({"error": "Transaction not found"}), 404
 
     if request.method == "GET":
         conn.close()
-        return jsonify(dict(tx)), 200
+        tx = dict(tx)
+        tx["amount"] = to_major(tx["amount"])
+        return json_response(tx)
 
     if request.method == "PUT":
         data = request.get_json() or {}
@@ -417,23 +687,63 @@ def transaction_detail(tx_id):
             conn.close()
             return jsonify({"error": "Missing required fields"}), 400
 
+        try:
+            amount = Money.parse(amount).minor
+        except ValueError:
+            conn.close()
+            return jsonify({"error": "Amount must be a number"}), 400
+
+        try:
+            date_str = datetime.strptime(date_str, "%Y-%m-%d").date().isoformat()
+        except ValueError:
+            conn.close()
+            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD."}), 400
+
         # ensure category belongs to user
         cat = cur.execute("SELECT id FROM categories WHERE id = ? AND user_id = ?", (category_id, user_id)).fetchone()
         if not cat:
             conn.close()
             return jsonify({"error": "Category not found for user"}), 400
 
-        cur.execute(
-            "UPDATE transactions SET amount = ?, category_id = ?, description = ?, date = ?, transaction_type = ? WHERE id = ? AND user_id = ?",
-            (amount, category_id, description, date_str, transaction_type, tx_id, user_id),
+        # An edit is deliberate: never refused, but an exact copy keeps a NULL fingerprint
+        fp, _ = DuplicateChecker(conn, user_id, [date_str]).check(
+            tx["account_id"], date_str, amount, description, exclude_id=tx_id
         )
+        try:
+            if table != "transactions":
+                restore_transaction(conn, user_id, tx_id, table)
+            cur.execute(
+                "UPDATE transactions SET amount = ?, category_id = ?, description = ?, date = ?, transaction_type = ?, fingerprint = ? WHERE id = ? AND user_id = ?",
+                (amount, category_id, description, date_str, transaction_type, fp, tx_id, user_id),
+            )
+        except IntegrityError as e:
+            conn.rollback()
+            if "fingerprint" not in str(e):
+                conn.close()
+                return jsonify({"error": str(e)}), 500
+            # An identical row was saved since the check; name it like POST does
+            _, duplicate = DuplicateChecker(conn, user_id, [date_str]).check(
+                tx["account_id"], date_str, amount, description, exclude_id=tx_id
+            )
+            conn.close()
+            return duplicate_response(duplicate)
+        record_change(conn, user_id, "transactions", tx_id)
+        record_change(conn, user_id, "accounts", tx["account_id"])
         conn.commit()
+        after_write(
+            conn, user_id, transaction_ids=(tx_id,), account_ids=(tx["account_id"],), budget_keys=budget_keys_of(tx)
+        )
         conn.close()
         return jsonify({"message": "Transaction updated"}), 200
 
     # DELETE
+    if table != "transactions":
+        restore_transaction(conn, user_id, tx_id, table)
     cur.execute("DELETE FROM transactions WHERE id = ? AND user_id = ?", (tx_id, user_id))
+    record_change(conn, user_id, "transactions", tx_id, op="delete")
+    record_change(conn, user_id, "accounts", tx["account_id"])
     conn.commit()
+    after_write(conn, user_id, deleted_ids=(tx_id,), account_ids=(tx["account_id"],), budget_keys=budget_keys_of(tx))
     conn.close()
     return jsonify({"message": "Transaction deleted"}), 200
 
@@ -443,13 +753,13 @@ def transaction_detail(tx_id):
 @jwt_required()
 def categories_list_create():
     user_id = get_jwt_identity()
-    conn = get_db_connection()
+    conn = get_db_connection(user_id)
     cur = conn.cursor()
 
     if request.method == "GET":
-        rows = cur.execute("SELECT id, name, type FROM categories WHERE user_id = ? ORDER BY name", (user_id,)).fetchall()
+        columns, rows = fetch_table(conn, "SELECT id, name, type FROM categories WHERE user_id = ? ORDER BY name", (user_id,))
         conn.close()
-        return jsonify([dict(r) for r in rows])
+        return table_response(columns, rows)
 
     data = request.get_json() or {}
     name = data.get("name")
@@ -459,12 +769,12 @@ def categories_list_create():
         return jsonify({"error": "Invalid category"}), 400
 
     try:
-        cur.execute("INSERT INTO categories (user_id, name, type, created_at) VALUES (?, ?, ?, datetime('now'))", (user_id, name, type_))
+        category_id = insert(conn, "INSERT INTO categories (user_id, name, type) VALUES (?, ?, ?)", (user_id, name, type_))
+        record_change(conn, user_id, "categories", category_id)
         conn.commit()
-        category_id = cur.lastrowid
         conn.close()
         return jsonify({"id": category_id, "name": name, "type": type_}), 201
-    except sqlite3.IntegrityError:
+    except IntegrityError:
         conn.close()
         return jsonify({"error": "Category already exists"}), 400
 
@@ -473,7 +783,7 @@ def categories_list_create():
 @jwt_required()
 def category_update_delete(cat_id):
     user_id = get_jwt_identity()
-    conn = get_db_connection()
+    conn = get_db_connection(user_id)
     cur = conn.cursor()
 
     # Ensure category belongs to user
@@ -491,54 +801,69 @@ def category_update_delete(cat_id):
             return jsonify({"error": "Invalid category"}), 400
         try:
             cur.execute("UPDATE categories SET name = ?, type = ? WHERE id = ? AND user_id = ?", (name, type_, cat_id, user_id))
+            record_change(conn, user_id, "categories", cat_id)
             conn.commit()
-        except sqlite3.IntegrityError:
+        except IntegrityError:
             conn.close()
             return jsonify({"error": "Category with same name exists"}), 400
         conn.close()
         return jsonify({"message": "Category updated"}), 200
 
     # DELETE only if no transactions for this user use this category
-    tx_count = cur.execute("SELECT COUNT(*) AS cnt FROM transactions WHERE category_id = ? AND user_id = ?", (cat_id, user_id)).fetchone()["cnt"]
-    if tx_count > 0:
+    if transactions_exist(conn, user_id, "t.category_id = ?", (cat_id,)):
         conn.close()
         return jsonify({"error": "Cannot delete category linked to transactions"}), 400
 
+    # Budgets go with the category (ON DELETE CASCADE); tombstone them too
+    budget_ids = [r["id"] for r in cur.execute("SELECT id FROM budgets WHERE category_id = ? AND user_id = ?", (cat_id, user_id))]
     cur.execute("DELETE FROM categories WHERE id = ? AND user_id = ?", (cat_id, user_id))
+    record_change(conn, user_id, "categories", cat_id, op="delete")
+    record_change(conn, user_id, "budgets", budget_ids, op="delete")
     conn.commit()
     conn.close()
     return jsonify({"message": "Category deleted"}), 200
 
 
 # ACCOUNTS
+# Current balance of account alias "a" in minor units; binds one user_id parameter.
+# Archived (cold) transactions are pre-summed per account in archived_balances.
+ACCOUNT_BALANCE_SQL = """
+    a.initial_balance
+    + COALESCE((SELECT ab.net FROM archived_balances ab WHERE ab.account_id = a.id), 0)
+    + COALESCE((
+        SELECT SUM(CASE WHEN t.transaction_type = 'INCOME' THEN t.amount
+                        WHEN t.transaction_type = 'EXPENSE' THEN -t.amount ELSE 0 END)
+        FROM transactions t WHERE t.account_id = a.id AND t.user_id = ?
+    ), 0)
+"""
+
+
 @app.route("/api/accounts", methods=["GET", "POST"])
 @jwt_required()
 def accounts_list_create():
     user_id = get_jwt_identity()
-    conn = get_db_connection()
+    conn = get_db_connection(user_id)
     cur = conn.cursor()
 
     if request.method == "GET":
-        rows = cur.execute(
-            """
-            SELECT a.id, a.name, a.type, a.initial_balance,
-                COALESCE((
-                    SELECT SUM(CASE WHEN t.transaction_type = 'INCOME' THEN t.amount
-                                    WHEN t.transaction_type = 'EXPENSE' THEN -t.amount ELSE 0 END)
-                    FROM transactions t WHERE t.account_id = a.id AND t.user_id = ?
-                ), 0) + a.initial_balance AS current_balance
+        columns, rows = fetch_table(
+            conn,
+            f"""
+            SELECT a.id, a.name, a.type, {major_sql('a.initial_balance')} AS initial_balance,
+                {major_sql(ACCOUNT_BALANCE_SQL)} AS current_balance, a.currency
             FROM accounts a
             WHERE a.user_id = ?
             """,
             (user_id, user_id),
-        ).fetchall()
+        )
         conn.close()
-        return jsonify([dict(r) for r in rows])
+        return table_response(columns, rows)
 
     data = request.get_json() or {}
     name = data.get("name")
     acc_type = data.get("type")
-    initial_balance = data.get("initial_balance", 0.0)
+    initial_balance = data.get("initial_balance", 0)
+    currency = data.get("currency", MONEY_CURRENCY)
 
     if not name or not acc_type:
         conn.close()
@@ -549,19 +874,23 @@ def accounts_list_create():
         conn.close()
         return jsonify({"error": f"Invalid type. Use one of {ALLOWED}"}), 400
 
+    if not supported_currency(currency):
+        conn.close()
+        return jsonify({"error": f"Unsupported currency {currency}: accounts must use {MONEY_CURRENCY}"}), 400
+
     try:
-        initial_balance = float(initial_balance)
-    except (ValueError, TypeError):
+        initial_balance = Money.parse(initial_balance, currency).minor
+    except ValueError:
         conn.close()
         return jsonify({"error": "Initial balance must be a number"}), 400
 
     try:
-        cur.execute("INSERT INTO accounts (user_id, name, type, initial_balance, created_at) VALUES (?, ?, ?, ?, datetime('now'))", (user_id, name, acc_type, initial_balance))
+        new_id = insert(conn, "INSERT INTO accounts (user_id, name, type, initial_balance, currency) VALUES (?, ?, ?, ?, ?)", (user_id, name, acc_type, initial_balance, currency))
+        record_change(conn, user_id, "accounts", new_id)
         conn.commit()
-        new_id = cur.lastrowid
         conn.close()
         return jsonify({"message": "Account added", "id": new_id}), 201
-    except sqlite3.IntegrityError as e:
+    except IntegrityError as e:
         conn.close()
         return jsonify({"error": str(e)}), 400
 
@@ -570,7 +899,7 @@ def accounts_list_create():
 @jwt_required()
 def account_detail(acc_id):
     user_id = get_jwt_identity()
-    conn = get_db_connection()
+    conn = get_db_connection(user_id)
     cur = conn.cursor()
 
     acc = cur.execute("SELECT * FROM accounts WHERE id = ? AND user_id = ?", (acc_id, user_id)).fetchone()
@@ -580,19 +909,15 @@ def account_detail(acc_id):
 
     if request.method == "GET":
         row = cur.execute(
-            """
-            SELECT a.id, a.name, a.type, a.initial_balance,
-            a.initial_balance + COALESCE((
-                SELECT SUM(CASE WHEN t.transaction_type = 'INCOME' THEN t.amount
-                                WHEN t.transaction_type = 'EXPENSE' THEN -t.amount ELSE 0 END)
-                FROM transactions t WHERE t.account_id = a.id AND t.user_id = ?
-            ), 0) AS current_balance
+            f"""
+            SELECT a.id, a.name, a.type, {major_sql('a.initial_balance')} AS initial_balance,
+                {major_sql(ACCOUNT_BALANCE_SQL)} AS current_balance, a.currency
             FROM accounts a WHERE a.id = ? AND a.user_id = ?
             """,
             (user_id, acc_id, user_id),
         ).fetchone()
         conn.close()
-        return jsonify(dict(row)), 200
+        return json_response(dict(row))
 
     if request.method == "PUT":
         data = request.get_json() or {}
@@ -602,19 +927,20 @@ def account_detail(acc_id):
             return jsonify({"error": "Name required"}), 400
         try:
             cur.execute("UPDATE accounts SET name = ? WHERE id = ? AND user_id = ?", (new_name, acc_id, user_id))
+            record_change(conn, user_id, "accounts", acc_id)
             conn.commit()
-        except sqlite3.IntegrityError:
+        except IntegrityError:
             conn.close()
             return jsonify({"error": "Account name conflict"}), 400
         conn.close()
         return jsonify({"message": "Account updated"}), 200
 
     # DELETE -> only if no transactions for this user
-    tx_count = cur.execute("SELECT COUNT(*) AS cnt FROM transactions WHERE account_id = ? AND user_id = ?", (acc_id, user_id)).fetchone()["cnt"]
-    if tx_count > 0:
+    if transactions_exist(conn, user_id, "t.account_id = ?", (acc_id,)):
         conn.close()
         return jsonify({"error": "Cannot delete account linked to transactions"}), 400
     cur.execute("DELETE FROM accounts WHERE id = ? AND user_id = ?", (acc_id, user_id))
+    record_change(conn, user_id, "accounts", acc_id, op="delete")
     conn.commit()
     conn.close()
     return jsonify({"message": "Account deleted"}), 200
@@ -625,7 +951,7 @@ def account_detail(acc_id):
 @jwt_required()
 def set_default_account(account_id):
     user_id = get_jwt_identity()
-    conn = get_db_connection()
+    conn = get_db_connection(user_id)
     cur = conn.cursor()
 
     # ensure account belongs to user
@@ -639,7 +965,7 @@ def set_default_account(account_id):
         cur.execute("UPDATE accounts SET is_default = 0 WHERE user_id = ?", (user_id,))
         cur.execute("UPDATE accounts SET is_default = 1 WHERE id = ? AND user_id = ?", (account_id, user_id))
         conn.commit()
-    except sqlite3.Error as e:
+    except Error as e:
         conn.close()
         return jsonify({"error": str(e)}), 500
 
@@ -651,12 +977,14 @@ def set_default_account(account_id):
 @jwt_required()
 def get_default_account():
     user_id = get_jwt_identity()
-    conn = get_db_connection()
+    conn = get_db_connection(user_id)
     cur = conn.cursor()
     row = cur.execute("SELECT * FROM accounts WHERE user_id = ? AND is_default = 1 LIMIT 1", (user_id,)).fetchone()
     conn.close()
     if row:
-        return jsonify(dict(row)), 200
+        row = dict(row)
+        row["initial_balance"] = to_major(row["initial_balance"])
+        return json_response(row)
     return jsonify({"message": "No default account set"}), 404
 
 
@@ -675,25 +1003,26 @@ def get_budgets():
     except ValueError:
         return jsonify({"error": "Invalid month format. Use YYYY-MM"}), 400
 
-    conn = get_db_connection()
-    query = """
+    conn = get_analytics_connection(user_id)
+    start, end = month_range(year, month)
+    source = transactions_source(conn, user_id, start, end)
+    query = f"""
         SELECT c.id AS category_id, c.name AS category_name,
-               IFNULL(b.limit_amount, 0) AS limit_amount,
-               COALESCE(SUM(t.amount), 0) AS spent
+               {major_sql('COALESCE(b.limit_amount, 0)')} AS limit_amount,
+               {major_sql('COALESCE(SUM(t.amount), 0)')} AS spent
         FROM categories c
         LEFT JOIN budgets b ON c.id = b.category_id AND b.year = ? AND b.month = ? AND b.user_id = ?
-        LEFT JOIN transactions t ON c.id = t.category_id
+        LEFT JOIN {source} t ON c.id = t.category_id
             AND t.user_id = ?
-            AND strftime('%Y', t.date) = ?
-            AND strftime('%m', t.date) = ?
+            AND t.date >= ? AND t.date < ?
             AND t.transaction_type = 'EXPENSE'
         WHERE c.user_id = ?
         GROUP BY c.id, c.name, b.limit_amount
         ORDER BY c.name;
     """
-    rows = conn.execute(query, (str(year), month, user_id, user_id, str(year), f"{month:02d}", user_id)).fetchall()
+    columns, rows = fetch_table(conn, query, (year, month, user_id, user_id, start, end, user_id))
     conn.close()
-    return jsonify([dict(r) for r in rows])
+    return table_response(columns, rows)
 
 
 @app.route("/api/budgets/save", methods=["POST"])
@@ -701,12 +1030,21 @@ def get_budgets():
 def save_budgets():
     user_id = get_jwt_identity()
     data = request.get_json() or []
-    conn = get_db_connection()
+    conn = get_db_connection(user_id)
     cur = conn.cursor()
 
+    upsert = """
+        INSERT INTO budgets (user_id, category_id, month, year, limit_amount) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, category_id, month, year) DO UPDATE SET limit_amount = excluded.limit_amount
+    """
+    changed = set()  # (category_id, year) pairs whose budget rows were written
+    saved_keys = []
     for item in data:
         category_id = item["category_id"]
-        limit_amount = item["limit_amount"]
+        try:
+            limit_amount = to_minor(item["limit_amount"])
+        except ValueError:
+            continue
         year = item["year"]
         month = item.get("month")
         apply_all = item.get("apply_all_months", False)
@@ -718,19 +1056,28 @@ def save_budgets():
 
         if apply_all:
             for m in range(1, 13):
-                cur.execute(
-                    "INSERT OR REPLACE INTO budgets (user_id, category_id, month, year, limit_amount, created_at) VALUES (?, ?, ?, ?, ?, datetime('now'))",
-                    (user_id, category_id, m, year, limit_amount),
-                )
+                cur.execute(upsert, (user_id, category_id, m, year, limit_amount))
+            saved_keys.extend((category_id, year, m) for m in range(1, 13))
         else:
             if not month:
                 continue
-            cur.execute(
-                "INSERT OR REPLACE INTO budgets (user_id, category_id, month, year, limit_amount, created_at) VALUES (?, ?, ?, ?, ?, datetime('now'))",
-                (user_id, category_id, month, year, limit_amount),
+            cur.execute(upsert, (user_id, category_id, month, year, limit_amount))
+            saved_keys.append((category_id, year, month))
+        changed.add((category_id, year))
+
+    if changed:
+        conditions = " OR ".join("(category_id = ? AND year = ?)" for _ in changed)
+        budget_ids = [
+            r["id"]
+            for r in cur.execute(
+                f"SELECT id FROM budgets WHERE user_id = ? AND ({conditions})",
+                [user_id] + [v for pair in changed for v in pair],
             )
-
+        ]
+        record_change(conn, user_id, "budgets", budget_ids)
     conn.commit()
+    if saved_keys:
+        after_write(conn, user_id, budget_keys=saved_keys)
     conn.close()
     return jsonify({"message": "Budgets saved"}), 200
 
@@ -740,8 +1087,7 @@ def save_budgets():
 def get_budget_recommendations():
     user_id = get_jwt_identity()
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
+        conn = get_analytics_connection(user_id)
 
         today = datetime.today()
         months = []
@@ -751,25 +1097,26 @@ def get_budget_recommendations():
         months = list(dict.fromkeys(months))
 
         placeholders = ",".join("?" * len(months))
+        start = month_range(*min(months).split("-"))[0]
+        end = month_range(*max(months).split("-"))[1]
         query = f"""
-            SELECT category_id, strftime('%Y-%m', date) AS month, SUM(amount) AS total
-            FROM transactions
-            WHERE user_id = ? AND transaction_type = 'EXPENSE' AND strftime('%Y-%m', date) IN ({placeholders})
+            SELECT category_id, {dialect.year_month('date')} AS month, SUM(amount) AS total
+            FROM {transactions_source(conn, user_id, start, end)}
+            WHERE user_id = ? AND transaction_type = 'EXPENSE' AND date >= ? AND date < ?
+              AND {dialect.year_month('date')} IN ({placeholders})
             GROUP BY category_id, month
         """
-        params = [user_id] + months
-        cur.execute(query, params)
-        rows = cur.fetchall()
+        params = [user_id, start, end] + months
 
         totals = {}
-        for row in rows:
+        for row in iter_rows(conn, query, params):
             cat = row["category_id"]
             totals.setdefault(cat, []).append(row["total"])
 
-        recommendations = {cat: round(sum(vals) / len(vals), 2) for cat, vals in totals.items()}
+        recommendations = {cat: round(to_major(sum(vals)) / len(vals), 2) for cat, vals in totals.items()}
 
         conn.close()
-        return jsonify(recommendations)
+        return json_response(recommendations)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -789,16 +1136,18 @@ def get_report():
     if len(month_num) == 1:
         month_num = f"0{month_num}"
 
-    query = """
+    start, end = month_range(year, month_num)
+    conn = get_analytics_connection(user_id)
+    query = f"""
         SELECT c.id AS category_id, c.name AS category_name,
                SUM(t.amount) AS total_spent, b.limit_amount AS budget,
                (b.limit_amount - SUM(t.amount)) AS difference
-        FROM transactions t
+        FROM {transactions_source(conn, user_id, start, end)} t
         JOIN categories c ON t.category_id = c.id
         LEFT JOIN budgets b ON b.category_id = c.id AND b.year = ? AND b.month = ? AND b.user_id = ?
-        WHERE t.user_id = ? AND strftime('%Y', t.date) = ? AND strftime('%m', t.date) = ? AND UPPER(t.transaction_type) = 'EXPENSE'
+        WHERE t.user_id = ? AND t.date >= ? AND t.date < ? AND t.transaction_type = 'EXPENSE'
     """
-    params = [year, month_num, user_id, user_id, year, month_num]
+    params = [year, month_num, user_id, user_id, start, end]
 
     if account_id:
         query += " AND t.account_id = ?"
@@ -806,7 +1155,6 @@ def get_report():
 
     query += " GROUP BY c.id, b.limit_amount ORDER BY total_spent DESC"
 
-    conn = get_db_connection()
     rows = conn.execute(query, params).fetchall()
     conn.close()
 
@@ -814,16 +1162,205 @@ def get_report():
         {
             "category_id": row["category_id"],
             "category_name": row["category_name"],
-            "total_spent": row["total_spent"] or 0,
-            "budget": row["budget"],
-            "difference": row["difference"] if row["budget"] is not None else None,
+            "total_spent": to_major(row["total_spent"] or 0),
+            "budget": to_major(row["budget"]),
+            "difference": to_major(row["difference"]) if row["budget"] is not None else None,
         }
         for row in rows
     ]
-    return jsonify(report)
+    return json_response(report)
+
+
+# SYNC
+SYNC_ENTITIES = ("transactions", "accounts", "categories", "budgets")
 
 
-# SUGGEST CATEGORY (ML) - uses user's categories (optional)
+def sync_query(conn, user_id, entity, source="transactions"):
+    """SELECT for one synced entity, shaped like its list endpoint plus foreign-key ids.
+
+    Returns ``(sql, params)``; the table alias is the entity's first letter.
+    Transactions are read from ``source`` (the hot table unless given).
+    """
+    if entity == "transactions":
+        sql = f"""
+            SELECT t.id, t.date, t.description, {major_sql('t.amount')} AS amount, t.transaction_type,
+                   t.account_id, t.category_id, a.name AS account_name, c.name AS category, t.is_anomaly
+            FROM {source} t
+            JOIN accounts a ON t.account_id = a.id
+            JOIN categories c ON t.category_id = c.id
+            WHERE t.user_id = ?
+        """
+        return sql, [user_id]
+    if entity == "accounts":
+        sql = f"""
+            SELECT a.id, a.name, a.type, {major_sql('a.initial_balance')} AS initial_balance,
+                {major_sql(ACCOUNT_BALANCE_SQL)} AS current_balance, a.currency
+            FROM accounts a
+            WHERE a.user_id = ?
+        """
+        return sql, [user_id, user_id]
+    if entity == "categories":
+        return "SELECT c.id, c.name, c.type FROM categories c WHERE c.user_id = ?", [user_id]
+    sql = f"""
+        SELECT b.id, b.category_id, b.month, b.year, {major_sql('b.limit_amount')} AS limit_amount
+        FROM budgets b
+        WHERE b.user_id = ?
+    """
+    return sql, [user_id]
+
+
+def _sync_rows_from(conn, user_id, entity, ids, source="transactions"):
+    sql, params = sync_query(conn, user_id, entity, source)
+    if ids is None:
+        columns, rows = fetch_table(conn, sql, params)
+        return [dict(zip(columns, row)) for row in rows]
+
+    result = []
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        columns, rows = fetch_table(
+            conn, f"{sql} AND {entity[0]}.id IN ({','.join('?' * len(chunk))})", params + chunk
+        )
+        result.extend(dict(zip(columns, row)) for row in rows)
+    return result
+
+
+def sync_rows(conn, user_id, entity, ids=None):
+    """Current rows of ``entity`` as dicts, limited to ``ids`` when given.
+
+    Transactions come from the hot table; archives are read one year at a
+    time, and for ``ids`` only while some are still missing (written rows
+    are always hot, so after a write that is never).
+    """
+    ids = None if ids is None else list(ids)
+    result = _sync_rows_from(conn, user_id, entity, ids)
+    if entity != "transactions":
+        return result
+    missing = None if ids is None else set(ids) - {row["id"] for row in result}
+    for source in each_archive(conn, user_id):
+        if missing is not None and not missing:
+            break
+        rows = _sync_rows_from(conn, user_id, entity, None if missing is None else list(missing), source)
+        result.extend(rows)
+        if missing is not None:
+            missing -= {row["id"] for row in rows}
+    return result
+
+
+@app.route("/api/sync", methods=["GET"])
+@jwt_required()
+def sync():
+    """Rows changed since ``?since=<version>``: upserts plus tombstoned ids per entity.
+
+    ``since=0`` (or a version this server never issued) returns everything
+    with ``reset: true``; clients store ``version`` and pass it next time.
+    """
+    user_id = get_jwt_identity()
+    try:
+        since = int(request.args.get("since", 0))
+    except ValueError:
+        return jsonify({"error": "since must be an integer version"}), 400
+
+    conn = get_db_connection(user_id)
+    latest = conn.execute(
+        "SELECT COALESCE(MAX(version), 0) AS version FROM change_log WHERE user_id = ?", (user_id,)
+    ).fetchone()["version"]
+    reset = since <= 0 or since > latest
+    payload = {"version": latest, "reset": reset}
+
+    if reset:
+        for entity in SYNC_ENTITIES:
+            payload[entity] = {"upserts": sync_rows(conn, user_id, entity), "deletes": []}
+        conn.close()
+        return json_response(payload)
+
+    # The latest op per row wins; rows written after `latest` are simply resent next time
+    ops = {entity: {} for entity in SYNC_ENTITIES}
+    for row in iter_rows(
+        conn,
+        "SELECT entity, entity_id, op FROM change_log WHERE user_id = ? AND version > ? AND version <= ? ORDER BY version",
+        (user_id, since, latest),
+    ):
+        ops[row["entity"]][row["entity_id"]] = row["op"]
+
+    for entity, changes in ops.items():
+        upsert_ids = [entity_id for entity_id, op in changes.items() if op == "upsert"]
+        payload[entity] = {
+            "upserts": sync_rows(conn, user_id, entity, upsert_ids) if upsert_ids else [],
+            "deletes": [entity_id for entity_id, op in changes.items() if op == "delete"],
+        }
+    conn.close()
+    return json_response(payload)
+
+
+# PUSH EVENTS (SSE)
+def budget_keys_of(tx):
+    """The (category_id, year, month) budget an expense row counts against, as a list."""
+    if tx["transaction_type"] != "EXPENSE":
+        return []
+    date_str = str(tx["date"])
+    return [(tx["category_id"], int(date_str[:4]), int(date_str[5:7]))]
+
+
+def after_write(conn, user_id, transaction_ids=(), deleted_ids=(), account_ids=(), budget_keys=()):
+    """Post-commit side effects of a write: re-evaluate touched budgets and queue push events.
+
+    Runs as its own short transaction. Everything it stores is derived from
+    committed rows, so the next write to the same month repairs a missed run.
+    ``budget_keys`` adds budgets the committed rows no longer point at (the
+    old month/category of an edited or deleted expense).
+    """
+    tx_rows = sync_rows(conn, user_id, "transactions", transaction_ids) if transaction_ids else []
+    keys = list(budget_keys)
+    for row in tx_rows:
+        keys.extend(budget_keys_of(row))
+
+    budgets = evaluate_budgets(conn, user_id, keys)
+    lock_user(conn, user_id)
+    accounts = sync_rows(conn, user_id, "accounts", account_ids) if account_ids else []
+
+    for row in tx_rows:
+        record_event(conn, user_id, "transaction", row)
+    for tx_id in deleted_ids:
+        record_event(conn, user_id, "transaction_deleted", {"id": tx_id})
+    for row in accounts:
+        record_event(conn, user_id, "balance", {"id": row["id"], "name": row["name"], "current_balance": row["current_balance"]})
+    for budget in budgets:
+        record_event(conn, user_id, "budget_status", budget)
+    conn.commit()
+    # Keep this worker's merchant index (if loaded) in step with the write
+    merchant_indexes.refresh(conn, user_id)
+
+
+@app.route("/api/events", methods=["GET"])
+@jwt_required()
+def events():
+    """text/event-stream of transaction, transaction_deleted, balance and budget_status events.
+
+    Reconnects send Last-Event-ID (or ?lastEventId=) to replay what they missed.
+    """
+    user_id = get_jwt_identity()
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("lastEventId")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({"error": "Last-Event-ID must be an integer"}), 400
+
+    try:
+        sub = broker.subscribe(user_id)
+    except TooManySubscribers:
+        response = jsonify({"error": "Too many open event streams, retry later"})
+        response.headers["Retry-After"] = "30"
+        return response, 503
+
+    return Response(
+        stream_with_context(stream(sub, last_event_id)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# SUGGEST CATEGORY (ML) - the user's own similar past transactions first, then the classifier
 @app.route("/api/suggest-category", methods=["POST"])
 @jwt_required()
 def suggest_category():
@@ -834,23 +1371,56 @@ def suggest_category():
         if not description:
             return jsonify({"error": "Description required"}), 400
 
-        if not vectorizer or not classifier:
-            return jsonify({"error": "ML model not available"}), 500
-
-        X = vectorizer.transform([description])
-        category_id = classifier.predict(X)[0]
-        if hasattr(category_id, "item"):
-            category_id = int(category_id)
-
-        # ensure category belongs to user
-        conn = get_db_connection()
-        cur = conn.cursor()
-        row = cur.execute("SELECT id, name FROM categories WHERE id = ? AND user_id = ?", (category_id, user_id)).fetchone()
+        conn = get_db_connection(user_id)
+        matches = merchant_indexes.lookup(conn, user_id, description)
+        conn.close()
+        category_id = best_category(matches)
+        source = "history"
+
+        if category_id is None:
+            if not model_available():
+                return jsonify({"error": "ML model not available"}), 500
+            try:
+                category_id = inference.submit(description).result(timeout=ML_TIMEOUT)
+            except FuturesTimeout:
+                return jsonify({"error": "Suggestion timed out"}), 503, {"Retry-After": "1"}
+            source = "model"
+
+        # ensure category belongs to user (and name the neighbours' categories)
+        similar = [
+            (similarity, example, categories.most_common(1)[0][0], sum(categories.values()))
+            for similarity, example, categories in matches
+        ]
+        ids = list({category_id} | {cat for _, _, cat, _ in similar})
+        conn = get_db_connection(user_id)
+        names = {
+            row["id"]: row["name"]
+            for row in conn.execute(
+                f"SELECT id, name FROM categories WHERE user_id = ? AND id IN ({','.join('?' * len(ids))})",
+                [user_id] + ids,
+            )
+        }
         conn.close()
-        if not row:
+        if category_id not in names:
             return jsonify({"error": "Predicted category not found for this user"}), 404
 
-        return jsonify({"category_id": row["id"], "suggested_category": row["name"]}), 200
+        return jsonify(
+            {
+                "category_id": category_id,
+                "suggested_category": names[category_id],
+                "source": source,
+                "similar": [
+                    {
+                        "description": example,
+                        "similarity": round(similarity, 3),
+                        "category_id": cat,
+                        "category": names.get(cat),
+                        "count": count,
+                    }
+                    for similarity, example, cat, count in similar
+                ],
+            }
+        ), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
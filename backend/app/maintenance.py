@@ -0,0 +1,217 @@
+import logging
+import os
+import threading
+import time
+
+import metrics
+from config import (
+    DIRECTORY_DB_PATH,
+    MAINTENANCE_ANALYSIS_LIMIT,
+    MAINTENANCE_ANALYZE_EVERY,
+    MAINTENANCE_CHECK_EVERY,
+    MAINTENANCE_INTERVAL,
+    MAINTENANCE_STEP_PAUSE,
+    MAINTENANCE_VACUUM_STEP,
+)
+from database import Error, connect, data_db_paths, is_postgres, is_sharded
+
+# Background upkeep of the SQLite files: planner statistics (ANALYZE, PRAGMA
+# optimize), returning free pages left by deletes (incremental vacuum) and
+# integrity checks. Every worker runs a scheduler thread that refreshes the
+# gauges below; a task runs in whichever worker claims it first (the claim is
+# a row in the file's maintenance_log, written under the write lock), so it
+# runs once per period however many workers there are. The gauges are the
+# same in every worker: aggregate them with max, not sum. The files stay in
+# rollback-journal mode (a WAL main file would make archive moves, which span
+# ATTACHed files, atomic per file only), so there is no checkpoint to run.
+# PostgreSQL is left to autovacuum.
+
+log = logging.getLogger("pft.maintenance")
+
+TICK = 60  # seconds between checks for due tasks (and gauge refreshes)
+
+metrics.describe("pft_db_file_bytes", "gauge", "Size of the SQLite file")
+metrics.describe("pft_db_free_pages", "gauge", "Unused pages in the SQLite file (freelist_count)")
+metrics.describe("pft_db_stats_age_seconds", "gauge", "Seconds since ANALYZE last ran on the SQLite file")
+metrics.describe("pft_db_quick_check_ok", "gauge", "1 if the last PRAGMA quick_check passed")
+metrics.describe("pft_db_maintenance_runs_total", "counter", "Maintenance tasks run by this worker, by outcome")
+metrics.describe("pft_db_maintenance_seconds", "gauge", "Duration of the last run of each maintenance task")
+metrics.describe("pft_db_vacuum_pages_total", "counter", "Free pages returned to the file system by incremental vacuum")
+
+
+def maintained_paths():
+    """Every SQLite file the app writes (data files plus the sharded directory)."""
+    if is_sharded():
+        return [DIRECTORY_DB_PATH] + data_db_paths()
+    return data_db_paths()
+
+
+def _pragma(conn, name):
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+# === TASKS ===
+# Each takes a connection in autocommit mode and returns a short result text
+def analyze(conn, label):
+    conn.execute(f"PRAGMA analysis_limit = {MAINTENANCE_ANALYSIS_LIMIT}")
+    conn.execute("ANALYZE")
+    return "ok"
+
+
+def optimize(conn, label):
+    conn.execute(f"PRAGMA analysis_limit = {MAINTENANCE_ANALYSIS_LIMIT}")
+    # 0x10000: consider every table, not only those this connection queried (SQLite 3.46+)
+    conn.execute("PRAGMA optimize = 0x10002")
+    return "ok"
+
+
+def incremental_vacuum(conn, label, step=MAINTENANCE_VACUUM_STEP, pause=MAINTENANCE_STEP_PAUSE):
+    """Return free pages ``step`` at a time, each step its own short write transaction."""
+    if _pragma(conn, "auto_vacuum") != 2:
+        return "skipped: auto_vacuum is not INCREMENTAL"
+    freed = 0
+    free = _pragma(conn, "freelist_count")
+    while free:
+        # execute() steps the pragma once, which frees a single page; executescript runs it to the end
+        conn.executescript(f"PRAGMA incremental_vacuum({min(free, step)});")
+        left = _pragma(conn, "freelist_count")
+        if left >= free:
+            break
+        freed += free - left
+        free = left
+        time.sleep(pause)
+    metrics.inc("pft_db_vacuum_pages_total", freed, db=label)
+    return f"{freed} pages freed"
+
+
+def quick_check(conn, label):
+    problems = [row[0] for row in conn.execute("PRAGMA quick_check(10)")]
+    return "ok" if problems == ["ok"] else "; ".join(problems)
+
+
+# task, seconds between runs, function
+TASKS = (
+    ("analyze", MAINTENANCE_ANALYZE_EVERY, analyze),
+    ("optimize", MAINTENANCE_INTERVAL, optimize),
+    ("vacuum", MAINTENANCE_INTERVAL, incremental_vacuum),
+    ("quick_check", MAINTENANCE_CHECK_EVERY, quick_check),
+)
+
+
+# === RUNNING ===
+def _last_runs(conn):
+    return {row["task"]: row for row in conn.execute("SELECT task, last_run, result FROM maintenance_log")}
+
+
+def _claim(conn, task, every, now):
+    """Mark ``task`` as started if it is still due; False when another worker got it first."""
+    conn.execute("BEGIN IMMEDIATE")  # waits up to SQLITE_BUSY_TIMEOUT behind a writer
+    try:
+        row = conn.execute("SELECT last_run FROM maintenance_log WHERE task = ?", (task,)).fetchone()
+        if row is not None and now - row["last_run"] < every:
+            conn.execute("ROLLBACK")
+            return False
+        conn.execute(
+            """
+            INSERT INTO maintenance_log (task, last_run) VALUES (?, ?)
+            ON CONFLICT (task) DO UPDATE SET last_run = excluded.last_run, seconds = NULL, result = NULL
+            """,
+            (task, now),
+        )
+        conn.execute("COMMIT")
+        return True
+    except Error:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def maintain(path, force=False):
+    """Run the tasks that are due (every task with ``force``) on one SQLite file.
+
+    Returns ``{task: result}`` for the tasks this call ran.
+    """
+    label = os.path.basename(path)
+    conn = connect(path)
+    conn.isolation_level = None  # claims and pragmas manage their own transactions
+    results = {}
+    try:
+        last_runs = _last_runs(conn)
+        has_stats = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+        for task, every, run in TASKS:
+            if force or (task == "analyze" and not has_stats):
+                every = 0
+            now = time.time()
+            last = last_runs.get(task)
+            if last is not None and now - last["last_run"] < every:
+                continue
+            if not _claim(conn, task, every, now):
+                continue
+            start = time.perf_counter()
+            try:
+                result = run(conn, label)
+                outcome = "ok" if task != "quick_check" or result == "ok" else "failed"
+            except Error as e:
+                result, outcome = f"error: {e}", "error"
+            seconds = time.perf_counter() - start
+            conn.execute(
+                "UPDATE maintenance_log SET seconds = ?, result = ? WHERE task = ?", (seconds, result, task)
+            )
+            metrics.inc("pft_db_maintenance_runs_total", db=label, task=task, outcome=outcome)
+            metrics.set_gauge("pft_db_maintenance_seconds", round(seconds, 3), db=label, task=task)
+            if outcome == "ok":
+                log.info("%s: %s %s (%.2f s)", label, task, result, seconds)
+            else:
+                log.error("%s: %s %s", label, task, result)
+            results[task] = result
+    finally:
+        conn.close()
+    return results
+
+
+def refresh_gauges(path):
+    label = os.path.basename(path)
+    metrics.set_gauge("pft_db_file_bytes", os.path.getsize(path), db=label)
+    conn = connect(path)
+    try:
+        metrics.set_gauge("pft_db_free_pages", _pragma(conn, "freelist_count"), db=label)
+        last_runs = _last_runs(conn)
+    finally:
+        conn.close()
+    analyzed = last_runs.get("analyze")
+    if analyzed is not None:
+        metrics.set_gauge("pft_db_stats_age_seconds", int(time.time() - analyzed["last_run"]), db=label)
+    checked = last_runs.get("quick_check")
+    if checked is not None and checked["result"] is not None:
+        metrics.set_gauge("pft_db_quick_check_ok", int(checked["result"] == "ok"), db=label)
+
+
+# === SCHEDULER ===
+class MaintenanceScheduler:
+    """Per-worker thread that checks for due tasks every TICK seconds."""
+
+    def __init__(self, interval=MAINTENANCE_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def ensure_started(self):
+        if self._thread is not None or self.interval <= 0 or is_postgres():
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db-maintenance", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            # Wait first: a worker that just started has requests to serve
+            time.sleep(TICK)
+            for path in maintained_paths():
+                try:
+                    maintain(path)
+                    refresh_gauges(path)
+                except (Error, OSError) as e:
+                    log.warning("%s: maintenance skipped: %s", path, e)
+
+
+scheduler = MaintenanceScheduler()
@@ -0,0 +1,39 @@
+import threading
+
+# Process-local counters and gauges, served by GET /metrics in the Prometheus
+# text format. Every worker reports its own numbers; the scraper sums them.
+
+_lock = threading.Lock()
+_kinds = {}  # name -> (type, help)
+_values = {}  # (name, sorted label pairs) -> value
+
+
+def describe(name, kind, help_text):
+    _kinds[name] = (kind, help_text)
+
+
+def inc(name, value=1, **labels):
+    """Add ``value`` to a counter (or move a gauge up or down)."""
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _values[key] = _values.get(key, 0) + value
+
+
+def set_gauge(name, value, **labels):
+    with _lock:
+        _values[(name, tuple(sorted(labels.items())))] = value
+
+
+def render():
+    with _lock:
+        values = sorted(_values.items())
+    lines = []
+    described = set()
+    for (name, labels), value in values:
+        if name not in described and name in _kinds:
+            kind, help_text = _kinds[name]
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            described.add(name)
+        label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+        lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+    return "\n".join(lines) + "\n"
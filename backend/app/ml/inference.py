@@ -0,0 +1,179 @@
+import importlib.util
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import metrics
+from config import BASE_DIR, ML_BATCH_WINDOW_MS, ML_MAX_BATCH, ML_WORKERS
+
+# Category suggestions off the request threads. submit() queues a
+# description and returns a Future; a batcher thread collects whatever
+# arrives within the batch window and sends it to a process pool as one
+# vectorizer.transform / classifier.predict call. The workers load the model
+# once, when they start, and the CPU-bound work never holds this process's GIL.
+
+MODEL_DIR = os.path.join(BASE_DIR, "models")
+VECTORIZER_FILE = "tfidf_vectorizer.pkl"
+CLASSIFIER_FILE = "logistic_regression_model.pkl"
+RETRY_BROKEN_POOL = 30  # seconds before restarting a pool whose workers died
+
+metrics.describe("pft_ml_requests_total", "counter", "Category predictions by outcome")
+metrics.describe("pft_ml_batches_total", "counter", "Batches sent to the inference workers")
+metrics.describe("pft_ml_batch_size_total", "counter", "Descriptions sent to the inference workers")
+
+
+# === MODEL (runs in the worker processes) ===
+def load_model(model_dir=MODEL_DIR):
+    """``(vectorizer, classifier)`` from the pickles in ``model_dir``."""
+    import joblib
+
+    with open(os.path.join(model_dir, VECTORIZER_FILE), "rb") as f:
+        vectorizer = joblib.load(f)
+    with open(os.path.join(model_dir, CLASSIFIER_FILE), "rb") as f:
+        classifier = joblib.load(f)
+    return vectorizer, classifier
+
+
+def model_available(model_dir=MODEL_DIR):
+    """Cheap check (no unpickling) that load_model can succeed."""
+    files = all(os.path.exists(os.path.join(model_dir, name)) for name in (VECTORIZER_FILE, CLASSIFIER_FILE))
+    return files and importlib.util.find_spec("sklearn") is not None
+
+
+_model = None
+
+
+def _init_worker(loader):
+    global _model
+    _model = loader()
+
+
+def predict_batch(descriptions):
+    """Category ids for ``descriptions``, in order (plain ints)."""
+    vectorizer, classifier = _model
+    return [int(c) if hasattr(c, "item") else c for c in classifier.predict(vectorizer.transform(descriptions))]
+
+
+# === SERVICE (runs in the API process) ===
+class InferenceService:
+    """Micro-batching front of a process pool; ``workers=0`` predicts inline."""
+
+    def __init__(self, workers=ML_WORKERS, window_ms=ML_BATCH_WINDOW_MS, max_batch=ML_MAX_BATCH, loader=load_model):
+        self.workers = workers
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self.loader = loader
+        self._cond = threading.Condition()
+        self._pending = deque()  # (description, future, arrival)
+        self._busy = 0  # batches handed to the pool and not yet answered
+        self._pool = None
+        self._broken_at = None
+        self._batcher = None
+        self._inline_lock = threading.Lock()
+
+    def submit(self, description):
+        """Future resolving to the predicted category id."""
+        future = Future()
+        if self.workers <= 0:
+            self._predict_inline(description, future)
+            return future
+        with self._cond:
+            if self._batcher is None:
+                self._batcher = threading.Thread(target=self._run, name="ml-batcher", daemon=True)
+                self._batcher.start()
+            self._pending.append((description, future, time.monotonic()))
+            self._cond.notify()
+        return future
+
+    def _predict_inline(self, description, future):
+        global _model
+        try:
+            with self._inline_lock:
+                if _model is None:
+                    _model = self.loader()
+            future.set_result(predict_batch([description])[0])
+            metrics.inc("pft_ml_requests_total", outcome="ok")
+        except Exception as e:
+            future.set_exception(e)
+            metrics.inc("pft_ml_requests_total", outcome="error")
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            # Requests keep joining while every worker is busy, and for at most
+            # one window after the oldest of them arrived
+            deadline = self._pending[0][2] + self.window
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if self._busy < self.workers and remaining <= 0:
+                    break
+                self._cond.wait(remaining if self._busy < self.workers else None)
+            self._busy += 1
+            return [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                pool = self._get_pool()
+                result = pool.submit(predict_batch, [description for description, _, _ in batch])
+            except Exception as e:
+                self._done()
+                self._fail(batch, e)
+                continue
+            metrics.inc("pft_ml_batches_total")
+            metrics.inc("pft_ml_batch_size_total", len(batch))
+            result.add_done_callback(lambda done, batch=batch: self._resolve(batch, done))
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self._broken_at is not None and time.monotonic() - self._broken_at < RETRY_BROKEN_POOL:
+                raise BrokenProcessPool("inference workers failed to start; retrying later")
+            # spawn: forking a threaded API process can copy locks held by other threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.loader,),
+            )
+        return self._pool
+
+    def _done(self):
+        with self._cond:
+            self._busy -= 1
+            self._cond.notify()
+
+    def _resolve(self, batch, done):
+        self._done()
+        try:
+            categories = done.result()
+        except BrokenProcessPool as e:
+            pool, self._pool, self._broken_at = self._pool, None, time.monotonic()
+            if pool is not None:
+                pool.shutdown(wait=False)
+            self._fail(batch, e)
+            return
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        for (_, future, _), category in zip(batch, categories):
+            future.set_result(category)
+        metrics.inc("pft_ml_requests_total", len(batch), outcome="ok")
+
+    def _fail(self, batch, error):
+        for _, future, _ in batch:
+            future.set_exception(error)
+        metrics.inc("pft_ml_requests_total", len(batch), outcome="error")
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+
+inference = InferenceService()
@@ -0,0 +1,229 @@
+import random
+import re
+import threading
+import zlib
+from collections import Counter, OrderedDict
+
+import metrics
+from config import MERCHANT_INDEX_MAX_ROWS, MERCHANT_INDEX_USERS, MERCHANT_MATCH_THRESHOLD
+
+# Per-user nearest-neighbour index over past transaction descriptions.
+# Descriptions are normalized (lower case, digits and punctuation dropped),
+# grouped by that text, and bucketed by MinHash LSH over character 3-grams;
+# candidates from the buckets are ranked by exact Jaccard similarity. Each
+# worker keeps the indexes in memory and catches them up from change_log, so
+# saves made by any worker show up on the next lookup.
+
+NGRAM = 3
+BANDS = 16
+ROWS = 2  # hashes per band: pairs with Jaccard 0.5 share a bucket 99% of the time, 0.2 about half
+_PRIME = 4294967311  # smallest prime above 2**32
+_rng = random.Random(20240601)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(_PRIME)) for _ in range(BANDS * ROWS)]
+_NOISE = re.compile(r"[^a-z]+")
+CANDIDATES = 32  # most band-sharing candidates scored exactly per lookup
+# 3-grams over a-z and space are a closed set (under 20k), so their permuted
+# hashes are cached for good
+_gram_hashes = {}
+
+metrics.describe("pft_merchant_lookups_total", "counter", "Merchant index lookups by outcome")
+
+
+def normalize(description):
+    """Text that identifies a merchant: ``"SWIGGY*Order 8812"`` -> ``"swiggy order"``."""
+    return " ".join(_NOISE.sub(" ", (description or "").lower()).split())
+
+
+def shingles(text):
+    padded = f" {text} "
+    return frozenset(padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1))
+
+
+def _minhashes(gram):
+    hashes = _gram_hashes.get(gram)
+    if hashes is None:
+        h = zlib.crc32(gram.encode())
+        hashes = _gram_hashes[gram] = tuple((a * h + b) % _PRIME for a, b in _PERMUTATIONS)
+    return hashes
+
+
+def band_keys(grams):
+    """LSH bucket keys of a shingle set: one (band, hashes) tuple per band."""
+    signature = list(map(min, zip(*map(_minhashes, grams))))
+    return [(band, tuple(signature[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+
+class Entry:
+    """Every past transaction sharing one normalized description."""
+
+    __slots__ = ("text", "example", "grams", "keys", "categories")
+
+    def __init__(self, text, example):
+        self.text = text
+        self.example = example
+        self.grams = shingles(text)
+        self.keys = band_keys(self.grams)
+        self.categories = Counter()
+
+
+class MerchantIndex:
+    """One user's index; ``version`` is the last change_log version applied (None until built)."""
+
+    def __init__(self):
+        self.version = None
+        self.lock = threading.Lock()
+        self._entries = {}  # normalized text -> Entry
+        self._buckets = {}  # band key -> set of normalized texts
+        self._transactions = {}  # transaction id -> (normalized text, category id)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, tx_id, description, category_id):
+        self.remove(tx_id)
+        text = normalize(description)
+        if not text:
+            return
+        entry = self._entries.get(text)
+        if entry is None:
+            entry = self._entries[text] = Entry(text, description)
+            for key in entry.keys:
+                self._buckets.setdefault(key, set()).add(text)
+        entry.example = description
+        entry.categories[category_id] += 1
+        self._transactions[tx_id] = (text, category_id)
+
+    def remove(self, tx_id):
+        previous = self._transactions.pop(tx_id, None)
+        if previous is None:
+            return
+        text, category_id = previous
+        entry = self._entries[text]
+        entry.categories[category_id] -= 1
+        if entry.categories[category_id] <= 0:
+            del entry.categories[category_id]
+        if not entry.categories:
+            del self._entries[text]
+            for key in entry.keys:
+                bucket = self._buckets[key]
+                bucket.discard(text)
+                if not bucket:
+                    del self._buckets[key]
+
+    def similar(self, description, k=5):
+        """Up to ``k`` ``(similarity, example, categories)`` matches, most similar first.
+
+        Call with ``lock`` held. The results are copies (``categories`` is a
+        Counter of category id -> transactions), safe to use after releasing it.
+        """
+        text = normalize(description)
+        if not text:
+            return []
+        exact = self._entries.get(text)
+        grams = exact.grams if exact else shingles(text)
+        # Shared bands estimate similarity; only the best few are scored exactly
+        shared = Counter()
+        for key in (exact.keys if exact else band_keys(grams)):
+            shared.update(self._buckets.get(key, ()))
+        candidates = [c for c, _ in shared.most_common(CANDIDATES)]
+        scored = [(jaccard(grams, self._entries[c].grams), self._entries[c]) for c in candidates]
+        scored.sort(key=lambda pair: (pair[0], sum(pair[1].categories.values())), reverse=True)
+        return [(similarity, entry.example, Counter(entry.categories)) for similarity, entry in scored[:k]]
+
+
+def best_category(matches, threshold=MERCHANT_MATCH_THRESHOLD):
+    """Category with the most similarity-weighted votes among matches at or above ``threshold``."""
+    votes = Counter()
+    for similarity, _, categories in matches:
+        if similarity >= threshold:
+            for category_id, count in categories.items():
+                votes[category_id] += similarity * count
+    return votes.most_common(1)[0][0] if votes else None
+
+
+# === PER-WORKER REGISTRY ===
+class MerchantIndexes:
+    """LRU of per-user indexes, built on first use and caught up from change_log."""
+
+    def __init__(self, max_users=MERCHANT_INDEX_USERS, max_rows=MERCHANT_INDEX_MAX_ROWS):
+        self.max_users = max_users
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._indexes = OrderedDict()
+
+    def lookup(self, conn, user_id, description, k=5):
+        """Most similar past descriptions of the user (see ``MerchantIndex.similar``)."""
+        index = self._get(conn, str(user_id))
+        with index.lock:
+            matches = index.similar(description, k)
+        metrics.inc("pft_merchant_lookups_total", outcome="hit" if matches else "miss")
+        return matches
+
+    def refresh(self, conn, user_id):
+        """Apply the user's new changes if this worker already holds their index."""
+        with self._lock:
+            index = self._indexes.get(str(user_id))
+        if index is not None and index.version is not None:
+            with index.lock:
+                self._catch_up(conn, str(user_id), index)
+
+    def _get(self, conn, user_id):
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is None:
+                index = self._indexes[user_id] = MerchantIndex()
+                while len(self._indexes) > self.max_users:
+                    self._indexes.popitem(last=False)
+            else:
+                self._indexes.move_to_end(user_id)
+        with index.lock:
+            if index.version is None:
+                self._build(conn, user_id, index)
+            else:
+                self._catch_up(conn, user_id, index)
+        return index
+
+    def _build(self, conn, user_id, index):
+        # Read the version first: anything committed meanwhile is re-applied, and add() is idempotent
+        version = conn.execute(
+            "SELECT COALESCE(MAX(version), 0) AS version FROM change_log WHERE user_id = ?", (user_id,)
+        ).fetchone()["version"]
+        rows = conn.execute(
+            "SELECT id, description, category_id FROM transactions WHERE user_id = ? ORDER BY date DESC LIMIT ?",
+            (user_id, self.max_rows),
+        ).fetchall()
+        for row in reversed(rows):
+            index.add(row["id"], row["description"], row["category_id"])
+        index.version = version
+
+    def _catch_up(self, conn, user_id, index):
+        changes = conn.execute(
+            """
+            SELECT version, entity_id, op FROM change_log
+            WHERE user_id = ? AND version > ? AND entity = 'transactions'
+            ORDER BY version
+            """,
+            (user_id, index.version),
+        ).fetchall()
+        if not changes:
+            return
+        ops = {row["entity_id"]: row["op"] for row in changes}
+        for tx_id, op in ops.items():
+            if op == "delete":
+                index.remove(tx_id)
+        upserts = [tx_id for tx_id, op in ops.items() if op == "upsert"]
+        for i in range(0, len(upserts), 500):
+            chunk = upserts[i:i + 500]
+            for row in conn.execute(
+                f"SELECT id, description, category_id FROM transactions WHERE user_id = ? AND id IN ({','.join('?' * len(chunk))})",
+                [user_id] + chunk,
+            ):
+                index.add(row["id"], row["description"], row["category_id"])
+        index.version = changes[-1]["version"]
+
+
+merchant_indexes = MerchantIndexes()
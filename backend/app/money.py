@@ -0,0 +1,118 @@
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from config import MONEY_CURRENCY
+
+# Digits after the decimal point (ISO 4217 minor units)
+CURRENCY_SCALES = {
+    "INR": 2,
+    "USD": 2,
+    "EUR": 2,
+    "GBP": 2,
+    "AUD": 2,
+    "CAD": 2,
+    "SGD": 2,
+    "AED": 2,
+    "JPY": 0,
+    "KRW": 0,
+    "KWD": 3,
+    "BHD": 3,
+}
+
+SCALE = CURRENCY_SCALES[MONEY_CURRENCY]
+MINOR_PER_MAJOR = 10**SCALE
+# Amounts are stored in signed 64-bit columns (SQLite INTEGER, PostgreSQL BIGINT)
+MAX_MINOR = 2**63 - 1
+
+
+def supported_currency(code):
+    # Balances, totals and reports add amounts across accounts with no
+    # conversion, so every account must be in the configured currency
+    return code == MONEY_CURRENCY
+
+
+def to_minor(value, scale=SCALE):
+    """Parse a major-unit amount from a request ("12.34", 12.34, 12) into integer minor units.
+
+    Raises ValueError for anything that is not a finite number or does not
+    fit in a 64-bit column.
+    """
+    try:
+        amount = Decimal(str(value))
+    except (InvalidOperation, TypeError):
+        raise ValueError(f"Invalid amount: {value!r}")
+    if not amount.is_finite():
+        raise ValueError(f"Invalid amount: {value!r}")
+    try:
+        minor = int(amount.scaleb(scale).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except InvalidOperation:
+        # More digits than the decimal context holds ("1e400")
+        raise ValueError(f"Amount out of range: {value!r}")
+    if abs(minor) > MAX_MINOR:
+        raise ValueError(f"Amount out of range: {value!r}")
+    return minor
+
+
+def to_major(minor):
+    """Integer minor units (or a SUM of them) to a JSON-friendly major-unit float."""
+    if minor is None:
+        return None
+    return int(minor) / MINOR_PER_MAJOR
+
+
+def major_sql(expr):
+    """SQL expression converting a minor-unit column/aggregate to major units for output."""
+    return f"({expr}) / {MINOR_PER_MAJOR}.0"
+
+
+class Money:
+    """Exact amount in integer minor units of one currency."""
+
+    __slots__ = ("minor", "currency")
+
+    def __init__(self, minor, currency=MONEY_CURRENCY):
+        self.minor = int(minor)
+        self.currency = currency
+
+    @classmethod
+    def parse(cls, value, currency=MONEY_CURRENCY):
+        return cls(to_minor(value, CURRENCY_SCALES[currency]), currency)
+
+    def _minor_of(self, other):
+        if not isinstance(other, Money):
+            raise TypeError(f"Cannot combine Money with {type(other).__name__}")
+        if other.currency != self.currency:
+            raise ValueError(f"Currency mismatch: {self.currency} vs {other.currency}")
+        return other.minor
+
+    def __add__(self, other):
+        return Money(self.minor + self._minor_of(other), self.currency)
+
+    def __sub__(self, other):
+        return Money(self.minor - self._minor_of(other), self.currency)
+
+    def __neg__(self):
+        return Money(-self.minor, self.currency)
+
+    def __eq__(self, other):
+        return isinstance(other, Money) and (self.minor, self.currency) == (other.minor, other.currency)
+
+    def __lt__(self, other):
+        return self.minor < self._minor_of(other)
+
+    def __hash__(self):
+        return hash((self.minor, self.currency))
+
+    def __bool__(self):
+        return self.minor != 0
+
+    def to_decimal(self):
+        return Decimal(self.minor).scaleb(-CURRENCY_SCALES[self.currency])
+
+    def to_major(self):
+        return float(self.to_decimal())
+
+    def __str__(self):
+        return f"{self.to_decimal():.{CURRENCY_SCALES[self.currency]}f} {self.currency}"
+
+    def __repr__(self):
+        return f"Money({self.minor}, {self.currency!r})"
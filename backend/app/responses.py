@@ -0,0 +1,64 @@
+import gzip
+import json
+from decimal import Decimal
+
+from flask import Response, request
+
+from config import COMPRESS_LEVEL, COMPRESS_MIN_BYTES
+
+try:  # orjson and brotli are optional; fall back to stdlib json / gzip
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _default(value):
+    # PostgreSQL hands back NUMERIC aggregates as Decimal
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload):
+    if orjson is not None:
+        # NON_STR_KEYS: jsonify() also accepts int keys (e.g. category ids)
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_default, separators=(",", ":")).encode()
+
+
+def _compress(body):
+    if len(body) < COMPRESS_MIN_BYTES:
+        return body, None
+    accepted = request.headers.get("Accept-Encoding", "")
+    if brotli is not None and "br" in accepted:
+        return brotli.compress(body, quality=COMPRESS_LEVEL), "br"
+    if "gzip" in accepted:
+        return gzip.compress(body, compresslevel=COMPRESS_LEVEL), "gzip"
+    return body, None
+
+
+def json_response(payload, status=200):
+    """jsonify() replacement: orjson encoding plus br/gzip above a size threshold."""
+    body, encoding = _compress(dumps(payload))
+    response = Response(body, status=status, mimetype="application/json")
+    response.headers["Vary"] = "Accept-Encoding"
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def table_response(columns, rows, status=200, layout=None):
+    """Serialize plain cursor tuples without building a sqlite3.Row/dict per row first.
+
+    ``?layout=columns`` returns ``{"columns": [...], "rows": [[...], ...]}``,
+    which skips repeating every key per row; the default stays a list of objects.
+    ``layout`` is the route's default when the request does not name one.
+    """
+    if request.args.get("layout", layout) == "columns":
+        return json_response({"columns": columns, "rows": rows}, status)
+    return json_response([dict(zip(columns, row)) for row in rows], status)
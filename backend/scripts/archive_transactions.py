@@ -0,0 +1,63 @@
+"""Move transactions older than the hot horizon into per-year archive databases.
+
+Usage:
+    python scripts/archive_transactions.py [--horizon-months 24] [--batch-size 500] [--pause 0.05] [--dry-run]
+
+Runs online against finance.db (or every shard): rows are moved oldest first
+in short BEGIN IMMEDIATE batches, so API writes only wait for one batch.
+Archived rows go to archive/<db name>/transactions_<year>.db and their net
+effect on each account is added to archived_balances, keeping balances exact.
+Safe to re-run; it stops when nothing older than the cutoff remains.
+No-op on PostgreSQL, where partitioning belongs to the database.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "app"))
+
+from archive import archive_batch, horizon_cutoff  # noqa: E402
+from config import ARCHIVE_BATCH_SIZE, ARCHIVE_HORIZON_MONTHS, SQLITE_BUSY_TIMEOUT  # noqa: E402
+from database import data_db_paths, is_postgres  # noqa: E402
+
+
+def archive_db(path, cutoff, batch_size, pause, dry_run):
+    conn = sqlite3.connect(path, isolation_level=None, timeout=SQLITE_BUSY_TIMEOUT)
+    if dry_run:
+        count = conn.execute("SELECT COUNT(*) FROM transactions WHERE date < ?", (cutoff,)).fetchone()[0]
+        conn.close()
+        print(f"{path}: {count} transactions before {cutoff} would be archived")
+        return
+
+    moved = 0
+    while True:
+        count = archive_batch(conn, path, cutoff, batch_size)
+        if not count:
+            break
+        moved += count
+        time.sleep(pause)
+    conn.close()
+    print(f"{path}: archived {moved} transactions before {cutoff}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--horizon-months", type=int, default=ARCHIVE_HORIZON_MONTHS)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=0.05, help="seconds to yield to the API between batches")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    if is_postgres():
+        print("PostgreSQL backend: nothing to archive")
+        return
+    cutoff = horizon_cutoff(args.horizon_months)
+    for path in data_db_paths():
+        archive_db(path, cutoff, args.batch_size, args.pause, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
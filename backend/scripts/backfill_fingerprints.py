@@ -0,0 +1,94 @@
+"""Add the transactions.fingerprint column and fill it for existing rows.
+
+Usage:
+    python scripts/backfill_fingerprints.py [--batch-size 1000] [--pause 0.05]
+
+Runs online against finance.db (or every shard, or PostgreSQL). The column
+and the duplicate-detection indexes are created if missing, then rows
+without a fingerprint are filled in id order, one short transaction per
+batch. A row whose fingerprint another row of the same user already holds
+is an existing duplicate: it keeps NULL and shows up in
+GET /api/transactions/duplicates. Safe to re-run. Archived rows are not
+touched; duplicate checks recompute their fingerprints when they need them.
+"""
+import argparse
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "app"))
+
+from database import connect, data_db_paths, get_db_connection, is_postgres, table_columns  # noqa: E402
+from duplicates import fingerprint  # noqa: E402
+
+INDEXES = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_fingerprint ON transactions (user_id, fingerprint) WHERE fingerprint IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS idx_transactions_user_account_amount_date ON transactions (user_id, account_id, amount, date)",
+)
+
+
+def ensure_schema(conn):
+    if is_postgres():
+        conn.execute("ALTER TABLE transactions ADD COLUMN IF NOT EXISTS fingerprint TEXT")
+    elif "fingerprint" not in table_columns(conn, "transactions"):
+        conn.execute("ALTER TABLE transactions ADD COLUMN fingerprint TEXT")
+    for sql in INDEXES:
+        conn.execute(sql)
+    conn.commit()
+
+
+def backfill_batch(conn, after_id, batch_size):
+    """Fingerprint up to ``batch_size`` rows after ``after_id``; returns (last id, filled, kept NULL)."""
+    rows = conn.execute(
+        """
+        SELECT id, user_id, account_id, date, amount, description FROM transactions
+        WHERE id > ? AND fingerprint IS NULL ORDER BY id LIMIT ?
+        """,
+        (after_id, batch_size),
+    ).fetchall()
+    filled = 0
+    for row in rows:
+        fp = fingerprint(row["account_id"], row["date"], row["amount"], row["description"])
+        filled += conn.execute(
+            """
+            UPDATE transactions SET fingerprint = ?
+            WHERE id = ? AND NOT EXISTS (SELECT 1 FROM transactions WHERE user_id = ? AND fingerprint = ?)
+            """,
+            (fp, row["id"], row["user_id"], fp),
+        ).rowcount
+    conn.commit()
+    return (rows[-1]["id"] if rows else None), filled, len(rows) - filled
+
+
+def backfill(conn, label, batch_size, pause):
+    ensure_schema(conn)
+    after_id, filled, kept = 0, 0, 0
+    while True:
+        last_id, batch_filled, batch_kept = backfill_batch(conn, after_id, batch_size)
+        if last_id is None:
+            break
+        after_id, filled, kept = last_id, filled + batch_filled, kept + batch_kept
+        time.sleep(pause)
+    print(f"{label}: {filled} fingerprints written, {kept} duplicates left without one")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--pause", type=float, default=0.05, help="seconds to yield to the API between batches")
+    args = parser.parse_args()
+
+    if is_postgres():
+        conn = get_db_connection()
+        backfill(conn, "PostgreSQL", args.batch_size, args.pause)
+        conn.close()
+        return
+    for path in data_db_paths():
+        conn = connect(path)
+        backfill(conn, path, args.batch_size, args.pause)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
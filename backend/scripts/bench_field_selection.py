@@ -0,0 +1,157 @@
+"""Benchmark field selection: SQL work and response bytes per projection.
+
+Usage:
+    python scripts/bench_field_selection.py [--rows 20000] [--repeat 20]
+
+Seeds a throwaway database with one user's ``--rows`` transactions (spread
+over the current year), accounts and budgets. It then calls GET
+/api/dashboard and GET /api/transactions with the default payload, the
+mobile profile and narrower ?include= / ?fields= selections. For each it
+reports the statements and joins the route ran (from the slow-query log with
+its threshold near zero), the median time over ``--repeat`` calls with the log
+off, and the body size, raw and gzipped.
+"""
+import argparse
+import gzip
+import logging
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from datetime import date, timedelta
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--rows", type=int, default=20_000)
+parser.add_argument("--repeat", type=int, default=20)
+args = parser.parse_args()
+
+workdir = tempfile.mkdtemp()
+os.environ["PFT_DB_PATH"] = os.path.join(workdir, "finance.db")
+os.environ["PFT_ARCHIVE_DIR"] = os.path.join(workdir, "archive")
+os.environ["PFT_SHARD_COUNT"] = "0"
+os.environ["PFT_DATABASE_URL"] = ""
+os.environ["PFT_READ_SNAPSHOT_MAX_STALENESS"] = "0"
+os.environ["PFT_RATE_LIMIT_BACKEND"] = "off"
+os.environ["PFT_MAINTENANCE_INTERVAL"] = "0"
+os.environ["PFT_SLOW_QUERY_MS"] = "0.000001"  # log every statement while counting
+warnings.filterwarnings("ignore")
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "app"))
+
+import database  # noqa: E402
+from config import DB_PATH  # noqa: E402
+from database import init_db, slow_query_log  # noqa: E402
+
+ACCOUNTS = ("Checking", "Savings", "Credit Card", "Wallet", "Joint")
+CATEGORIES = [("Salary", "INCOME")] + [(f"Expense {i}", "EXPENSE") for i in range(1, 15)]
+STATUSES = ("green", "green", "green", "yellow", "red")
+
+CALLS = [
+    ("dashboard (default)", "/api/dashboard"),
+    ("dashboard ?profile=mobile", "/api/dashboard?profile=mobile"),
+    ("dashboard ?include=month", "/api/dashboard?include=month"),
+    ("transactions (default)", "/api/transactions?year={year}"),
+    ("transactions ?layout=columns", "/api/transactions?year={year}&layout=columns"),
+    ("transactions ?profile=mobile", "/api/transactions?year={year}&profile=mobile"),
+    ("transactions ?fields=id,amount", "/api/transactions?year={year}&fields=id,amount&layout=columns"),
+]
+
+
+def seed():
+    init_db(DB_PATH)
+    rng = random.Random(5)
+    today = date.today()
+    with sqlite3.connect(DB_PATH) as conn:
+        conn.execute("INSERT INTO users (id, username, email, password_hash) VALUES (1, 'bench', 'b@x', 'x')")
+        accounts = [
+            conn.execute(
+                "INSERT INTO accounts (user_id, name, type, initial_balance) VALUES (1, ?, 'CHECKING', 5000000)", (name,)
+            ).lastrowid
+            for name in ACCOUNTS
+        ]
+        categories = [
+            (conn.execute("INSERT INTO categories (user_id, name, type) VALUES (1, ?, ?)", (name, ctype)).lastrowid, ctype)
+            for name, ctype in CATEGORIES
+        ]
+        start = date(today.year, 1, 1)
+        span = (today - start).days
+        merchants = ["Swiggy Food Delivery", "Amazon Marketplace", "Uber trip", "Big Bazaar", "Netflix", "Monthly Rent"]
+
+        def rows():
+            for _ in range(args.rows):
+                category_id, ctype = rng.choice(categories)
+                day = start + timedelta(days=rng.randint(0, span))
+                yield (rng.choice(merchants), rng.randint(100, 500_000), day.isoformat(), ctype, rng.choice(accounts), category_id)
+
+        conn.executemany(
+            "INSERT INTO transactions (user_id, description, amount, date, transaction_type, account_id, category_id) "
+            "VALUES (1, ?, ?, ?, ?, ?, ?)",
+            rows(),
+        )
+        for category_id, ctype in categories:
+            if ctype != "EXPENSE":
+                continue
+            budget_id = conn.execute(
+                "INSERT INTO budgets (user_id, category_id, month, year, limit_amount) VALUES (1, ?, ?, ?, 2000000)",
+                (category_id, today.month, today.year),
+            ).lastrowid
+            conn.execute(
+                "INSERT INTO budget_status (budget_id, user_id, spent, status) VALUES (?, 1, 1500000, ?)",
+                (budget_id, rng.choice(STATUSES)),
+            )
+
+
+class Collector(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def main():
+    seed()
+    from flask_jwt_extended import create_access_token
+    from main import app
+
+    with app.app_context():
+        token = create_access_token(identity="1")
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+    collector = Collector()
+    slow_query_log.addHandler(collector)
+    slow_query_log.propagate = False
+
+    print(f"{args.rows} transactions this year, median of {args.repeat} calls")
+    print(f"{'call':34} {'stmts':>5} {'joins':>5} {'ms':>8} {'bytes':>9} {'gzip':>8}")
+    for label, path in CALLS:
+        path = path.format(year=date.today().year)
+        # Pass 1: every statement logged, to count them
+        database.SLOW_QUERY_MS = 0.000001
+        collector.records.clear()
+        response = client.get(path, headers=headers)
+        assert response.status_code == 200, (path, response.status_code)
+        statements = len(collector.records)
+        joins = sum(" ".join(record.query_sql.split()).upper().count(" JOIN ") for record in collector.records)
+
+        # Pass 2: timing without the log's per-statement EXPLAIN
+        database.SLOW_QUERY_MS = 0
+        times = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            body = client.get(path, headers=headers).get_data()
+            times.append((time.perf_counter() - t0) * 1000)
+        print(
+            f"{label:34} {statements:5} {joins:5} {statistics.median(times):8.2f} "
+            f"{len(body):9} {len(gzip.compress(body)):8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark the per-user merchant index behind suggest-category.
+
+Usage:
+    python scripts/bench_merchant_index.py [--transactions 20000] [--merchants 400] [--lookups 5000]
+
+Builds one user's index from ``--transactions`` synthetic descriptions
+spread over ``--merchants`` merchants (each with its own category), then
+looks up fresh noisy variants of them: new order numbers, different case
+and punctuation, a dropped or added word, a typo. The script reports build
+time, lookup latency p50/p99 and how often the index alone answers with
+the merchant's category. Descriptions of merchants the user has never seen
+measure the false-hit rate: those should fall through to the classifier.
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "app"))
+
+from ml.merchants import MerchantIndex, best_category  # noqa: E402
+
+WORDS = ["order", "payment", "bill", "txn", "upi", "pos", "online", "store", "recharge", "ref"]
+
+
+def merchant_name(rng):
+    return " ".join("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+                    for _ in range(rng.randint(1, 2)))
+
+
+def variant(rng, name):
+    text = f"{name} {rng.choice(WORDS)} #{rng.randint(1000, 999999)}"
+    roll = rng.random()
+    if roll < 0.2:
+        text = text.upper()
+    elif roll < 0.3:
+        text = text.replace(" ", "*", 1)
+    elif roll < 0.45:
+        i = rng.randrange(len(name))
+        text = text[:i] + rng.choice(string.ascii_lowercase) + text[i + 1:]  # typo
+    elif roll < 0.55:
+        text = f"{rng.choice(WORDS)} {text}"
+    return text
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=20000)
+    parser.add_argument("--merchants", type=int, default=400)
+    parser.add_argument("--lookups", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    names = list({merchant_name(rng) for _ in range(args.merchants)})
+    category = {name: i % 15 + 1 for i, name in enumerate(names)}
+
+    index = MerchantIndex()
+    t0 = time.perf_counter()
+    for tx_id in range(args.transactions):
+        name = rng.choice(names)
+        index.add(tx_id, variant(rng, name), category[name])
+    build = time.perf_counter() - t0
+    print(f"{args.transactions} transactions, {len(names)} merchants -> {len(index)} distinct descriptions")
+    print(f"build: {build * 1000:.0f} ms ({build / args.transactions * 1e6:.1f} us per transaction)\n")
+
+    def run(label, queries):
+        latencies, answered, correct = [], 0, 0
+        for text, expected in queries:
+            t0 = time.perf_counter()
+            found = best_category(index.similar(text))
+            latencies.append(time.perf_counter() - t0)
+            answered += found is not None
+            correct += found is not None and found == expected
+        n = len(queries)
+        print(
+            f"{label:22} p50 {percentile(latencies, 50) * 1000:6.3f} ms  p99 {percentile(latencies, 99) * 1000:6.3f} ms  "
+            f"answered {answered / n:6.1%}  correct {correct / n:6.1%}"
+        )
+
+    known = [(variant(rng, name), category[name]) for name in (rng.choice(names) for _ in range(args.lookups))]
+    unseen = [(variant(rng, merchant_name(rng)), None) for _ in range(args.lookups)]
+    run("known merchants", known)
+    run("unseen merchants", unseen)
+
+
+if __name__ == "__main__":
+    main()
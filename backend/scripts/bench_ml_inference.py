@@ -0,0 +1,164 @@
+"""Benchmark category suggestions: inline vs process pool, with and without micro-batching.
+
+Usage:
+    python scripts/bench_ml_inference.py [--requests 4000] [--clients 16] [--workers 2] [--window-ms 2] [--model auto]
+
+Each of ``--clients`` threads calls InferenceService.submit(...).result() in
+a loop, like concurrent suggest-category requests. Three setups run in turn:
+- inline on the calling threads (PFT_ML_WORKERS=0)
+- the process pool with one description per call (no batching)
+- the process pool with micro-batching
+The script reports throughput and p50/p99 latency. A probe thread that
+sleeps 1 ms at a time stands in for the API's other request threads; its
+p99 oversleep shows how long they stall behind the GIL.
+
+``--model real`` uses the pickled TF-IDF/logistic regression model in
+backend/models (needs scikit-learn). ``--model synthetic`` uses a
+pure-Python hashed character n-gram linear model with no per-call overhead.
+That setup understates what batching saves with scikit-learn, whose
+transform/predict calls each carry a fixed validation cost. ``auto`` picks
+real when scikit-learn is installed.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "app"))
+
+from ml.inference import InferenceService, load_model, model_available  # noqa: E402
+
+MERCHANTS = ["swiggy", "zomato", "uber", "ola", "amazon", "flipkart", "big bazaar", "dmart", "netflix", "apollo pharmacy",
+             "indian oil", "airtel", "jio recharge", "irctc", "bookmyshow", "starbucks", "salary credit", "rent"]
+DIM = 4096
+CLASSES = 12
+
+
+# === SYNTHETIC MODEL ===
+class NgramVectorizer:
+    def transform(self, texts):
+        docs = []
+        for text in texts:
+            padded = f" {text.lower()} "
+            features = {}
+            for n in (2, 3, 4):
+                for i in range(len(padded) - n + 1):
+                    key = zlib.crc32(padded[i:i + n].encode()) % DIM
+                    features[key] = features.get(key, 0) + 1.0
+            docs.append(features)
+        return docs
+
+
+class LinearClassifier:
+    def __init__(self):
+        rng = random.Random(3)
+        self.weights = [[rng.uniform(-1, 1) for _ in range(DIM)] for _ in range(CLASSES)]
+
+    def predict(self, docs):
+        return [
+            max(range(CLASSES), key=lambda c: sum(self.weights[c][k] * v for k, v in doc.items()))
+            for doc in docs
+        ]
+
+
+def synthetic_model():
+    return NgramVectorizer(), LinearClassifier()
+
+
+# === LOAD ===
+def description(rng):
+    return f"{rng.choice(MERCHANTS)} {rng.choice(['order', 'payment', 'bill', 'txn'])} #{rng.randint(1000, 99999)}"
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run(service, requests, clients):
+    latencies = []
+    lock = threading.Lock()
+    remaining = [requests]
+    stalls = []
+    done = threading.Event()
+
+    def client(seed):
+        rng = random.Random(seed)
+        mine = []
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+            t0 = time.perf_counter()
+            service.submit(description(rng)).result(timeout=60)
+            mine.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(mine)
+
+    def probe():
+        while not done.is_set():
+            t0 = time.perf_counter()
+            time.sleep(0.001)
+            stalls.append(time.perf_counter() - t0 - 0.001)
+
+    # Warm up: workers spawned and the model loaded before timing
+    for future in [service.submit("warm up") for _ in range(8)]:
+        future.result(timeout=120)
+
+    probe_thread = threading.Thread(target=probe)
+    probe_thread.start()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    done.set()
+    probe_thread.join()
+    return {
+        "throughput": requests / elapsed,
+        "p50": percentile(latencies, 50) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "stall_p99": percentile(stalls, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--window-ms", type=float, default=2)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--model", choices=("auto", "real", "synthetic"), default="auto")
+    args = parser.parse_args()
+
+    use_real = args.model == "real" or (args.model == "auto" and model_available())
+    loader = load_model if use_real else synthetic_model
+    print(f"model: {'pickled TF-IDF + logistic regression' if use_real else 'synthetic n-gram linear (pure Python)'}")
+    print(f"{args.requests} requests from {args.clients} client threads, {args.workers} worker processes\n")
+
+    setups = [
+        ("inline (request threads)", dict(workers=0)),
+        ("process pool, no batching", dict(workers=args.workers, window_ms=0, max_batch=1)),
+        (f"process pool, {args.window_ms:g} ms batches", dict(workers=args.workers, window_ms=args.window_ms, max_batch=args.max_batch)),
+    ]
+    print(f"{'setup':34} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'other-thread stall p99 ms':>26}")
+    for label, options in setups:
+        service = InferenceService(loader=loader, **options)
+        result = run(service, args.requests, args.clients)
+        service.shutdown()
+        print(
+            f"{label:34} {result['throughput']:9.0f} {result['p50']:8.2f} {result['p99']:8.2f} "
+            f"{result['stall_p99']:26.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark aggregate speed and file size: REAL amounts vs integer minor units.
+
+Usage:
+    python scripts/bench_money.py [--rows 500000] [--repeat 5]
+
+Builds the same transactions twice, once with the old REAL amount column and
+once with INTEGER minor units. It then times the dashboard's monthly SUM, the
+report's per-category SUM and a full-table SUM, and compares VACUUMed file
+sizes and how far the float totals drift from the exact ones.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "app"))
+
+from money import MINOR_PER_MAJOR, to_major  # noqa: E402
+
+QUERIES = {
+    "monthly SUM": """
+        SELECT SUM(amount) FROM transactions
+        WHERE user_id = 1 AND transaction_type = 'EXPENSE' AND date >= '2024-06-01' AND date < '2024-07-01'
+    """,
+    "per-category SUM": """
+        SELECT category_id, SUM(amount) FROM transactions
+        WHERE user_id = 1 AND transaction_type = 'EXPENSE' GROUP BY category_id
+    """,
+    "full SUM": "SELECT SUM(amount) FROM transactions",
+}
+
+
+def build(path, amount_type, rows):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        f"""
+        CREATE TABLE transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            amount {amount_type} NOT NULL,
+            date TEXT NOT NULL,
+            transaction_type TEXT NOT NULL,
+            category_id INTEGER NOT NULL
+        )
+        """
+    )
+    conn.execute("CREATE INDEX idx_tx_user_date ON transactions (user_id, date)")
+    to_value = float if amount_type == "REAL" else int
+    conn.executemany(
+        "INSERT INTO transactions (user_id, amount, date, transaction_type, category_id) VALUES (?, ?, ?, 'EXPENSE', ?)",
+        (
+            (1, to_value(to_major(minor)) if amount_type == "REAL" else minor, date, category_id)
+            for minor, date, category_id in rows
+        ),
+    )
+    conn.commit()
+    conn.execute("VACUUM")
+    return conn
+
+
+def timed(conn, sql, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = conn.execute(sql).fetchall()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    rows = [
+        (rng.randint(1, 500_000), f"{rng.randint(2021, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", rng.randint(1, 10))
+        for _ in range(args.rows)
+    ]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        real = build(os.path.join(workdir, "real.db"), "REAL", rows)
+        integer = build(os.path.join(workdir, "integer.db"), "INTEGER", rows)
+
+        print(f"{args.rows} transactions, best of {args.repeat}")
+        print(f"{'query':<18} {'REAL ms':>9} {'INTEGER ms':>11} {'speedup':>8}  float drift")
+        for label, sql in QUERIES.items():
+            real_t, real_rows = timed(real, sql, args.repeat)
+            int_t, int_rows = timed(integer, sql, args.repeat)
+            drift = max(abs(r[-1] - i[-1] / MINOR_PER_MAJOR) for r, i in zip(real_rows, int_rows))
+            print(f"{label:<18} {real_t * 1000:>9.2f} {int_t * 1000:>11.2f} {real_t / int_t:>7.2f}x  {drift:.2e}")
+
+        real.close()
+        integer.close()
+        real_size = os.path.getsize(os.path.join(workdir, "real.db"))
+        int_size = os.path.getsize(os.path.join(workdir, "integer.db"))
+        print(f"file size: REAL {real_size / 1024:.0f} KiB, INTEGER {int_size / 1024:.0f} KiB ({int_size / real_size:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark mixed read/write load with analytics on the primary vs a snapshot.
+
+Usage:
+    python scripts/bench_read_snapshot.py [--rows 200000] [--readers 4] [--writers 2] [--seconds 5]
+
+Writers insert one transaction per commit (POST /api/transactions). Readers
+run the /api/report aggregate for a random month. The same load runs twice:
+once with readers on the primary file and once on a read snapshot.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--rows", type=int, default=200_000)
+parser.add_argument("--readers", type=int, default=4)
+parser.add_argument("--writers", type=int, default=2)
+parser.add_argument("--seconds", type=float, default=5)
+parser.add_argument("--staleness", type=float, default=2)
+args = parser.parse_args()
+
+workdir = tempfile.mkdtemp()
+os.environ["PFT_DB_PATH"] = os.path.join(workdir, "finance.db")
+os.environ["PFT_READ_SNAPSHOT_DIR"] = os.path.join(workdir, "snapshots")
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "app"))
+
+from database import DB_PATH, get_db_connection, get_read_connection, init_db  # noqa: E402
+
+REPORT_SQL = """
+    SELECT c.id, c.name, SUM(t.amount) AS total_spent
+    FROM transactions t JOIN categories c ON t.category_id = c.id
+    WHERE t.user_id = 1 AND strftime('%Y-%m', t.date) = ? AND t.transaction_type = 'EXPENSE'
+    GROUP BY c.id ORDER BY total_spent DESC
+"""
+
+
+def seed():
+    init_db(DB_PATH)
+    with sqlite3.connect(DB_PATH) as conn:
+        conn.execute("INSERT INTO users (id, username, email, password_hash) VALUES (1, 'bench', 'b@x', 'x')")
+        conn.execute("INSERT INTO accounts (id, user_id, name, type) VALUES (1, 1, 'Main', 'CHECKING')")
+        conn.executemany(
+            "INSERT INTO categories (id, user_id, name, type) VALUES (?, 1, ?, 'EXPENSE')",
+            [(i, f"cat{i}") for i in range(1, 11)],
+        )
+        rng = random.Random(1)
+        conn.executemany(
+            "INSERT INTO transactions (user_id, date, description, amount, account_id, category_id, transaction_type) "
+            "VALUES (1, ?, 'seed', ?, 1, ?, 'EXPENSE')",
+            (
+                (f"{rng.randint(2021, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", rng.uniform(1, 500), rng.randint(1, 10))
+                for _ in range(args.rows)
+            ),
+        )
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))] if values else 0.0
+
+
+def run(use_snapshot):
+    stop = time.perf_counter() + args.seconds
+    write_lat, read_lat, errors = [], [], []
+
+    def writer():
+        conn = get_db_connection(1)
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            try:
+                conn.execute(
+                    "INSERT INTO transactions (user_id, date, description, amount, account_id, category_id, transaction_type) "
+                    "VALUES (1, '2025-10-01', 'bench', 9.5, 1, 1, 'EXPENSE')"
+                )
+                conn.commit()
+            except sqlite3.OperationalError as e:
+                errors.append(e)
+            write_lat.append(time.perf_counter() - t0)
+        conn.close()
+
+    def reader():
+        rng = random.Random()
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            if use_snapshot:
+                conn, _ = get_read_connection(1, max_staleness=args.staleness)
+            else:
+                conn = get_db_connection(1)
+            conn.execute(REPORT_SQL, (f"{rng.randint(2021, 2025)}-{rng.randint(1, 12):02d}",)).fetchall()
+            conn.close()
+            read_lat.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=writer) for _ in range(args.writers)]
+    threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    label = "snapshot" if use_snapshot else "primary"
+    print(
+        f"{label:>9} {len(write_lat) / args.seconds:>9.0f} {percentile(write_lat, 0.99) * 1000:>12.1f}"
+        f" {len(read_lat) / args.seconds:>8.1f} {percentile(read_lat, 0.99) * 1000:>11.1f} {len(errors):>7}"
+    )
+
+
+seed()
+print(f"{args.rows} rows, {args.writers} writers, {args.readers} report readers, {args.seconds}s per run")
+print(f"{'reads on':>9} {'writes/s':>9} {'write p99 ms':>12} {'reads/s':>8} {'read p99 ms':>11} {'errors':>7}")
+run(use_snapshot=False)
+run(use_snapshot=True)
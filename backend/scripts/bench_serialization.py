@@ -0,0 +1,119 @@
+"""Benchmark CPU per request and bytes on the wire for GET /api/transactions.
+
+Usage:
+    python scripts/bench_serialization.py [--rows 50000] [--repeat 5]
+
+Compares the old path (sqlite3.Row -> dict -> flask.jsonify) with the
+tuple/orjson response layer in row and columnar layouts, uncompressed and
+with gzip / brotli.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import warnings
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--rows", type=int, default=50_000)
+parser.add_argument("--repeat", type=int, default=5)
+args = parser.parse_args()
+
+workdir = tempfile.mkdtemp()
+os.environ["PFT_DB_PATH"] = os.path.join(workdir, "finance.db")
+warnings.filterwarnings("ignore")
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "app"))
+
+import responses  # noqa: E402
+from database import DB_PATH, get_db_connection, init_db  # noqa: E402
+from flask import jsonify  # noqa: E402
+from main import app  # noqa: E402
+
+LIST_SQL = """
+    SELECT t.id, t.date, t.description, t.amount, t.transaction_type,
+           a.name AS account_name, c.name AS category, t.is_anomaly
+    FROM transactions t
+    JOIN accounts a ON t.account_id = a.id
+    JOIN categories c ON t.category_id = c.id
+    WHERE t.user_id = ?
+    ORDER BY t.date DESC
+"""
+
+
+def seed(client):
+    client.post("/api/register", json={"username": "bench", "email": "b@x", "password": "p"})
+    token = client.post("/api/login", json={"username": "bench", "password": "p"}).get_json()["token"]
+    with sqlite3.connect(DB_PATH) as conn:
+        conn.execute("INSERT INTO accounts (id, user_id, name, type) VALUES (1, 1, 'SBI ACCOUNT', 'CHECKING')")
+        conn.executemany(
+            "INSERT INTO categories (id, user_id, name, type) VALUES (?, 1, ?, 'EXPENSE')",
+            [(i, f"Category {i}") for i in range(1, 11)],
+        )
+        rng = random.Random(1)
+        merchants = ["Swiggy Food Delivery", "Amazon", "Uber trip", "Big Bazaar", "Netflix", "Monthly Rent"]
+        conn.executemany(
+            "INSERT INTO transactions (user_id, date, description, amount, account_id, category_id, transaction_type) "
+            "VALUES (1, ?, ?, ?, 1, ?, 'EXPENSE')",
+            (
+                (
+                    f"{rng.randint(2021, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                    rng.choice(merchants),
+                    round(rng.uniform(1, 5000), 2),
+                    rng.randint(1, 10),
+                )
+                for _ in range(args.rows)
+            ),
+        )
+    return token
+
+
+def measure(label, fn):
+    cpu = []
+    size = 0
+    for _ in range(args.repeat):
+        t0 = time.process_time()
+        size = fn()
+        cpu.append(time.process_time() - t0)
+    print(f"{label:<34} {min(cpu) * 1000:>9.1f} {size / 1024:>10.1f}")
+
+
+def legacy():
+    # What transactions_list_create did before the response layer
+    with app.test_request_context():
+        conn = get_db_connection(1)
+        rows = conn.execute(LIST_SQL, (1,)).fetchall()
+        conn.close()
+        return len(jsonify([dict(row) for row in rows]).get_data())
+
+
+def endpoint(client, token, query="", encoding="identity"):
+    def run():
+        response = client.get(
+            f"/api/transactions{query}",
+            headers={"Authorization": f"Bearer {token}", "Accept-Encoding": encoding},
+        )
+        assert response.status_code == 200, response.status_code
+        return len(response.get_data())
+
+    return run
+
+
+init_db(DB_PATH)
+client = app.test_client()
+token = seed(client)
+
+print(f"GET /api/transactions, {args.rows} rows, best of {args.repeat}")
+print(f"orjson: {'yes' if responses.orjson else 'no (stdlib json)'}, brotli: {'yes' if responses.brotli else 'no'}")
+print(f"{'path':<34} {'CPU ms':>9} {'KiB':>10}")
+measure("legacy Row->dict + jsonify", legacy)
+measure("tuples + orjson, objects", endpoint(client, token))
+measure("tuples + orjson, columnar", endpoint(client, token, "?layout=columns"))
+measure("objects + gzip", endpoint(client, token, encoding="gzip"))
+measure("columnar + gzip", endpoint(client, token, "?layout=columns", "gzip"))
+if responses.brotli:
+    measure("objects + br", endpoint(client, token, encoding="br"))
+    measure("columnar + br", endpoint(client, token, "?layout=columns", "br"))
@@ -0,0 +1,97 @@
+"""Benchmark concurrent transaction inserts against 1..N SQLite shards.
+
+Usage:
+    python scripts/bench_shard_writes.py [--users 16] [--writes 200] [--shards 1 2 4 8]
+
+Each user gets its own writer thread issuing one INSERT + COMMIT per
+transaction, like POST /api/transactions does. With one shard every writer
+queues on the same file lock; more shards spread users over more locks.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "app"))
+
+from database import init_shards, shard_path  # noqa: E402
+
+
+def setup(shard_dir, shard_count, users):
+    init_shards(shard_count, shard_dir)
+    for user_id in range(1, users + 1):
+        with sqlite3.connect(shard_path(user_id % shard_count, shard_dir)) as conn:
+            conn.execute(
+                "INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, 'x')",
+                (user_id, f"user{user_id}", f"user{user_id}@example.com"),
+            )
+            conn.execute(
+                "INSERT INTO accounts (id, user_id, name, type) VALUES (?, ?, 'Main', 'CHECKING')",
+                (user_id, user_id),
+            )
+            conn.execute(
+                "INSERT INTO categories (id, user_id, name, type) VALUES (?, ?, 'Food', 'EXPENSE')",
+                (user_id, user_id),
+            )
+
+
+def writer(path, user_id, writes, errors):
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        for i in range(writes):
+            conn.execute(
+                "INSERT INTO transactions (user_id, date, description, amount, account_id, category_id, transaction_type) "
+                "VALUES (?, '2025-10-01', ?, 12.5, ?, ?, 'EXPENSE')",
+                (user_id, f"bench {i}", user_id, user_id),
+            )
+            conn.commit()
+    except sqlite3.Error as e:
+        errors.append(e)
+    finally:
+        conn.close()
+
+
+def run(shard_count, users, writes):
+    with tempfile.TemporaryDirectory() as shard_dir:
+        setup(shard_dir, shard_count, users)
+        errors = []
+        threads = [
+            threading.Thread(
+                target=writer,
+                args=(shard_path(user_id % shard_count, shard_dir), user_id, writes, errors),
+            )
+            for user_id in range(1, users + 1)
+        ]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+    return users * writes / elapsed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=16)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    print(f"{args.users} concurrent writers x {args.writes} commits each")
+    print(f"{'shards':>6} {'writes/s':>10} {'seconds':>8} {'speedup':>8}")
+    baseline = None
+    for shard_count in args.shards:
+        rate, elapsed = run(shard_count, args.users, args.writes)
+        baseline = baseline or rate
+        print(f"{shard_count:>6} {rate:>10.0f} {elapsed:>8.2f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
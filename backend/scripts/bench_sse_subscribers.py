@@ -0,0 +1,60 @@
+"""Measure the per-worker cost of idle SSE subscribers and of fanning out events.
+
+Usage:
+    python scripts/bench_sse_subscribers.py [--subscribers 5000] [--users 1000] [--events 2000]
+
+Registers N subscribers with a fresh events.Broker (spread over --users user
+ids, as several tabs per user would be), reports the memory they hold, then
+times publish() for events addressed to random users, which is the
+dispatcher's per-event work. Connection handling (one greenlet or thread per
+stream) comes on top and depends on the server.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "app"))
+
+from events import Broker  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=2000)
+    args = parser.parse_args()
+
+    broker = Broker(max_subscribers=args.subscribers)
+    broker._dispatcher = object()  # measure the registry only; no tailing thread
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    subs = [broker.subscribe(i % args.users + 1) for i in range(args.subscribers)]
+    after = tracemalloc.take_snapshot()
+    held = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    tracemalloc.stop()
+    print(f"{len(subs)} idle subscribers: {held / 1024:.0f} KiB, {held / len(subs):.0f} B each")
+
+    rng = random.Random(1)
+    targets = [rng.randint(1, args.users) for _ in range(args.events)]
+    t0 = time.perf_counter()
+    for n, user_id in enumerate(targets):
+        broker.publish(user_id, (n, "transaction", "{}"))
+    elapsed = time.perf_counter() - t0
+    delivered = sum(len(sub.pending) for sub in subs)
+    print(
+        f"{args.events} events -> {delivered} deliveries in {elapsed * 1000:.1f} ms "
+        f"({elapsed / args.events * 1e6:.1f} us per event)"
+    )
+
+    for sub in subs:
+        broker.unsubscribe(sub)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""Check that every query the API runs reaches transactions through an index.
+
+Usage:
+    python scripts/check_query_plans.py [--rows 200000] [--users 20] [--analyze] [--verbose]
+
+Seeds a throwaway database with ``--rows`` transactions spread over five
+years and ``--users`` users, and archives everything past the hot horizon.
+It then calls every route through the Flask test client with the slow-query
+log threshold near zero, so each statement is logged with its
+EXPLAIN QUERY PLAN. It fails if any plan contains a full scan (``SCAN``) of a
+transactions table, hot or archived. Exits 1 on violations.
+tests/test_query_plans.py runs the same check on a small dataset.
+"""
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--rows", type=int, default=200_000)
+parser.add_argument("--users", type=int, default=20)
+parser.add_argument("--analyze", action="store_true", help="run ANALYZE before checking (planner statistics)")
+parser.add_argument("--verbose", action="store_true", help="print every statement and its plan")
+args = parser.parse_args()
+
+workdir = tempfile.mkdtemp()
+os.environ["PFT_DB_PATH"] = os.path.join(workdir, "finance.db")
+os.environ["PFT_ARCHIVE_DIR"] = os.path.join(workdir, "archive")
+os.environ["PFT_SHARD_COUNT"] = "0"
+os.environ["PFT_DATABASE_URL"] = ""
+os.environ["PFT_READ_SNAPSHOT_MAX_STALENESS"] = "0"
+os.environ["PFT_SLOW_QUERY_MS"] = "0.000001"  # log (and explain) every statement
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "app"))
+
+from archive import archive_batch, horizon_cutoff  # noqa: E402
+from config import DB_PATH  # noqa: E402
+from database import init_db, slow_query_log, table_scans  # noqa: E402
+
+CATEGORIES = [("Salary", "INCOME")] + [(f"Expense {i}", "EXPENSE") for i in range(1, 10)]
+ACCOUNTS = ("Checking", "Savings", "Card")
+TARGET_USER = 1
+
+
+def seed():
+    init_db(DB_PATH)
+    rng = random.Random(7)
+    today = date.today()
+    with sqlite3.connect(DB_PATH) as conn:
+        accounts, categories = {}, {}
+        for user_id in range(1, args.users + 1):
+            conn.execute(
+                "INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, 'x')",
+                (user_id, f"user{user_id}", f"user{user_id}@example.com"),
+            )
+            for name, ctype in CATEGORIES:
+                cur = conn.execute("INSERT INTO categories (user_id, name, type) VALUES (?, ?, ?)", (user_id, name, ctype))
+                categories.setdefault(user_id, []).append((cur.lastrowid, ctype))
+            for name in ACCOUNTS:
+                cur = conn.execute(
+                    "INSERT INTO accounts (user_id, name, type, initial_balance) VALUES (?, ?, 'CHECKING', 100000)",
+                    (user_id, name),
+                )
+                accounts.setdefault(user_id, []).append(cur.lastrowid)
+
+        def rows():
+            for _ in range(args.rows):
+                # Half of all rows belong to the user the routes run as
+                user_id = TARGET_USER if rng.random() < 0.5 else rng.randint(2, args.users)
+                category_id, ctype = rng.choice(categories[user_id])
+                day = today - timedelta(days=rng.randint(0, 5 * 365))
+                yield (user_id, f"merchant {rng.randint(1, 500)}", rng.randint(100, 500_000), day.isoformat(), ctype,
+                       rng.choice(accounts[user_id]), category_id)
+
+        conn.executemany(
+            "INSERT INTO transactions (user_id, description, amount, date, transaction_type, account_id, category_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows(),
+        )
+        for category_id, ctype in categories[TARGET_USER]:
+            if ctype == "EXPENSE":
+                conn.execute(
+                    "INSERT INTO budgets (user_id, category_id, month, year, limit_amount) VALUES (?, ?, ?, ?, 2000000)",
+                    (TARGET_USER, category_id, today.month, today.year),
+                )
+
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    cutoff = horizon_cutoff()
+    while archive_batch(conn, DB_PATH, cutoff, batch_size=5000):
+        pass
+    if args.analyze:
+        conn.execute("ANALYZE")
+    conn.close()
+
+
+class Collector(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def calls(ids):
+    """(label, method, path, json) for every route that touches the database."""
+    today = date.today()
+    this_month = f"{today.year}-{today.month:02d}"
+    old = today.replace(year=today.year - 4)
+    old_month = f"{old.year}-{old.month:02d}"
+    expense_category = ids["category"]
+    tx = {
+        "date": today.isoformat(), "description": "plan check", "amount": 12.5, "transaction_type": "EXPENSE",
+        "account_id": ids["account"], "category_id": expense_category,
+    }
+    return [
+        ("dashboard", "GET", "/api/dashboard", None),
+        ("dashboard (archived month)", "GET", f"/api/dashboard?month={old_month}", None),
+        ("dashboard (mobile profile)", "GET", "/api/dashboard?profile=mobile", None),
+        ("transactions", "GET", "/api/transactions", None),
+        ("transactions (mobile profile)", "GET", f"/api/transactions?profile=mobile&year={today.year}", None),
+        ("transactions year+month", "GET", f"/api/transactions?year={today.year}&month={today.month}", None),
+        ("transactions archived year", "GET", f"/api/transactions?year={old.year}", None),
+        ("transactions month only", "GET", f"/api/transactions?month={today.month}", None),
+        ("transactions by account", "GET", f"/api/transactions?accountId={ids['account']}", None),
+        ("transactions by category", "GET", f"/api/transactions?categoryId={expense_category}&year={today.year}", None),
+        ("transactions description", "GET", "/api/transactions?description=merchant%2042", None),
+        ("create transaction", "POST", "/api/transactions", dict(tx, allow_duplicate=True)),
+        ("create duplicate transaction", "POST", "/api/transactions", tx),
+        ("import transactions", "POST", "/api/transactions/import",
+         {"transactions": [tx, dict(tx, date=old.isoformat(), description="old statement line")]}),
+        ("duplicates", "GET", "/api/transactions/duplicates", None),
+        ("duplicates (archived year)", "GET", f"/api/transactions/duplicates?year={old.year}", None),
+        ("transaction detail", "GET", "/api/transactions/{new}", None),
+        ("update transaction", "PUT", "/api/transactions/{new}", dict(tx, amount=99)),
+        ("delete transaction", "DELETE", "/api/transactions/{new}", None),
+        ("update archived transaction", "PUT", f"/api/transactions/{ids['archived']}",
+         dict(tx, date=ids["archived_date"], description="restored")),
+        ("categories", "GET", "/api/categories", None),
+        ("delete used category", "DELETE", f"/api/categories/{expense_category}", None),
+        ("accounts", "GET", "/api/accounts", None),
+        ("account detail", "GET", f"/api/accounts/{ids['account']}", None),
+        ("delete used account", "DELETE", f"/api/accounts/{ids['account']}", None),
+        ("budgets", "GET", f"/api/budgets?month={this_month}", None),
+        ("budgets (archived month)", "GET", f"/api/budgets?month={old_month}", None),
+        ("save budgets", "POST", "/api/budgets/save",
+         [{"category_id": expense_category, "year": today.year, "month": today.month, "limit_amount": 5000}]),
+        ("budget recommendations", "GET", "/api/budgets/recommendations", None),
+        ("report", "GET", f"/api/report?month={this_month}", None),
+        ("report (archived month)", "GET", f"/api/report?month={old_month}&accountId={ids['account']}", None),
+        ("sync (full)", "GET", "/api/sync?since=0", None),
+        ("sync (delta)", "GET", "/api/sync?since=1", None),
+    ]
+
+
+def main():
+    t0 = time.perf_counter()
+    seed()
+    print(f"Seeded {args.rows} transactions for {args.users} users in {time.perf_counter() - t0:.1f}s ({workdir})")
+
+    conn = sqlite3.connect(DB_PATH)
+    ids = {
+        "account": conn.execute("SELECT MIN(id) FROM accounts WHERE user_id = ?", (TARGET_USER,)).fetchone()[0],
+        "category": conn.execute(
+            "SELECT MIN(id) FROM categories WHERE user_id = ? AND type = 'EXPENSE'", (TARGET_USER,)
+        ).fetchone()[0],
+    }
+    conn.close()
+    archive_dir = os.path.join(os.environ["PFT_ARCHIVE_DIR"], "finance")
+    arc = sqlite3.connect(os.path.join(archive_dir, sorted(os.listdir(archive_dir))[0]))
+    ids["archived"], ids["archived_date"] = arc.execute(
+        "SELECT id, date FROM transactions WHERE user_id = ? ORDER BY id LIMIT 1", (TARGET_USER,)
+    ).fetchone()
+    arc.close()
+
+    from flask_jwt_extended import create_access_token
+    from main import app
+
+    collector = Collector()
+    slow_query_log.addHandler(collector)
+    slow_query_log.propagate = False
+    with app.app_context():
+        token = create_access_token(identity=str(TARGET_USER))
+    headers = {"Authorization": f"Bearer {token}"}
+    client = app.test_client()
+
+    violations = 0
+    new_id = None
+    for label, method, path, body in calls(ids):
+        if "{new}" in path:
+            path = path.format(new=new_id)
+        collector.records.clear()
+        t0 = time.perf_counter()
+        res = client.open(path, method=method, json=body, headers=headers)
+        elapsed = (time.perf_counter() - t0) * 1000
+        if label == "create transaction":
+            new_id = res.get_json()["id"]
+
+        bad = [
+            (record, scans)
+            for record in collector.records
+            if (scans := table_scans(record.query_sql, record.query_plan))
+        ]
+        status = "FAIL" if bad else "ok"
+        print(f"{status:4} {label:30} {method:6} {res.status_code} {len(collector.records):3} statements {elapsed:8.1f} ms")
+        for record in collector.records if args.verbose else ():
+            print("      " + " ".join(record.query_sql.split())[:160])
+            for line in record.query_plan:
+                print("        " + line)
+        for record, scans in bad:
+            violations += 1
+            print(f"      {' '.join(record.query_sql.split())}")
+            print(f"      params: {record.query_params!r}")
+            for line in record.query_plan:
+                print(f"        {line}")
+
+    if violations:
+        print(f"\n{violations} statement(s) scan a transactions table")
+        sys.exit(1)
+    print("\nEvery statement reaches transactions through an index")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,90 +1,18 @@
-import sqlite3
 import os
-
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) 
-DB_PATH = os.path.join(BASE_DIR, "finance.db")
-
-schema = """
-PRAGMA foreign_keys = ON;
-
--- ======================
--- USERS TABLE
--- ======================
-CREATE TABLE IF NOT EXISTS users (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    username TEXT NOT NULL UNIQUE,
-    email TEXT NOT NULL UNIQUE,
-    password_hash TEXT NOT NULL,
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-);
-
--- ======================
--- CATEGORIES TABLE
--- ======================
-CREATE TABLE IF NOT EXISTS categories (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id INTEGER NOT NULL,
-    name TEXT NOT NULL,
-    type TEXT NOT NULL CHECK (type IN ('INCOME', 'EXPENSE')),
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE(user_id, name),
-    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
-);
-
--- ======================
--- ACCOUNTS TABLE
--- ======================
-CREATE TABLE IF NOT EXISTS accounts (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id INTEGER NOT NULL,
-    name TEXT NOT NULL,
-    type TEXT NOT NULL CHECK (type IN ('CHECKING', 'SAVINGS', 'CREDIT_CARD')),
-    initial_balance REAL NOT NULL DEFAULT 0.0,
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE(user_id, name),
-    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
-);
-
--- ======================
--- TRANSACTIONS TABLE
--- ======================
-CREATE TABLE IF NOT EXISTS transactions (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id INTEGER NOT NULL,
-    description TEXT,
-    amount REAL NOT NULL,
-    date TEXT NOT NULL,
-    transaction_type TEXT NOT NULL CHECK (transaction_type IN ('INCOME', 'EXPENSE', 'TRANSFER')),
-    account_id INTEGER NOT NULL,
-    category_id INTEGER NOT NULL,
-    target_account_id INTEGER,
-    is_anomaly BOOLEAN DEFAULT 0,
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
-    FOREIGN KEY (account_id) REFERENCES accounts (id) ON DELETE RESTRICT,
-    FOREIGN KEY (category_id) REFERENCES categories (id) ON DELETE RESTRICT,
-    FOREIGN KEY (target_account_id) REFERENCES accounts (id) ON DELETE SET NULL
-);
-
--- ======================
--- BUDGETS TABLE
--- ======================
-CREATE TABLE IF NOT EXISTS budgets (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id INTEGER NOT NULL,
-    category_id INTEGER NOT NULL,
-    month INTEGER NOT NULL CHECK (month BETWEEN 1 AND 12),
-    year INTEGER NOT NULL,
-    limit_amount REAL NOT NULL,
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE(user_id, category_id, month, year),
-    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
-    FOREIGN KEY (category_id) REFERENCES categories (id) ON DELETE CASCADE
-);
-"""
-
-with sqlite3.connect(DB_PATH) as conn:
-    cursor = conn.cursor()
-    cursor.executescript(schema)
-
-print(f"Database created at: {DB_PATH}")
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "app"))
+
+from config import DB_PATH, SHARD_COUNT, SHARD_DIR  # noqa: E402
+from database import init_db, init_postgres, init_shards, is_postgres  # noqa: E402
+
+if is_postgres():
+    init_postgres()
+    print("PostgreSQL schema created")
+elif SHARD_COUNT:
+    init_shards()
+    print(f"Directory and {SHARD_COUNT} shard databases created in: {SHARD_DIR}")
+else:
+    init_db(DB_PATH)
+    print(f"Database created at: {DB_PATH}")
@@ -0,0 +1,62 @@
+"""Run database maintenance now on every SQLite file.
+
+Usage:
+    python scripts/maintain_database.py [--force] [--enable-incremental-vacuum]
+
+Runs the tasks of maintenance.py that are due (every task with --force):
+ANALYZE, PRAGMA optimize, incremental vacuum and quick_check. The API runs
+the same pass in the background (PFT_MAINTENANCE_INTERVAL); use this from
+cron when that is turned off, or to check a file by hand.
+
+Files created before auto_vacuum was enabled cannot reclaim space in steps.
+--enable-incremental-vacuum converts them with one full VACUUM: it rewrites
+the file, locks out every writer for its duration and needs free disk space
+about the size of the file, so run it while the API is stopped or quiet.
+"""
+import argparse
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "app"))
+
+from database import connect, is_postgres  # noqa: E402
+from maintenance import maintain, maintained_paths  # noqa: E402
+
+
+def enable_incremental_vacuum(path):
+    conn = connect(path)
+    conn.isolation_level = None
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return False
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        return True
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--force", action="store_true", help="run every task, due or not")
+    parser.add_argument("--enable-incremental-vacuum", action="store_true")
+    args = parser.parse_args()
+
+    if is_postgres():
+        print("PostgreSQL: nothing to do, autovacuum maintains it")
+        return
+    for path in maintained_paths():
+        before = os.path.getsize(path)
+        if args.enable_incremental_vacuum and enable_incremental_vacuum(path):
+            print(f"{path}: converted to auto_vacuum=INCREMENTAL")
+        results = maintain(path, force=args.force)
+        for task, result in results.items():
+            print(f"{path}: {task}: {result}")
+        if not results:
+            print(f"{path}: nothing due")
+        print(f"{path}: {before} -> {os.path.getsize(path)} bytes")
+
+
+if __name__ == "__main__":
+    main()
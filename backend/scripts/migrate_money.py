@@ -0,0 +1,127 @@
+"""Convert REAL money columns to integer minor units (fixed point).
+
+Usage:
+    python scripts/migrate_money.py [--no-backup]
+
+Migrates finance.db (or every shard when PFT_SHARD_COUNT is set, or the
+PostgreSQL database when PFT_DATABASE_URL is set). SQLite cannot change a
+column's type in place, so accounts, transactions and budgets are rebuilt
+with the INTEGER schema from app/database.py and amounts are rounded to the
+nearest minor unit. Before touching a file, a copy is written next to it as
+<name>.pre-money.bak; scripts/verify_money.py compares the two.
+Files that are already migrated are skipped.
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "app"))
+
+from config import DATABASE_URL, MONEY_CURRENCY  # noqa: E402
+from database import DATA_SCHEMA, MONEY_COLUMNS, data_db_paths, is_postgres, psycopg, table_columns  # noqa: E402
+from money import MINOR_PER_MAJOR  # noqa: E402
+
+
+def backup_path(path):
+    return path + ".pre-money.bak"
+
+
+def is_migrated(conn):
+    types = {row[1]: row[2].upper() for row in conn.execute("PRAGMA table_info(transactions)")}
+    return types.get("amount") == "INTEGER"
+
+
+def create_table_sql(table, new_name):
+    match = re.search(rf"CREATE TABLE IF NOT EXISTS {table} \(.*?\n\);", DATA_SCHEMA, re.S)
+    return match.group(0).replace(f"CREATE TABLE IF NOT EXISTS {table} (", f"CREATE TABLE {new_name} (")
+
+
+def migrate_sqlite(path, backup=True):
+    conn = sqlite3.connect(path, isolation_level=None)
+    if is_migrated(conn):
+        conn.close()
+        print(f"{path}: already migrated")
+        return
+
+    if backup:
+        dst = sqlite3.connect(backup_path(path))
+        conn.backup(dst)
+        dst.close()
+
+    # The documented table-rebuild procedure: FKs off, build new, copy, drop, rename
+    conn.execute("PRAGMA foreign_keys = OFF")
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for table, money_cols in MONEY_COLUMNS.items():
+            new_name = f"{table}__money"
+            old_cols = set(table_columns(conn, table))
+            seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+
+            conn.execute(create_table_sql(table, new_name))
+            cols = [c for c in table_columns(conn, new_name) if c in old_cols]
+            select = [
+                f"CAST(ROUND({c} * {MINOR_PER_MAJOR}) AS INTEGER)" if c in money_cols else c
+                for c in cols
+            ]
+            conn.execute(f"INSERT INTO {new_name} ({', '.join(cols)}) SELECT {', '.join(select)} FROM {table}")
+            conn.execute(f"DROP TABLE {table}")
+            conn.execute(f"ALTER TABLE {new_name} RENAME TO {table}")
+            # Keep AUTOINCREMENT from reusing ids of rows deleted before the rebuild
+            if seq:
+                conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (seq[0], table))
+            if table == "accounts" and "currency" not in old_cols:
+                conn.execute("UPDATE accounts SET currency = ?", (MONEY_CURRENCY,))
+
+        problems = conn.execute("PRAGMA foreign_key_check").fetchall()
+        if problems:
+            raise sqlite3.IntegrityError(f"foreign key check failed: {problems[:5]}")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON")
+
+    # Recreate any indexes declared in the schema (they were dropped with the old tables)
+    conn.executescript(DATA_SCHEMA)
+    conn.execute("VACUUM")
+    conn.close()
+    print(f"{path}: migrated" + (f" (backup: {backup_path(path)})" if backup else ""))
+
+
+def migrate_postgres():
+    with psycopg.connect(DATABASE_URL) as conn:
+        for table, money_cols in MONEY_COLUMNS.items():
+            for col in money_cols:
+                data_type = conn.execute(
+                    "SELECT data_type FROM information_schema.columns WHERE table_name = %s AND column_name = %s",
+                    (table, col),
+                ).fetchone()[0]
+                if data_type == "bigint":
+                    continue
+                conn.execute(f"ALTER TABLE {table} ALTER COLUMN {col} DROP DEFAULT")
+                conn.execute(
+                    f"ALTER TABLE {table} ALTER COLUMN {col} TYPE BIGINT USING round({col} * {MINOR_PER_MAJOR})::bigint"
+                )
+        conn.execute("ALTER TABLE accounts ALTER COLUMN initial_balance SET DEFAULT 0")
+        conn.execute(f"ALTER TABLE accounts ADD COLUMN IF NOT EXISTS currency TEXT NOT NULL DEFAULT '{MONEY_CURRENCY}'")
+    print("PostgreSQL: migrated")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--no-backup", action="store_true")
+    args = parser.parse_args()
+
+    if is_postgres():
+        migrate_postgres()
+        return
+    for path in data_db_paths():
+        migrate_sqlite(path, backup=not args.no_backup)
+
+
+if __name__ == "__main__":
+    main()
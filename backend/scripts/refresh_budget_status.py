@@ -0,0 +1,46 @@
+"""Re-evaluate the stored spent/status of every budget.
+
+Usage:
+    python scripts/refresh_budget_status.py
+
+budget_status is normally maintained by the writes that touch a budget's
+category and month; budgets with no row yet are evaluated when the dashboard
+reads them. Run this after upgrading to store those rows (so the dashboard
+stops recomputing them) or to repair them after editing transactions
+directly in the database.
+"""
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "app"))
+
+from budgets import evaluate_budgets  # noqa: E402
+from database import connect, data_db_paths, get_db_connection, is_postgres  # noqa: E402
+
+
+def refresh(conn, label):
+    users = {}
+    for row in conn.execute("SELECT user_id, category_id, year, month FROM budgets").fetchall():
+        users.setdefault(row["user_id"], []).append((row["category_id"], row["year"], row["month"]))
+    changed = 0
+    for user_id, keys in users.items():
+        changed += len(evaluate_budgets(conn, user_id, keys))
+        conn.commit()
+    print(f"{label}: {sum(map(len, users.values()))} budgets checked, {changed} updated")
+
+
+def main():
+    if is_postgres():
+        conn = get_db_connection()
+        refresh(conn, "PostgreSQL")
+        conn.close()
+        return
+    for path in data_db_paths():
+        conn = connect(path)
+        refresh(conn, path)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 import sqlite3
 import os
+import sys
 from werkzeug.security import generate_password_hash
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) 
 DB_PATH = os.path.join(BASE_DIR, "finance.db")
 
+sys.path.insert(0, os.path.join(BASE_DIR, "app"))
+from money import to_minor  # noqa: E402
+
 with sqlite3.connect(DB_PATH) as conn:
     cursor = conn.cursor()
 
@@ -52,7 +56,7 @@ with sqlite3.connect(DB_PATH) as conn:
     cursor.execute("""
         INSERT OR IGNORE INTO accounts (user_id, name, type, initial_balance)
         VALUES (?, ?, ?, ?)
-    """, (user_id, "SBI ACCOUNT", "CHECKING", 70000.00))
+    """, (user_id, "SBI ACCOUNT", "CHECKING", to_minor("70000.00")))
 
     # -----------------------------
     # Map categories to IDs
@@ -79,7 +83,7 @@ with sqlite3.connect(DB_PATH) as conn:
             INSERT INTO transactions
             (user_id, description, amount, date, transaction_type, account_id, category_id, is_anomaly)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (user_id, desc, amount, date, t_type, account_id, category_id, is_anomaly))
+        """, (user_id, desc, to_minor(amount), date, t_type, account_id, category_id, is_anomaly))
 
     # -----------------------------
     # Budgets
@@ -102,6 +106,6 @@ with sqlite3.connect(DB_PATH) as conn:
         cursor.execute("""
             INSERT OR REPLACE INTO budgets (user_id, category_id, month, year, limit_amount)
             VALUES (?, ?, ?, ?, ?)
-        """, (user_id, category_id, month, year, limit_amount))
+        """, (user_id, category_id, month, year, to_minor(limit_amount)))
 
 print(f"Database and sample data created at: {DB_PATH}")
@@ -0,0 +1,67 @@
+"""Split a single finance.db into a directory database plus N user shards.
+
+Usage:
+    python scripts/shard_database.py --shards 4 [--source finance.db] [--out shards/]
+
+Then start the API with PFT_SHARD_COUNT=4 (and PFT_SHARD_DIR if --out was changed).
+Row ids are preserved, so existing JWTs and client-side ids stay valid.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "app"))
+
+from config import DB_PATH, SHARD_DIR  # noqa: E402
+from database import DATA_TABLES, init_shards, shard_path, table_columns  # noqa: E402
+
+
+def copy_table(conn, table, where, params):
+    # Only copy columns both sides know about, in the destination's order
+    src_cols = set(table_columns(conn, table, "src"))
+    cols = ", ".join(c for c in table_columns(conn, table) if c in src_cols)
+    if not cols:  # table is newer than the source database
+        return 0
+    cur = conn.execute(
+        f"INSERT INTO main.{table} ({cols}) SELECT {cols} FROM src.{table} WHERE {where}",
+        params,
+    )
+    return cur.rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default=DB_PATH)
+    parser.add_argument("--shards", type=int, required=True)
+    parser.add_argument("--out", default=SHARD_DIR)
+    args = parser.parse_args()
+
+    if args.shards < 1:
+        parser.error("--shards must be >= 1")
+    if os.path.exists(os.path.join(args.out, "directory.db")):
+        parser.error(f"{args.out} already contains a sharded database")
+
+    init_shards(args.shards, args.out)
+
+    with sqlite3.connect(os.path.join(args.out, "directory.db")) as conn:
+        conn.execute("ATTACH DATABASE ? AS src", (args.source,))
+        n = copy_table(conn, "users", "1", ())
+    print(f"directory: {n} users")
+
+    for i in range(args.shards):
+        with sqlite3.connect(shard_path(i, args.out)) as conn:
+            conn.execute("PRAGMA foreign_keys = ON;")
+            conn.execute("ATTACH DATABASE ? AS src", (args.source,))
+            counts = {"users": copy_table(conn, "users", "id % ? = ?", (args.shards, i))}
+            for table in DATA_TABLES:
+                counts[table] = copy_table(conn, table, "user_id % ? = ?", (args.shards, i))
+        summary = ", ".join(f"{t}={n}" for t, n in counts.items())
+        print(f"shard {i}: {summary}")
+
+    print(f"Sharded {args.source} into {args.shards} shards at: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
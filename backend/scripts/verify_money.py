@@ -0,0 +1,91 @@
+"""Verify a fixed-point money migration against its pre-migration backup.
+
+Usage:
+    python scripts/verify_money.py [--db finance.db --before finance.db.pre-money.bak]
+
+Checks, for each migrated SQLite file:
+  * every money column holds only INTEGER values
+  * row counts match the backup table by table
+  * every row equals ROUND(old_value * 10^scale), matched by id
+It also reports how far the old float SUMs had drifted from the exact totals.
+Exits 1 if any check fails.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "app"))
+
+from database import MONEY_COLUMNS, data_db_paths  # noqa: E402
+from money import MINOR_PER_MAJOR, to_major  # noqa: E402
+
+
+def verify(path, before):
+    failures = []
+    conn = sqlite3.connect(path)
+    conn.execute("ATTACH DATABASE ? AS old", (before,))
+
+    for table, money_cols in MONEY_COLUMNS.items():
+        new_count = conn.execute(f"SELECT COUNT(*) FROM main.{table}").fetchone()[0]
+        old_count = conn.execute(f"SELECT COUNT(*) FROM old.{table}").fetchone()[0]
+        if new_count != old_count:
+            failures.append(f"{table}: {new_count} rows, backup has {old_count}")
+
+        for col in money_cols:
+            not_int = conn.execute(
+                f"SELECT COUNT(*) FROM main.{table} WHERE typeof({col}) != 'integer'"
+            ).fetchone()[0]
+            if not_int:
+                failures.append(f"{table}.{col}: {not_int} non-integer values")
+
+            mismatched = conn.execute(
+                f"""
+                SELECT COUNT(*) FROM main.{table} n JOIN old.{table} o ON n.id = o.id
+                WHERE n.{col} != CAST(ROUND(o.{col} * {MINOR_PER_MAJOR}) AS INTEGER)
+                """
+            ).fetchone()[0]
+            if mismatched:
+                failures.append(f"{table}.{col}: {mismatched} rows differ from the backup")
+
+            exact, drifted = conn.execute(
+                f"""
+                SELECT (SELECT SUM({col}) FROM main.{table}),
+                       (SELECT SUM({col}) FROM old.{table})
+                """
+            ).fetchone()
+            exact = to_major(exact or 0)
+            drift = abs((drifted or 0) - exact)
+            print(f"  {table}.{col}: exact total {exact:.2f}, float total drifted by {drift:.2e}")
+
+    conn.close()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="migrated database (default: finance.db or every shard)")
+    parser.add_argument("--before", help="pre-migration backup (default: <db>.pre-money.bak)")
+    args = parser.parse_args()
+
+    paths = [args.db] if args.db else data_db_paths()
+    ok = True
+    for path in paths:
+        before = args.before or path + ".pre-money.bak"
+        if not os.path.exists(before):
+            print(f"{path}: no backup at {before}")
+            ok = False
+            continue
+        print(f"{path}:")
+        failures = verify(path, before)
+        for failure in failures:
+            print(f"  FAIL {failure}")
+        ok = ok and not failures
+        print("  OK" if not failures else "  FAILED")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
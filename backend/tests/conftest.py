@@ -0,0 +1,59 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+# Config is read at import: point the app at a throwaway single-file SQLite
+# database before anything under app/ is imported
+WORKDIR = tempfile.mkdtemp()
+os.environ["PFT_DB_PATH"] = os.path.join(WORKDIR, "finance.db")
+os.environ["PFT_ARCHIVE_DIR"] = os.path.join(WORKDIR, "archive")
+os.environ["PFT_SHARD_COUNT"] = "0"
+os.environ["PFT_DATABASE_URL"] = ""
+os.environ["PFT_READ_SNAPSHOT_MAX_STALENESS"] = "0"
+os.environ["PFT_RATE_LIMIT_BACKEND"] = "off"
+os.environ["PFT_MAINTENANCE_INTERVAL"] = "0"
+os.environ["JWT_SECRET_KEY"] = "test-secret-key-long-enough-for-hs256"
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "app"))
+
+from config import ARCHIVE_DIR, DB_PATH  # noqa: E402
+from database import connect, init_db  # noqa: E402
+
+
+def reset_database():
+    """Empty database and archive directory; returns the database path."""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+    shutil.rmtree(ARCHIVE_DIR, ignore_errors=True)
+    init_db(DB_PATH)
+    return DB_PATH
+
+
+def add_user(conn, user_id=1):
+    """Insert a user with one account and one expense category; returns ``(account_id, category_id)``."""
+    conn.execute(
+        "INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, 'x')",
+        (user_id, f"user{user_id}", f"user{user_id}@example.com"),
+    )
+    account_id = conn.execute(
+        "INSERT INTO accounts (user_id, name, type, initial_balance) VALUES (?, 'Checking', 'CHECKING', 0)", (user_id,)
+    ).lastrowid
+    category_id = conn.execute(
+        "INSERT INTO categories (user_id, name, type) VALUES (?, 'Food', 'EXPENSE')", (user_id,)
+    ).lastrowid
+    return account_id, category_id
+
+
+@pytest.fixture
+def db():
+    """Connection to a fresh database in autocommit mode, as archive_batch() needs."""
+    path = reset_database()
+    conn = connect(path)
+    conn.isolation_level = None
+    yield conn
+    conn.close()
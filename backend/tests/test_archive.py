@@ -0,0 +1,143 @@
+import pytest
+from conftest import add_user
+
+from archive import (
+    ATTACH_BUDGET,
+    archive_batch,
+    archive_years,
+    each_archive,
+    find_transaction,
+    restore_transaction,
+    transactions_exist,
+    transactions_source,
+)
+from config import DB_PATH
+from duplicates import fingerprint
+
+
+@pytest.fixture
+def user(db):
+    return add_user(db, 1)
+
+
+def add_transaction(conn, user, day, amount=100, description="coffee", fp=None):
+    account_id, category_id = user
+    return conn.execute(
+        "INSERT INTO transactions (user_id, description, amount, date, transaction_type, account_id, category_id, "
+        "fingerprint) VALUES (1, ?, ?, ?, 'EXPENSE', ?, ?, ?)",
+        (description, amount, day, account_id, category_id, fp),
+    ).lastrowid
+
+
+def archive_all(conn, cutoff):
+    moved = 0
+    while n := archive_batch(conn, DB_PATH, cutoff):
+        moved += n
+    return moved
+
+
+def attached(conn):
+    return [row[1] for row in conn.execute("PRAGMA database_list") if row[1].startswith("archive_")]
+
+
+def count(conn, source, start=None, end=None):
+    sql = f"SELECT COUNT(*), COALESCE(SUM(amount), 0) FROM {source} t WHERE user_id = 1"
+    params = []
+    if start:
+        sql += " AND date >= ? AND date < ?"
+        params = [start, end]
+    return tuple(conn.execute(sql, params).fetchone())
+
+
+def test_archive_batch_moves_old_rows_per_year(db, user):
+    for day in ("2021-03-01", "2022-06-01", "2022-07-01", "2025-01-15"):
+        add_transaction(db, user, day)
+    assert archive_all(db, "2025-01-01") == 3
+    assert archive_years(DB_PATH) == [2021, 2022]
+    assert count(db, "transactions") == (1, 100)
+    # Balances keep counting the moved rows
+    assert db.execute("SELECT net FROM archived_balances WHERE account_id = ?", (user[0],)).fetchone()[0] == -300
+    assert attached(db) == []
+
+
+def test_source_stays_hot_inside_the_horizon(db, user):
+    add_transaction(db, user, "2021-03-01")
+    archive_all(db, "2025-01-01")
+    assert transactions_source(db, 1, "2025-01-01", "2026-01-01") == "transactions"
+    assert attached(db) == []
+
+
+def test_source_unions_archives_the_range_reaches(db, user):
+    add_transaction(db, user, "2021-03-01", 100)
+    add_transaction(db, user, "2022-03-01", 200)
+    add_transaction(db, user, "2025-03-01", 400)
+    archive_all(db, "2025-01-01")
+    source = transactions_source(db, 1, "2022-01-01", "2026-01-01")
+    assert attached(db) == ["archive_2022"]
+    assert count(db, source, "2022-01-01", "2026-01-01") == (2, 600)
+    assert count(db, transactions_source(db, 1)) == (3, 700)
+
+
+def test_source_skips_archived_rows_still_in_the_hot_table(db, user):
+    # What a read snapshot taken before the archiver ran looks like
+    tx_id = add_transaction(db, user, "2021-03-01")
+    archive_all(db, "2025-01-01")
+    db.execute(
+        "INSERT INTO transactions (id, user_id, description, amount, date, transaction_type, account_id, category_id) "
+        "VALUES (?, 1, 'coffee', 100, '2021-03-01', 'EXPENSE', ?, ?)",
+        (tx_id, *user),
+    )
+    assert count(db, transactions_source(db, 1)) == (1, 100)
+
+
+def test_many_years_stay_under_the_attach_limit(db, user):
+    years = range(2000, 2000 + ATTACH_BUDGET + 5)
+    for year in years:
+        add_transaction(db, user, f"{year}-05-01")
+    assert archive_all(db, "2025-01-01") == len(years)
+    assert archive_years(DB_PATH) == list(years)
+
+    source = transactions_source(db, 1)
+    assert len(attached(db)) == ATTACH_BUDGET
+    assert count(db, source) == (len(years), 100 * len(years))
+
+    seen = []
+    for source in each_archive(db, 1):
+        seen.append(count(db, source)[0])
+        assert len(attached(db)) <= ATTACH_BUDGET + 1
+    assert seen == [1] * len(years)
+
+
+def test_transactions_exist_looks_in_every_archive(db, user):
+    for year in range(2000, 2000 + ATTACH_BUDGET + 3):
+        add_transaction(db, user, f"{year}-05-01", amount=year)
+    archive_all(db, "2025-01-01")
+    assert transactions_exist(db, 1, "t.amount = ?", (2000,))
+    assert transactions_exist(db, 1, "t.account_id = ?", (user[0],))
+    assert not transactions_exist(db, 1, "t.amount = ?", (1,))
+    assert attached(db) == []
+
+
+def test_restore_brings_an_archived_row_back(db, user):
+    fp = fingerprint(user[0], "2021-03-01", 100, "coffee")
+    tx_id = add_transaction(db, user, "2021-03-01", fp=fp)
+    archive_all(db, "2025-01-01")
+    # A live copy now holds the same fingerprint
+    add_transaction(db, user, "2021-03-01", fp=fp)
+
+    row, table = find_transaction(db, 1, tx_id)
+    assert table == "archive_2021.transactions" and row["fingerprint"] == fp
+    restore_transaction(db, 1, tx_id, table)
+
+    row, table = find_transaction(db, 1, tx_id)
+    assert table == "transactions" and row["fingerprint"] is None
+    assert db.execute("SELECT COUNT(*) FROM archive_2021.transactions").fetchone()[0] == 0
+    assert db.execute("SELECT net FROM archived_balances WHERE account_id = ?", (user[0],)).fetchone()[0] == 0
+
+
+def test_find_transaction_misses_other_users(db, user):
+    add_user(db, 2)
+    tx_id = add_transaction(db, user, "2021-03-01")
+    archive_all(db, "2025-01-01")
+    assert find_transaction(db, 2, tx_id) == (None, None)
+    assert attached(db) == []
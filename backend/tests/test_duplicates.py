@@ -0,0 +1,165 @@
+import pytest
+from conftest import add_user
+
+from archive import archive_batch
+from config import DB_PATH
+from duplicates import DuplicateChecker, duplicate_groups, fingerprint, normalize_description, refused
+from money import to_major
+
+
+@pytest.fixture
+def user(db):
+    return add_user(db, 1)
+
+
+def add_transaction(conn, user, day, amount=450, description="Blue Tokai coffee"):
+    account_id, category_id = user
+    return conn.execute(
+        "INSERT INTO transactions (user_id, description, amount, date, transaction_type, account_id, category_id, "
+        "fingerprint) VALUES (1, ?, ?, ?, 'EXPENSE', ?, ?, ?)",
+        (description, amount, day, account_id, category_id, fingerprint(account_id, day, amount, description)),
+    ).lastrowid
+
+
+def check(conn, user, day, amount=450, description="Blue Tokai coffee", exclude_id=None):
+    return DuplicateChecker(conn, 1, [day], window=3).check(user[0], day, amount, description, exclude_id)
+
+
+def test_fingerprint_ignores_case_punctuation_and_spacing():
+    assert normalize_description("  SWIGGY*Order  #991 ") == "swiggy order 991"
+    assert fingerprint(1, "2025-10-03", 20, "Swiggy order") == fingerprint(1, "2025-10-03", 20, "SWIGGY  order!")
+    assert fingerprint(1, "2025-10-03", 20, "Swiggy order") != fingerprint(2, "2025-10-03", 20, "Swiggy order")
+    assert fingerprint(1, "2025-10-03", 20, "Swiggy order") != fingerprint(1, "2025-10-04", 20, "Swiggy order")
+
+
+def test_no_duplicate(db, user):
+    add_transaction(db, user, "2025-10-01")
+    fp, duplicate = check(db, user, "2025-10-01", amount=451)
+    assert duplicate is None and fp == fingerprint(user[0], "2025-10-01", 451, "Blue Tokai coffee")
+
+
+def test_exact_copy(db, user):
+    tx_id = add_transaction(db, user, "2025-10-01")
+    fp, duplicate = check(db, user, "2025-10-01", description="BLUE TOKAI  coffee.")
+    # Storing the fingerprint again would violate the unique index
+    assert fp is None
+    assert duplicate == {
+        "id": tx_id, "date": "2025-10-01", "description": "Blue Tokai coffee", "amount": to_major(450), "match": "exact",
+    }
+
+
+def test_exact_copy_wins_over_a_nearer_window_match(db, user):
+    add_transaction(db, user, "2025-10-02", description="coffee")
+    exact_id = add_transaction(db, user, "2025-09-29")
+    _, duplicate = check(db, user, "2025-09-29")
+    assert duplicate["id"] == exact_id and duplicate["match"] == "exact"
+
+
+def test_window_match_is_the_nearest_same_amount_row(db, user):
+    add_transaction(db, user, "2025-09-28", description="coffee")
+    near_id = add_transaction(db, user, "2025-10-02", description="coffee")
+    fp, duplicate = check(db, user, "2025-10-03")
+    assert fp is not None
+    assert duplicate["id"] == near_id and duplicate["match"] == "window"
+
+
+def test_window_edges(db, user):
+    add_transaction(db, user, "2025-10-01")
+    assert check(db, user, "2025-10-04")[1]["match"] == "window"
+    assert check(db, user, "2025-09-28")[1]["match"] == "window"
+    assert check(db, user, "2025-10-05")[1] is None
+    assert check(db, user, "2025-09-27")[1] is None
+
+
+def test_other_accounts_do_not_match(db, user):
+    other_account = db.execute(
+        "INSERT INTO accounts (user_id, name, type, initial_balance) VALUES (1, 'Card', 'CREDIT_CARD', 0)"
+    ).lastrowid
+    add_transaction(db, (other_account, user[1]), "2025-10-01")
+    assert check(db, user, "2025-10-01")[1] is None
+
+
+def test_exclude_id_skips_the_row_being_edited(db, user):
+    tx_id = add_transaction(db, user, "2025-10-01")
+    fp, duplicate = check(db, user, "2025-10-01", exclude_id=tx_id)
+    assert duplicate is None and fp is not None
+    # Given as a string, the way it comes from a URL
+    assert check(db, user, "2025-10-01", exclude_id=str(tx_id))[1] is None
+
+
+def test_rows_written_through_the_checker_connection_are_seen(db, user):
+    checker = DuplicateChecker(db, 1, ["2025-10-01", "2025-10-01"], window=3)
+    assert checker.check(user[0], "2025-10-01", 450, "Blue Tokai coffee")[1] is None
+    add_transaction(db, user, "2025-10-01")
+    assert checker.check(user[0], "2025-10-01", 450, "Blue Tokai coffee")[1]["match"] == "exact"
+
+
+def test_archived_rows_are_checked(db, user):
+    tx_id = add_transaction(db, user, "2021-03-01")
+    while archive_batch(db, DB_PATH, "2025-01-01"):
+        pass
+    _, duplicate = check(db, user, "2021-03-01")
+    assert duplicate["id"] == tx_id and duplicate["match"] == "exact"
+
+
+def test_only_exact_copies_are_refused():
+    assert refused({"match": "exact"})
+    assert not refused({"match": "exact"}, allow_duplicate=True)
+    assert not refused({"match": "window"})
+    assert not refused(None)
+
+
+def test_duplicate_groups(db, user):
+    first = add_transaction(db, user, "2025-10-01")
+    db.execute(
+        "INSERT INTO transactions (user_id, description, amount, date, transaction_type, account_id, category_id) "
+        "VALUES (1, 'Blue Tokai coffee', 450, '2025-10-01', 'EXPENSE', ?, ?)",
+        user,
+    )
+    add_transaction(db, user, "2025-10-20")  # same amount, outside the window
+    near = [add_transaction(db, user, "2025-11-01", 990, "rent"), add_transaction(db, user, "2025-11-03", 990, "Rent")]
+
+    groups = duplicate_groups(db, 1, window=3)
+    assert [g["match"] for g in groups] == ["window", "exact"]
+    assert [t["id"] for t in groups[0]["transactions"]] == near
+    assert groups[1]["transactions"][0]["id"] == first and len(groups[1]["transactions"]) == 2
+    assert duplicate_groups(db, 1, "2025-11-01", "2025-12-01", window=3)[0]["amount"] == to_major(990)
+
+
+@pytest.fixture
+def post(db, user):
+    from flask_jwt_extended import create_access_token
+    from main import app
+
+    with app.app_context():
+        headers = {"Authorization": f"Bearer {create_access_token(identity='1')}"}
+    client = app.test_client()
+
+    def post(day, amount=4.5, description="Blue Tokai coffee", **extra):
+        tx = {"date": day, "description": description, "amount": amount, "transaction_type": "EXPENSE",
+              "account_id": user[0], "category_id": user[1], **extra}
+        res = client.post("/api/transactions", json=tx, headers=headers)
+        return res.status_code, res.get_json()
+
+    return post
+
+
+def test_create_refuses_an_exact_copy(post):
+    status, first = post("2025-10-01")
+    assert status == 201 and "possible_duplicate" not in first
+    status, body = post("2025-10-01", description="blue tokai COFFEE")
+    assert status == 409 and body["duplicate_of"]["id"] == first["id"]
+
+
+def test_create_saves_a_repeat_purchase_and_flags_it(post):
+    _, first = post("2025-10-01")
+    status, body = post("2025-10-02")
+    assert status == 201
+    assert body["possible_duplicate"]["id"] == first["id"] and body["possible_duplicate"]["match"] == "window"
+
+
+def test_create_keeps_an_allowed_exact_copy_without_fingerprint(db, post):
+    post("2025-10-01")
+    status, body = post("2025-10-01", allow_duplicate=True)
+    assert status == 201 and body["possible_duplicate"]["match"] == "exact"
+    assert db.execute("SELECT fingerprint FROM transactions WHERE id = ?", (body["id"],)).fetchone()[0] is None
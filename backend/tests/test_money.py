@@ -0,0 +1,70 @@
+from decimal import Decimal
+
+import pytest
+
+from config import MONEY_CURRENCY
+from money import CURRENCY_SCALES, MAX_MINOR, MINOR_PER_MAJOR, Money, supported_currency, to_major, to_minor
+
+
+@pytest.mark.parametrize(
+    "value,minor",
+    [
+        ("12.34", 1234),
+        (12.34, 1234),
+        (12, 1200),
+        (0.1, 10),
+        ("-7.5", -750),
+        ("1e3", 100000),
+        ("0.005", 1),  # half-up, away from zero
+        ("-0.005", -1),
+        ("0.0049", 0),
+    ],
+)
+def test_to_minor(value, minor):
+    assert to_minor(value, scale=2) == minor
+
+
+def test_to_minor_scales():
+    assert to_minor("12.345", scale=3) == 12345
+    assert to_minor("1234.5", scale=0) == 1235
+
+
+@pytest.mark.parametrize("value", ["abc", "", None, "nan", "inf", "-Infinity", [1]])
+def test_to_minor_rejects_non_numbers(value):
+    with pytest.raises(ValueError, match="Invalid amount"):
+        to_minor(value, scale=2)
+
+
+@pytest.mark.parametrize("value", ["1e400", "-1e400", 1e20, "1" + "0" * 40])
+def test_to_minor_rejects_out_of_range(value):
+    with pytest.raises(ValueError, match="out of range"):
+        to_minor(value, scale=2)
+
+
+def test_to_minor_64_bit_boundary():
+    largest = Decimal(MAX_MINOR).scaleb(-2)
+    assert to_minor(str(largest), scale=2) == MAX_MINOR
+    assert to_minor(str(-largest), scale=2) == -MAX_MINOR
+    with pytest.raises(ValueError, match="out of range"):
+        to_minor(str(largest + Decimal("0.01")), scale=2)
+
+
+def test_to_major():
+    assert to_major(None) is None
+    assert to_major(3 * MINOR_PER_MAJOR + 1) == 3 + 1 / MINOR_PER_MAJOR
+
+
+def test_supported_currency_is_only_the_configured_one():
+    assert supported_currency(MONEY_CURRENCY)
+    assert not supported_currency("XXX")
+    # Same number of decimals is not enough: amounts are summed without conversion
+    same_scale = [c for c, s in CURRENCY_SCALES.items() if s == CURRENCY_SCALES[MONEY_CURRENCY] and c != MONEY_CURRENCY]
+    assert not any(map(supported_currency, same_scale))
+
+
+def test_money_refuses_mixed_currencies():
+    assert Money(150) + Money(50) == Money(200)
+    with pytest.raises(ValueError, match="Currency mismatch"):
+        Money(1, "USD") + Money(1, "EUR")
+    with pytest.raises(TypeError):
+        Money(1) + 1
@@ -0,0 +1,138 @@
+"""The routes reach transactions, hot and archived, through the indexes meant for them.
+
+A small version of scripts/check_query_plans.py: every statement is logged
+with its EXPLAIN QUERY PLAN through the slow-query log.
+"""
+import logging
+import random
+from datetime import date, timedelta
+
+import pytest
+from conftest import add_user, reset_database
+
+import database
+from archive import archive_batch, horizon_cutoff
+from database import connect, slow_query_log, table_scans
+
+TODAY = date.today()
+THIS_MONTH = f"{TODAY.year}-{TODAY.month:02d}"
+OLD = TODAY.replace(year=TODAY.year - 4, day=1)
+OLD_MONTH = f"{OLD.year}-{OLD.month:02d}"
+
+
+class Collector(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture(scope="module")
+def api():
+    path = reset_database()
+    conn = connect(path)
+    conn.isolation_level = None
+    account_id, category_id = add_user(conn, 1)
+    other_account, other_category = add_user(conn, 2)
+    rng = random.Random(7)
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO transactions (user_id, description, amount, date, transaction_type, account_id, category_id) "
+        "VALUES (?, ?, ?, ?, 'EXPENSE', ?, ?)",
+        [
+            (user_id, f"merchant {rng.randint(1, 50)}", rng.randint(100, 5000),
+             (TODAY - timedelta(days=rng.randint(0, 5 * 365))).isoformat(), account, category)
+            for user_id, account, category in [(1, account_id, category_id), (2, other_account, other_category)] * 1500
+        ],
+    )
+    conn.execute(
+        "INSERT INTO budgets (user_id, category_id, month, year, limit_amount) VALUES (1, ?, ?, ?, 100000)",
+        (category_id, TODAY.month, TODAY.year),
+    )
+    conn.execute("COMMIT")
+    while archive_batch(conn, path, horizon_cutoff()):
+        pass
+    conn.close()
+
+    from flask_jwt_extended import create_access_token
+    from main import app
+
+    with app.app_context():
+        token = create_access_token(identity="1")
+    collector = Collector()
+    slow_query_log.addHandler(collector)
+    propagate, threshold = slow_query_log.propagate, database.SLOW_QUERY_MS
+    slow_query_log.propagate = False
+    database.SLOW_QUERY_MS = 0.000001  # log (and explain) every statement
+    client = app.test_client()
+
+    def plans(method, path, json=None):
+        collector.records.clear()
+        res = client.open(path, method=method, json=json, headers={"Authorization": f"Bearer {token}"})
+        assert res.status_code < 500, res.get_data(as_text=True)
+        return list(collector.records)
+
+    plans.ids = {"account": account_id, "category": category_id}
+    yield plans
+    slow_query_log.removeHandler(collector)
+    slow_query_log.propagate, database.SLOW_QUERY_MS = propagate, threshold
+
+
+def _plan_text(records):
+    return "\n".join(line for record in records for line in record.query_plan)
+
+
+ROUTES = [
+    ("GET", "/api/dashboard"),
+    ("GET", f"/api/dashboard?month={OLD_MONTH}"),
+    ("GET", "/api/transactions"),
+    ("GET", f"/api/transactions?year={TODAY.year}&month={TODAY.month}"),
+    ("GET", f"/api/transactions?year={OLD.year}"),
+    ("GET", "/api/transactions?accountId={account}"),
+    ("GET", "/api/transactions?categoryId={category}&year=" + str(TODAY.year)),
+    ("GET", "/api/transactions/duplicates"),
+    ("GET", f"/api/budgets?month={THIS_MONTH}"),
+    ("GET", f"/api/budgets?month={OLD_MONTH}"),
+    ("GET", "/api/budgets/recommendations"),
+    ("GET", f"/api/report?month={THIS_MONTH}"),
+    ("GET", f"/api/report?month={OLD_MONTH}"),
+    ("GET", "/api/accounts"),
+    ("DELETE", "/api/accounts/{account}"),
+    ("DELETE", "/api/categories/{category}"),
+    ("GET", "/api/sync?since=0"),
+]
+
+
+@pytest.mark.parametrize("method,path", ROUTES)
+def test_no_full_scan_of_transactions(api, method, path):
+    records = api(method, path.format(**api.ids))
+    assert records
+    scans = [(record.query_sql, scan) for record in records for scan in table_scans(record.query_sql, record.query_plan)]
+    assert not scans
+
+
+@pytest.mark.parametrize(
+    "method,path,index",
+    [
+        ("GET", f"/api/transactions?year={TODAY.year}", "idx_transactions_user_date"),
+        ("GET", f"/api/transactions?year={OLD.year}", "idx_archive_user_date"),
+        ("GET", "/api/transactions?categoryId={category}&year=" + str(TODAY.year), "idx_transactions_user_category_date"),
+        ("GET", f"/api/report?month={THIS_MONTH}", "idx_transactions_user_date"),
+        ("GET", "/api/transactions/duplicates", "idx_archive_user_account_amount_date"),
+        ("DELETE", "/api/categories/{category}", "idx_transactions_user_category_date"),
+    ],
+)
+def test_route_uses_index(api, method, path, index):
+    assert index in _plan_text(api(method, path.format(**api.ids)))
+
+
+def test_duplicate_check_probes_account_amount_index(api):
+    tx = {
+        "date": TODAY.isoformat(), "description": "plan check", "amount": 12.5, "transaction_type": "EXPENSE",
+        "account_id": api.ids["account"], "category_id": api.ids["category"],
+    }
+    records = api("POST", "/api/transactions", tx)
+    probe = next(record for record in records if "amount = ?" in record.query_sql)
+    assert any("idx_transactions_user_account_amount_date" in line for line in probe.query_plan)
@@ -0,0 +1,75 @@
+// Report the size of every JS chunk in build/ and enforce the budgets in
+// package.json ("bundleBudgets", KB gzipped). Exits 1 when one is exceeded.
+//
+//   npm run build && npm run bundle:report
+//
+// - initial: the entrypoint JS every first visit downloads (the login page)
+// - per-chunk budgets by webpackChunkName (see src/routes.js), e.g. recharts
+// - chunk: any other lazily loaded chunk (a page, or code shared by pages)
+const fs = require("fs");
+const path = require("path");
+const zlib = require("zlib");
+
+const ROOT = path.join(__dirname, "..");
+const BUILD = path.join(ROOT, "build");
+const budgets = require(path.join(ROOT, "package.json")).bundleBudgets || {};
+
+const kb = (bytes) => (bytes / 1024).toFixed(1);
+
+// static/js/reports.1a2b3c4d.chunk.js -> reports
+const chunkName = (file) => path.basename(file).split(".")[0];
+
+const measure = (file) => {
+  const content = fs.readFileSync(path.join(BUILD, file));
+  return { file, name: chunkName(file), raw: content.length, gzip: zlib.gzipSync(content, { level: 9 }).length };
+};
+
+const main = () => {
+  const manifestPath = path.join(BUILD, "asset-manifest.json");
+  if (!fs.existsSync(manifestPath)) {
+    console.error("No build/asset-manifest.json: run `npm run build` first.");
+    process.exit(1);
+  }
+  const manifest = JSON.parse(fs.readFileSync(manifestPath, "utf8"));
+  const initialFiles = new Set(manifest.entrypoints.filter((file) => file.endsWith(".js")));
+  const jsFiles = fs
+    .readdirSync(path.join(BUILD, "static", "js"))
+    .filter((file) => file.endsWith(".js"))
+    .map((file) => `static/js/${file}`);
+
+  const chunks = jsFiles.map(measure).sort((a, b) => b.gzip - a.gzip);
+  const initial = chunks.filter((chunk) => initialFiles.has(chunk.file));
+  const lazy = chunks.filter((chunk) => !initialFiles.has(chunk.file));
+  const violations = [];
+
+  const check = (label, gzip, budget) => {
+    if (budget === undefined) return "";
+    if (gzip > budget * 1024) {
+      violations.push(`${label}: ${kb(gzip)} KB gzipped, budget ${budget} KB`);
+      return `  OVER (${budget} KB)`;
+    }
+    return `  ok (${budget} KB)`;
+  };
+
+  const row = (label, raw, gzip, status) =>
+    console.log(`${label.padEnd(34)} ${kb(raw).padStart(9)} ${kb(gzip).padStart(9)}${status}`);
+
+  console.log(`${"chunk".padEnd(34)} ${"raw KB".padStart(9)} ${"gzip KB".padStart(9)}`);
+  const initialRaw = initial.reduce((sum, chunk) => sum + chunk.raw, 0);
+  const initialGzip = initial.reduce((sum, chunk) => sum + chunk.gzip, 0);
+  initial.forEach((chunk) => row(`  ${chunk.file}`, chunk.raw, chunk.gzip, ""));
+  row("initial (entrypoint total)", initialRaw, initialGzip, check("initial", initialGzip, budgets.initial));
+  console.log("lazy chunks");
+  lazy.forEach((chunk) => {
+    const budget = budgets[chunk.name] !== undefined ? budgets[chunk.name] : budgets.chunk;
+    row(`  ${chunk.name}`, chunk.raw, chunk.gzip, check(chunk.file, chunk.gzip, budget));
+  });
+
+  if (violations.length) {
+    console.error(`\nBundle budget exceeded:\n  ${violations.join("\n  ")}`);
+    process.exit(1);
+  }
+  console.log("\nAll chunks within budget.");
+};
+
+main();
@@ -0,0 +1,28 @@
+import { Link, matchRoutes } from "react-router-dom";
+import { ROUTES } from "../routes";
+
+// Link that starts downloading the target page's chunk on hover, focus or
+// touch, so it is usually loaded by the time the click lands.
+const preloadRoute = (to) => {
+  const matches = matchRoutes(ROUTES, to);
+  const component = matches && matches[matches.length - 1].route.component;
+  if (component && component.preload) {
+    component.preload().catch(() => {});
+  }
+};
+
+export default function PrefetchLink({ to, onMouseEnter, onFocus, onTouchStart, ...props }) {
+  const handle = (handler) => (event) => {
+    preloadRoute(to);
+    if (handler) handler(event);
+  };
+  return (
+    <Link
+      to={to}
+      onMouseEnter={handle(onMouseEnter)}
+      onFocus={handle(onFocus)}
+      onTouchStart={handle(onTouchStart)}
+      {...props}
+    />
+  );
+}
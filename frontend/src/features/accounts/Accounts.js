@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from "react";
 import { deleteAccount, getTransactionsByAccount, setDefaultAccount, getDefaultAccount } from "../../services/accountApi";
 import { useNavigate } from "react-router-dom";
+import PrefetchLink from "../../components/PrefetchLink";
 import "./Accounts.css";
 
 const Accounts = () => {
@@ -87,11 +88,11 @@ const Accounts = () => {
       <div className="header">PERSONAL FINANCE TRACKER</div>
 
       <div className="nav">
-        <a href="/" className="nav-item">Dashboard</a>
-        <a href="/transactions" className="nav-item">Transactions</a>
-        <a href="/accounts" className="nav-item active">Accounts</a>
-        <a href="/budget" className="nav-item">Budget</a>
-        <a href="/reports" className="nav-item">Reports</a>
+        <PrefetchLink to="/" className="nav-item">Dashboard</PrefetchLink>
+        <PrefetchLink to="/transactions" className="nav-item">Transactions</PrefetchLink>
+        <PrefetchLink to="/accounts" className="nav-item active">Accounts</PrefetchLink>
+        <PrefetchLink to="/budget" className="nav-item">Budget</PrefetchLink>
+        <PrefetchLink to="/reports" className="nav-item">Reports</PrefetchLink>
       </div>
 
       <div className="page-header">
@@ -1,6 +1,8 @@
 import React, { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom"; 
-import { fetchBudgets } from "../../services/budgetApi";
+import { subscribeCache } from "../../services/apiClient";
+import { budgetsPath, fetchBudgets } from "../../services/budgetApi";
+import PrefetchLink from "../../components/PrefetchLink";
 import "./Budget.css";
 
 export default function BudgetPage() {
@@ -12,9 +14,11 @@ export default function BudgetPage() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
-  // Fetch budgets whenever `month` changes
+  // Fetch budgets whenever `month` changes; a cached copy shows at once and
+  // the revalidated one replaces it
   useEffect(() => {
     loadBudgets();
+    return subscribeCache(budgetsPath(month), setBudgets);
   }, [month]);
 
   const loadBudgets = async () => {
@@ -46,11 +50,11 @@ export default function BudgetPage() {
       <div className="header">PERSONAL FINANCE TRACKER</div>
 
       <div className="nav">
-        <a href="/" className="nav-item">Dashboard</a>
-        <a href="/transactions" className="nav-item">Transactions</a>
-        <a href="/accounts" className="nav-item">Accounts</a>
-        <a href="/budget" className="nav-item active">Budget</a>
-        <a href="/reports" className="nav-item">Reports</a>
+        <PrefetchLink to="/" className="nav-item">Dashboard</PrefetchLink>
+        <PrefetchLink to="/transactions" className="nav-item">Transactions</PrefetchLink>
+        <PrefetchLink to="/accounts" className="nav-item">Accounts</PrefetchLink>
+        <PrefetchLink to="/budget" className="nav-item active">Budget</PrefetchLink>
+        <PrefetchLink to="/reports" className="nav-item">Reports</PrefetchLink>
       </div>
 
       {/* 🟢 Month Selector */}
@@ -5,6 +5,7 @@ import {
   saveBudgets,
   fetchRecommendedBudgets,
 } from "../../services/budgetApi";
+import PrefetchLink from "../../components/PrefetchLink";
 import "./SetBudget.css";
 
 export default function SetBudgetPage() {
@@ -82,21 +83,21 @@ export default function SetBudgetPage() {
 
       {/* 🔹 Navigation bar */}
       <div className="nav">
-        <a href="/" className="nav-item">
+        <PrefetchLink to="/" className="nav-item">
           Dashboard
-        </a>
-        <a href="/transactions" className="nav-item">
+        </PrefetchLink>
+        <PrefetchLink to="/transactions" className="nav-item">
           Transactions
-        </a>
-        <a href="/accounts" className="nav-item">
+        </PrefetchLink>
+        <PrefetchLink to="/accounts" className="nav-item">
           Accounts
-        </a>
-        <a href="/budget" className="nav-item active">
+        </PrefetchLink>
+        <PrefetchLink to="/budget" className="nav-item active">
           Budget
-        </a>
-        <a href="/reports" className="nav-item">
+        </PrefetchLink>
+        <PrefetchLink to="/reports" className="nav-item">
           Reports
-        </a>
+        </PrefetchLink>
       </div>
 
       {/* 🔹 Form Section */}
@@ -1,5 +1,9 @@
-import { useEffect, useState } from "react";
-import { fetchDashboardData } from "../../services/dashboardApi";
+import { useEffect, useRef, useState } from "react";
+import { invalidate, subscribeCache, updateCache } from "../../services/apiClient";
+import { dashboardPath, fetchDashboardData } from "../../services/dashboardApi";
+import { subscribeEvents } from "../../services/eventsApi";
+import { logout } from "../../services/loginApi";
+import PrefetchLink from "../../components/PrefetchLink";
 import "./Dashboard.css";
 
 const Dashboard = () => {
@@ -26,37 +30,42 @@ const Dashboard = () => {
     "July","August","September","October","November","December"
   ];
 
-  // ✅ Single source of truth for dashboard data
+  const monthYearOf = (month, year) => `${year}-${String(month).padStart(2, "0")}`;
+
+  // ✅ safely extract and set data (also runs for every fresh or patched cached copy)
+  const applyDashboard = (dashboardData) => {
+    setData({
+      total_balance: dashboardData.total_balance ?? 0,
+      total_income: dashboardData.total_income ?? 0,
+      total_expense: dashboardData.total_expense ?? 0,
+      monthly_income: dashboardData.monthly_income ?? 0,
+      monthly_expense: dashboardData.monthly_expense ?? 0,
+      savings_rate: dashboardData.savings_rate ?? 0,
+      recent_transactions: dashboardData.recent_transactions ?? [],
+      budget_alerts: dashboardData.budget_alerts ?? [],
+    });
+    setError("");
+
+    // ✅ accounts from backend (ensure it's an array)
+    setAccounts(Array.isArray(dashboardData.accounts) ? dashboardData.accounts : []);
+  };
+
+  // ✅ Single source of truth for dashboard data: the shared request cache
   const loadDashboardData = async (month = selectedMonth, year = selectedYear) => {
     try {
       setLoading(true);
-      const monthYear = `${year}-${String(month).padStart(2, "0")}`;
 
       const token = localStorage.getItem("token");
       if (!token) throw new Error("No token found");
 
-      const dashboardData = await fetchDashboardData(token, monthYear);
+      const dashboardData = await fetchDashboardData(monthYearOf(month, year));
       if (!dashboardData) throw new Error("Failed to fetch dashboard data");
-
-      // ✅ safely extract and set data
-      setData({
-        total_balance: dashboardData.total_balance ?? 0,
-        total_income: dashboardData.total_income ?? 0,
-        total_expense: dashboardData.total_expense ?? 0,
-        monthly_income: dashboardData.monthly_income ?? 0,
-        monthly_expense: dashboardData.monthly_expense ?? 0,
-        savings_rate: dashboardData.savings_rate ?? 0,
-        recent_transactions: dashboardData.recent_transactions ?? [],
-        budget_alerts: dashboardData.budget_alerts ?? [],
-      });
-
-      // ✅ accounts from backend (ensure it's an array)
-      setAccounts(Array.isArray(dashboardData.accounts) ? dashboardData.accounts : []);
+      applyDashboard(dashboardData);
 
     } catch (err) {
       console.error("Dashboard error:", err);
-      if (err.message.includes("Unauthorized") || err.message.includes("token")) {
-        localStorage.removeItem("token");
+      if (err.status === 401 || err.message.includes("Unauthorized") || err.message.includes("token")) {
+        await logout();
         window.location.href = "/login";
       } else {
         setError(err.message);
@@ -68,8 +77,67 @@ const Dashboard = () => {
 
   useEffect(() => {
     loadDashboardData(selectedMonth, selectedYear);
+    // A stale cached copy is shown first; the revalidated one arrives here
+    return subscribeCache(dashboardPath(monthYearOf(selectedMonth, selectedYear)), applyDashboard);
   }, [selectedMonth, selectedYear]);
 
+  // === Live updates (SSE) ===
+  // Balances and budget statuses are patched into the cached dashboard from
+  // the pushed event; monthly totals are refetched (debounced) only when a
+  // transaction in the viewed month changes, instead of polling the whole dashboard.
+  const selectedRef = useRef({ month: selectedMonth, year: selectedYear });
+  selectedRef.current = { month: selectedMonth, year: selectedYear };
+
+  useEffect(() => {
+    let refreshTimer = null;
+    const inSelectedMonth = (dateStr) => {
+      const { month, year } = selectedRef.current;
+      return String(dateStr || "").startsWith(`${year}-${String(month).padStart(2, "0")}`);
+    };
+    const scheduleRefresh = () => {
+      clearTimeout(refreshTimer);
+      // Marks every view derived from transactions stale; the one on screen refetches
+      refreshTimer = setTimeout(() => invalidate(["transactions"]), 500);
+    };
+    const patchDashboard = (update) => {
+      const { month, year } = selectedRef.current;
+      updateCache(dashboardPath(monthYearOf(month, year)), update);
+    };
+
+    const unsubscribe = subscribeEvents({
+      transaction: (tx) => {
+        if (inSelectedMonth(tx.date)) scheduleRefresh();
+      },
+      transaction_deleted: () => scheduleRefresh(),
+      balance: (acc) => {
+        patchDashboard((prev) => ({
+          ...prev,
+          accounts: (prev.accounts ?? []).map((a) =>
+            a.id === acc.id ? { ...a, current_balance: acc.current_balance } : a
+          ),
+        }));
+      },
+      budget_status: (budget) => {
+        const { month, year } = selectedRef.current;
+        if (budget.month !== month || budget.year !== year) return;
+        patchDashboard((prev) => {
+          const alerts = prev.budget_alerts ?? [];
+          const alert = { id: budget.id, name: budget.name, spent: budget.spent, limit: budget.limit, status: budget.status };
+          const exists = alerts.some((b) => b.id === budget.id);
+          return {
+            ...prev,
+            budget_alerts: exists ? alerts.map((b) => (b.id === budget.id ? alert : b)) : [...alerts, alert],
+          };
+        });
+      },
+    });
+
+    return () => {
+      clearTimeout(refreshTimer);
+      unsubscribe();
+    };
+  }, []);
+
   if (loading) return <p>Loading...</p>;
   if (error) return <p style={{ color: "red" }}>{error}</p>;
 
@@ -82,11 +150,11 @@ const Dashboard = () => {
       <div className="header">PERSONAL FINANCE TRACKER</div>
 
       <div className="nav">
-        <a href="/" className="nav-item active">Dashboard</a>
-        <a href="/transactions" className="nav-item">Transactions</a>
-        <a href="/accounts" className="nav-item">Accounts</a>
-        <a href="/budget" className="nav-item">Budget</a>
-        <a href="/reports" className="nav-item">Reports</a>
+        <PrefetchLink to="/" className="nav-item active">Dashboard</PrefetchLink>
+        <PrefetchLink to="/transactions" className="nav-item">Transactions</PrefetchLink>
+        <PrefetchLink to="/accounts" className="nav-item">Accounts</PrefetchLink>
+        <PrefetchLink to="/budget" className="nav-item">Budget</PrefetchLink>
+        <PrefetchLink to="/reports" className="nav-item">Reports</PrefetchLink>
       </div>
 
       {/* Month & Year Selector */}
@@ -212,7 +280,7 @@ const Dashboard = () => {
           <div className="panel-header">BUDGET ALERTS</div>
           <div className="budget-list">
             {data.budget_alerts.map((b, idx) => (
-              <div key={idx} className="budget-item">
+              <div key={b.id ?? idx} className="budget-item">
                 <div className="budget-header">
                   <span className={`budget-status ${b.status}`}>{b.name}</span>
                 </div>
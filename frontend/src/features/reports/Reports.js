@@ -1,8 +1,8 @@
-import React, { useState, useEffect } from "react";
-import { PieChart, Pie, Cell, Tooltip, Legend, ResponsiveContainer } from "recharts";
-import { fetchReport } from "../../services/reportApi";
-
-const COLORS = ["#0088FE","#00C49F","#FFBB28","#FF8042","#AA336A","#8884D8"];
+import React, { Suspense, useState, useEffect } from "react";
+import PrefetchLink from "../../components/PrefetchLink";
+import { SpendingChart } from "../../routes";
+import { subscribeCache } from "../../services/apiClient";
+import { fetchReport, reportPath } from "../../services/reportApi";
 
 export default function Reports() {
   const [month, setMonth] = useState(new Date().toISOString().slice(0, 7));
@@ -21,6 +21,7 @@ export default function Reports() {
       setLoading(false);
     };
     fetchReportData();
+    return subscribeCache(reportPath(month), setReportData);
   }, [month]);
 
   return (
@@ -28,11 +29,11 @@ export default function Reports() {
       <div className="header">PERSONAL FINANCE TRACKER</div>
 
       <div className="nav">
-        <a href="/" className="nav-item">Dashboard</a>
-        <a href="/transactions" className="nav-item">Transactions</a>
-        <a href="/accounts" className="nav-item">Accounts</a>
-        <a href="/budget" className="nav-item">Budget</a>
-        <a href="/reports" className="nav-item active">Reports</a>
+        <PrefetchLink to="/" className="nav-item">Dashboard</PrefetchLink>
+        <PrefetchLink to="/transactions" className="nav-item">Transactions</PrefetchLink>
+        <PrefetchLink to="/accounts" className="nav-item">Accounts</PrefetchLink>
+        <PrefetchLink to="/budget" className="nav-item">Budget</PrefetchLink>
+        <PrefetchLink to="/reports" className="nav-item active">Reports</PrefetchLink>
       </div>
 
       <div style={{ padding: "20px", fontFamily: "Arial, sans-serif" }}>
@@ -75,26 +76,10 @@ export default function Reports() {
             </table>
 
             <h3>Spending Breakdown</h3>
-            <ResponsiveContainer width="100%" height={300}>
-              <PieChart>
-                <Pie
-                  data={reportData}
-                  dataKey="total_spent"
-                  nameKey="category_name"
-                  cx="50%"
-                  cy="50%"
-                  outerRadius={100}
-                  fill="#8884d8"
-                  label
-                >
-                  {reportData.map((entry, index) => (
-                    <Cell key={`cell-${index}`} fill={COLORS[index % COLORS.length]} />
-                  ))}
-                </Pie>
-                <Tooltip formatter={(value) => `₹${value.toFixed(2)}`} />
-                <Legend />
-              </PieChart>
-            </ResponsiveContainer>
+            {/* The table shows while the chart's chunk (recharts) is still loading */}
+            <Suspense fallback={<p>Loading chart...</p>}>
+              <SpendingChart data={reportData} />
+            </Suspense>
           </>
         )}
       </div>
@@ -0,0 +1,30 @@
+import React from "react";
+import { PieChart, Pie, Cell, Tooltip, Legend, ResponsiveContainer } from "recharts";
+
+const COLORS = ["#0088FE","#00C49F","#FFBB28","#FF8042","#AA336A","#8884D8"];
+
+// The only user of recharts; loaded as its own chunk (see routes.js)
+export default function SpendingChart({ data }) {
+  return (
+    <ResponsiveContainer width="100%" height={300}>
+      <PieChart>
+        <Pie
+          data={data}
+          dataKey="total_spent"
+          nameKey="category_name"
+          cx="50%"
+          cy="50%"
+          outerRadius={100}
+          fill="#8884d8"
+          label
+        >
+          {data.map((entry, index) => (
+            <Cell key={`cell-${index}`} fill={COLORS[index % COLORS.length]} />
+          ))}
+        </Pie>
+        <Tooltip formatter={(value) => `₹${value.toFixed(2)}`} />
+        <Legend />
+      </PieChart>
+    </ResponsiveContainer>
+  );
+}
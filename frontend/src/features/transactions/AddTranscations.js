@@ -54,9 +54,24 @@ export default function AddTransactions() {
       return alert("All required fields must be filled.");
 
     try {
-      const success = await addTransaction(formData);
+      let success;
+      try {
+        success = await addTransaction(formData);
+      } catch (err) {
+        // Only an exact copy is refused; confirm before saving it twice
+        const dup = err.duplicateOf;
+        if (!dup || !window.confirm(`"${dup.description}" (${dup.amount} on ${dup.date}) is already saved. Add it again?`))
+          throw err;
+        success = await addTransaction({ ...formData, allow_duplicate: true });
+      }
       if (success) {
-        alert("Transaction added successfully!");
+        // Saved, but the same amount was spent on this account a few days away
+        const similar = success.possible_duplicate;
+        alert(
+          similar
+            ? `Transaction added. Similar to "${similar.description}" (${similar.amount} on ${similar.date}).`
+            : "Transaction added successfully!"
+        );
         navigate("/transactions");
       }
     } catch (err) {
@@ -1,5 +1,10 @@
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import { useParams, useNavigate } from "react-router-dom";
+import { fetchAccounts } from "../../services/accountApi";
+import { subscribeCache } from "../../services/apiClient";
+import { fetchCategories } from "../../services/categoriesApi";
+import { deleteTransaction, fetchTransactionList, transactionListPath } from "../../services/transactionApi";
+import PrefetchLink from "../../components/PrefetchLink";
 import styles from "./Transactions.module.css";
 
 function Transactions() {
@@ -17,48 +22,29 @@ function Transactions() {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState("");
 
-  const token = localStorage.getItem("token");
+  // Unsubscribes from the cached list shown last
+  const unsubscribeList = useRef(() => {});
+
+  // Dropdown options come from the local sync store (no request when fresh)
+  useEffect(() => {
+    fetchAccounts().then(setAccounts);
+    fetchCategories().then(setCategories);
+  }, []);
 
   useEffect(() => {
-    fetchAccounts();
-    fetchCategories();
     fetchTransactions();
     // eslint-disable-next-line
   }, [accountId, selectedAccount, selectedCategory, selectedMonth, selectedYear]);
 
-  // === Fetch accounts ===
-  const fetchAccounts = async () => {
-    try {
-      const res = await fetch("http://127.0.0.1:5000/api/accounts", {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      const data = await res.json();
-      setAccounts(Array.isArray(data) ? data : []);
-    } catch (err) {
-      console.error("Failed to fetch accounts:", err);
-    }
-  };
-
-  // === Fetch categories ===
-  const fetchCategories = async () => {
-    try {
-      const res = await fetch("http://127.0.0.1:5000/api/categories", {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      const data = await res.json();
-      setCategories(Array.isArray(data) ? data : []);
-    } catch (err) {
-      console.error("Failed to fetch categories:", err);
-    }
-  };
+  useEffect(() => () => unsubscribeList.current(), []);
 
   // === Fetch transactions ===
+  // Cached per filter set; a stale copy shows at once and the revalidated one replaces it
   const fetchTransactions = async () => {
     setLoading(true);
     setError("");
 
     try {
-      let url = "http://127.0.0.1:5000/api/transactions";
       const params = new URLSearchParams();
 
       // Filters
@@ -79,14 +65,10 @@ function Transactions() {
         params.append("year", selectedYear);
       }
 
-      url += `?${params.toString()}`;
-      const res = await fetch(url, {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-
-      if (!res.ok) throw new Error("Failed to fetch transactions");
-      const data = await res.json();
-      setTransactions(Array.isArray(data) ? data : []);
+      const showList = (data) => setTransactions(Array.isArray(data) ? data : []);
+      unsubscribeList.current();
+      unsubscribeList.current = subscribeCache(transactionListPath(params), showList);
+      showList(await fetchTransactionList(params));
     } catch (err) {
       console.error(err);
       setError("Failed to fetch transactions");
@@ -100,16 +82,9 @@ function Transactions() {
     if (!window.confirm("Are you sure you want to delete this transaction?")) return;
 
     try {
-      const res = await fetch(`http://127.0.0.1:5000/api/transactions/${id}`, {
-        method: "DELETE",
-        headers: { Authorization: `Bearer ${token}` },
-      });
-
-      const data = await res.json().catch(() => ({}));
-      if (!res.ok) throw new Error(data.error || "Failed to delete transaction");
-
+      // The sync it triggers invalidates the cached list, which refetches
+      await deleteTransaction(id);
       alert("Transaction deleted successfully!");
-      fetchTransactions();
     } catch (error) {
       console.error("Error deleting:", error);
       alert("Failed to delete transaction");
@@ -121,11 +96,11 @@ function Transactions() {
       <div className="header">PERSONAL FINANCE TRACKER</div>
 
       <div className="nav">
-        <a href="/" className="nav-item">Dashboard</a>
-        <a href="/transactions" className="nav-item active">Transactions</a>
-        <a href="/accounts" className="nav-item">Accounts</a>
-        <a href="/budget" className="nav-item">Budget</a>
-        <a href="/reports" className="nav-item">Reports</a>
+        <PrefetchLink to="/" className="nav-item">Dashboard</PrefetchLink>
+        <PrefetchLink to="/transactions" className="nav-item active">Transactions</PrefetchLink>
+        <PrefetchLink to="/accounts" className="nav-item">Accounts</PrefetchLink>
+        <PrefetchLink to="/budget" className="nav-item">Budget</PrefetchLink>
+        <PrefetchLink to="/reports" className="nav-item">Reports</PrefetchLink>
       </div>
 
       <div className={styles.header}>
@@ -0,0 +1,99 @@
+import { lazy } from "react";
+
+import Login from "./features/login/Login";
+import Register from "./features/login/Register";
+
+// === CODE SPLITTING ===
+// Login and Register ship in the main bundle (first screen); every other
+// page is its own chunk, fetched when the route is first rendered, or
+// earlier by preload() (link hover/focus, or idle time after the first
+// paint). webpackChunkName keeps the chunk names stable for the bundle report.
+const lazyPage = (load, ...extras) => {
+  let promise = null;
+  const preload = () => {
+    if (!promise) {
+      // A failed fetch (offline, new deploy) is retried on the next attempt
+      promise = load().catch((err) => {
+        promise = null;
+        throw err;
+      });
+    }
+    extras.forEach((extra) => extra.preload());
+    return promise;
+  };
+  const Component = lazy(preload);
+  Component.preload = preload;
+  return Component;
+};
+
+// recharts is only used by the Reports chart, so it stays out of every other chunk
+export const SpendingChart = lazyPage(() =>
+  import(/* webpackChunkName: "recharts" */ "./features/reports/SpendingChart")
+);
+
+const Dashboard = lazyPage(() => import(/* webpackChunkName: "dashboard" */ "./features/dashboard/Dashboard"));
+
+const Transactions = lazyPage(() => import(/* webpackChunkName: "transactions" */ "./features/transactions/Transcations"));
+const AddTransaction = lazyPage(() => import(/* webpackChunkName: "transaction-form" */ "./features/transactions/AddTranscations"));
+const EditTransaction = lazyPage(() => import(/* webpackChunkName: "transaction-form" */ "./features/transactions/EditTransaction"));
+const Categories = lazyPage(() => import(/* webpackChunkName: "categories" */ "./features/transactions/Categories"));
+
+const Accounts = lazyPage(() => import(/* webpackChunkName: "accounts" */ "./features/accounts/Accounts"));
+const AddEditAccount = lazyPage(() => import(/* webpackChunkName: "account-forms" */ "./features/accounts/AddEditAccount"));
+const EditAccount = lazyPage(() => import(/* webpackChunkName: "account-forms" */ "./features/accounts/EditAccountName"));
+const DeleteAccount = lazyPage(() => import(/* webpackChunkName: "account-forms" */ "./features/accounts/DeleteAccount"));
+
+const Budget = lazyPage(() => import(/* webpackChunkName: "budget" */ "./features/budget/BudgetPage"));
+const SetBudget = lazyPage(() => import(/* webpackChunkName: "budget-form" */ "./features/budget/SetBudgetPage"));
+const Reports = lazyPage(() => import(/* webpackChunkName: "reports" */ "./features/reports/Reports"), SpendingChart);
+
+export const ROUTES = [
+  { path: "/", component: Login },
+  { path: "/register", component: Register },
+
+  // Dashboard
+  { path: "/dashboard", component: Dashboard },
+
+  // Transactions
+  { path: "/transactions", component: Transactions },
+  { path: "/transactions/:accountId", component: Transactions },
+  { path: "/transactions/add", component: AddTransaction },
+  { path: "/transactions/edit/:id", component: EditTransaction },
+  { path: "/categories", component: Categories },
+
+  // Accounts
+  { path: "/accounts", component: Accounts },
+  { path: "/accounts/add", component: AddEditAccount },
+  { path: "/accounts/edit/:id", component: EditAccount },
+  { path: "/accounts/delete/:id", component: DeleteAccount },
+
+  // Budget & Reports
+  { path: "/budget", component: Budget },
+  { path: "/budget/set", component: SetBudget },
+  { path: "/reports", component: Reports },
+];
+
+// === PREFETCH ===
+// The pages reachable from the nav bar, in the order they are usually opened.
+// Reports is left to hover/focus: it pulls in recharts, the largest chunk.
+const IDLE_PREFETCH = [Dashboard, Transactions, Budget, Accounts];
+
+const slowConnection = () => {
+  const connection = navigator.connection;
+  return Boolean(connection && (connection.saveData || /(^|-)2g$/.test(connection.effectiveType || "")));
+};
+
+// Fetch the main pages one at a time while the browser is idle, so they are
+// cached by the time they are opened without competing with the first render.
+// Skipped on data saver and 2G, where only hover/focus prefetching applies.
+export const prefetchOnIdle = () => {
+  if (slowConnection()) return;
+  const whenIdle = window.requestIdleCallback || ((run) => setTimeout(run, 1500));
+  const queue = [...IDLE_PREFETCH];
+  const next = () => {
+    const page = queue.shift();
+    if (!page) return;
+    page.preload().then(() => whenIdle(next), () => {});
+  };
+  whenIdle(next);
+};
@@ -1,43 +1,23 @@
-const BASE_URL = "http://127.0.0.1:5000/api/accounts";
+import { apiFetch } from "./apiClient";
+import { getRows, syncAfterWrite, syncIfStale } from "./syncStore";
+import { getTransactionsByAccount as transactionsByAccount } from "./transactionApi";
 
 // === FETCH ALL ACCOUNTS ===
+// Served from the local sync store (balances included); only changes are downloaded
 export const fetchAccounts = async () => {
-  const token = localStorage.getItem("token");
-
   try {
-    const res = await fetch(BASE_URL, {
-      headers: {
-        "Content-Type": "application/json",
-        Authorization: `Bearer ${token}`,
-      },
-    });
-
-    const data = await res.json().catch(() => []);
-    if (!res.ok) throw new Error(data.error || "Failed to fetch accounts");
-
-    return Array.isArray(data) ? data : [];
+    await syncIfStale();
   } catch (err) {
     console.error("❌ Fetch accounts error:", err);
-    return [];
   }
+  return getRows("accounts").sort((a, b) => a.id - b.id);
 };
 
 // === DELETE AN ACCOUNT ===
 export const deleteAccount = async (accountId) => {
-  const token = localStorage.getItem("token");
-
   try {
-    const res = await fetch(`${BASE_URL}/${accountId}`, {
-      method: "DELETE",
-      headers: {
-        "Content-Type": "application/json",
-        Authorization: `Bearer ${token}`,
-      },
-    });
-
-    const data = await res.json().catch(() => ({}));
-    if (!res.ok) throw new Error(data.error || "Failed to delete account");
-
+    await apiFetch(`/api/accounts/${accountId}`, { method: "DELETE" });
+    await syncAfterWrite();
     return { success: true };
   } catch (err) {
     console.error("❌ Delete account error:", err);
@@ -46,55 +26,12 @@ export const deleteAccount = async (accountId) => {
 };
 
 // === SET DEFAULT ACCOUNT ===
-export const setDefaultAccount = async (accountId) => {
-  const token = localStorage.getItem("token");
-
-  const res = await fetch(`${BASE_URL}/${accountId}/set_default`, {
-    method: "POST",
-    headers: {
-      Authorization: `Bearer ${token}`,
-    },
-  });
-
-  const data = await res.json().catch(() => ({}));
-  if (!res.ok) throw new Error(data.error || "Failed to set default account");
-  return data;
-};
+export const setDefaultAccount = (accountId) => apiFetch(`/api/accounts/${accountId}/set_default`, { method: "POST" });
 
 // === GET DEFAULT ACCOUNT ===
-export const getDefaultAccount = async () => {
-  const token = localStorage.getItem("token");
-
-  const res = await fetch(`${BASE_URL}/default`, {
-    headers: {
-      Authorization: `Bearer ${token}`,
-    },
-  });
-
-  const data = await res.json().catch(() => ({}));
-  if (!res.ok) throw new Error(data.error || "Failed to get default account");
-  return data;
-};
+export const getDefaultAccount = () => apiFetch("/api/accounts/default");
 
 // === FETCH TRANSACTIONS BY ACCOUNT ===
 export async function getTransactionsByAccount(accountId) {
-  const token = localStorage.getItem("token");
-
-  try {
-    const res = await fetch(`http://127.0.0.1:5000/api/transactions?accountId=${accountId}`, {
-      headers: {
-        "Content-Type": "application/json",
-        Authorization: `Bearer ${token}`,
-      },
-    });
-
-    if (!res.ok) {
-      throw new Error(`Failed to fetch transactions for account ${accountId}`);
-    }
-
-    return await res.json();
-  } catch (err) {
-    console.error("Error fetching transactions by account:", err);
-    return [];
-  }
+  return transactionsByAccount(accountId);
 }
@@ -0,0 +1,172 @@
+export const API_BASE = "http://127.0.0.1:5000";
+
+// Shared fetch layer for the server-computed views (dashboard, budgets,
+// reports, filtered transaction lists). Entity lists come from syncStore.
+// - stale-while-revalidate: a cached response is returned at once and
+//   refreshed in the background once older than maxAge
+// - concurrent requests for the same path share one fetch
+// - each entry is tagged with the entities it is derived from; syncStore
+//   invalidates them when a delta changes one (every mutation pulls one)
+// - with persist, responses are kept in IndexedDB per user, so a full page
+//   load renders the last known data at once (and always revalidates it)
+const DEFAULT_MAX_AGE = 30000;
+const MAX_RETRIES = 2;
+const MAX_RETRY_AFTER = 10;
+
+const IDB_NAME = "pft-api-cache";
+const IDB_STORE = "responses";
+
+let owner = null;
+const cache = new Map(); // path -> { data, time, options, promise, listeners }
+
+const currentUser = () => localStorage.getItem("user_id");
+
+const authHeaders = () => ({
+  "Content-Type": "application/json",
+  Authorization: `Bearer ${localStorage.getItem("token")}`,
+});
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// === REQUESTS ===
+// JSON request with the stored token. A 429 is retried after its Retry-After
+// (the server rejects before doing any work, so writes are safe to resend).
+export const apiFetch = async (path, { method = "GET", body } = {}) => {
+  for (let attempt = 0; ; attempt += 1) {
+    const res = await fetch(`${API_BASE}${path}`, {
+      method,
+      headers: authHeaders(),
+      body: body === undefined ? undefined : JSON.stringify(body),
+    });
+    if (res.status === 429 && attempt < MAX_RETRIES) {
+      const seconds = Math.min(Number(res.headers.get("Retry-After")) || 1, MAX_RETRY_AFTER);
+      await sleep(seconds * 1000);
+      continue;
+    }
+
+    const data = await res.json().catch(() => ({}));
+    if (!res.ok) {
+      const error = new Error(data.error || data.msg || `Request failed: ${res.status}`);
+      error.status = res.status;
+      error.data = data;
+      throw error;
+    }
+    return data;
+  }
+};
+
+// === INDEXEDDB ===
+let dbPromise = null;
+
+const openDb = () => {
+  if (!dbPromise) {
+    dbPromise = new Promise((resolve) => {
+      if (typeof indexedDB === "undefined") return resolve(null);
+      const req = indexedDB.open(IDB_NAME, 1);
+      req.onupgradeneeded = () => req.result.createObjectStore(IDB_STORE);
+      req.onsuccess = () => resolve(req.result);
+      // Private mode and the like: run without persistence
+      req.onerror = () => resolve(null);
+    });
+  }
+  return dbPromise;
+};
+
+const idb = async (mode, run) => {
+  const db = await openDb();
+  if (!db) return undefined;
+  return new Promise((resolve) => {
+    const req = run(db.transaction(IDB_STORE, mode).objectStore(IDB_STORE));
+    req.onsuccess = () => resolve(req.result);
+    req.onerror = () => resolve(undefined);
+  });
+};
+
+// Keyed by user as well, so one user's saved responses never answer another's
+const storageKey = (user, path) => `${user} ${path}`;
+
+// === CACHE ===
+const entryFor = (path) => {
+  const user = currentUser();
+  if (owner !== user) {
+    cache.clear();
+    owner = user;
+  }
+  if (!cache.has(path)) {
+    cache.set(path, { data: undefined, time: 0, options: { tags: [] }, promise: null, listeners: new Set() });
+  }
+  return cache.get(path);
+};
+
+const revalidateEntry = (path, entry) => {
+  if (!entry.promise) {
+    const user = owner;
+    entry.promise = apiFetch(path)
+      .then((data) => {
+        Object.assign(entry, { data, time: Date.now() });
+        // Not if the user changed (or the cache was cleared) while it was in flight
+        if (entry.options.persist && owner === user && cache.get(path) === entry) {
+          idb("readwrite", (store) => store.put(data, storageKey(user, path)));
+        }
+        entry.listeners.forEach((listener) => listener(data));
+        return data;
+      })
+      .finally(() => {
+        entry.promise = null;
+      });
+  }
+  return entry.promise;
+};
+
+// options: { maxAge (ms), tags (entities the response depends on), persist }
+export const cachedGet = async (path, { maxAge = DEFAULT_MAX_AGE, tags = [], persist = false } = {}) => {
+  const entry = entryFor(path);
+  entry.options = { tags, persist };
+  if (entry.data === undefined && persist) {
+    // Saved by an earlier page load: shown at once, but stale (time 0)
+    const saved = await idb("readonly", (store) => store.get(storageKey(owner, path)));
+    if (saved !== undefined && entry.data === undefined) entry.data = saved;
+  }
+
+  if (entry.data === undefined) return revalidateEntry(path, entry);
+  if (Date.now() - entry.time > maxAge) {
+    // Stale: answer now, listeners get the fresh copy
+    revalidateEntry(path, entry).catch((err) => console.error("❌ Revalidate error:", err));
+  }
+  return entry.data;
+};
+
+// listener(data) runs whenever a fresh response for path arrives
+export const subscribeCache = (path, listener) => {
+  const entry = entryFor(path);
+  entry.listeners.add(listener);
+  return () => entry.listeners.delete(listener);
+};
+
+// Patch a cached response in place (e.g. from a pushed event)
+export const updateCache = (path, update) => {
+  const entry = entryFor(path);
+  if (entry.data === undefined) return;
+  entry.data = update(entry.data);
+  entry.listeners.forEach((listener) => listener(entry.data));
+};
+
+// Mark entries depending on any of the entities stale; those on screen refetch now
+export const invalidate = (entities) => {
+  cache.forEach((entry, path) => {
+    if (!entry.options.tags.some((tag) => entities.includes(tag))) return;
+    entry.time = 0;
+    if (entry.listeners.size) {
+      revalidateEntry(path, entry).catch((err) =>
+        console.error("❌ Revalidate error:", err)
+      );
+    }
+  });
+};
+
+// On logout or a change of user: drops every user's saved responses
+export const clearApiCache = async () => {
+  cache.clear();
+  owner = null;
+  await idb("readwrite", (store) => store.clear());
+};
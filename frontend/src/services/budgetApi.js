@@ -1,27 +1,33 @@
-const API = "http://127.0.0.1:5000/api/budgets";
+import { apiFetch, cachedGet } from "./apiClient";
+import { syncAfterWrite, syncIfStale } from "./syncStore";
 
+// Monthly budget views ("spent" is computed server-side); invalidated when a
+// sync delta touches something they are derived from
+export const budgetsPath = (month) => `/api/budgets?month=${month}`;
+export const BUDGETS_QUERY = { tags: ["transactions", "budgets", "categories"], persist: true };
 
 export async function fetchBudgets(month) {
-  const res = await fetch(`${API}?month=${month}`);
-  if (!res.ok) throw new Error("Failed to fetch budgets");
-  return await res.json();  // should be an array of budgets with spent field
+  try {
+    await syncIfStale();
+  } catch (err) {
+    console.error("❌ Sync error:", err);
+  }
+  const data = await cachedGet(budgetsPath(month), BUDGETS_QUERY);
+  // Copies: the set-budget form edits its rows in place
+  return data.map((budget) => ({ ...budget }));
 }
 
-
-
 export async function saveBudgets(data) {
-  const res = await fetch(`${API}/save`, {
-    method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify(data),
-  });
-  if (!res.ok) throw new Error("Failed to save budgets");
-  return res.json();
+  const result = await apiFetch("/api/budgets/save", { method: "POST", body: data });
+  await syncAfterWrite();
+  return result;
 }
 
 export async function fetchRecommendedBudgets(month) {
   // Optional: implement backend recommendations route
-  const res = await fetch(`${API}/recommendations?month=${month}`);
-  if (!res.ok) throw new Error("Failed to fetch recommendations");
-  return res.json(); // { category_id: limit_amount }
+  return cachedGet(`/api/budgets/recommendations?month=${month}`, {
+    tags: ["transactions", "budgets"],
+    maxAge: 10 * 60 * 1000,
+    persist: true,
+  }); // { category_id: limit_amount }
 }
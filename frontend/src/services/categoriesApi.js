@@ -1,65 +1,31 @@
-const BASE_URL = "http://127.0.0.1:5000/api/categories";
+import { apiFetch } from "./apiClient";
+import { getRows, syncAfterWrite, syncIfStale } from "./syncStore";
 
 // === FETCH CATEGORIES ===
+// Served from the local sync store, ordered by name like GET /api/categories
 export const fetchCategories = async () => {
-  const token = localStorage.getItem("token");
-
   try {
-    const res = await fetch(BASE_URL, {
-      headers: {
-        "Content-Type": "application/json",
-        Authorization: `Bearer ${token}`,
-      },
-    });
-
-    const data = await res.json().catch(() => []);
-    if (!res.ok) throw new Error(data.error || data.msg || "Failed to fetch categories");
-
-    // Always return an array
-    return Array.isArray(data) ? data : [];
+    await syncIfStale();
   } catch (err) {
     console.error("❌ Failed to fetch categories:", err);
-    return [];
   }
+  return getRows("categories").sort((a, b) => (a.name < b.name ? -1 : a.name > b.name ? 1 : 0));
 };
 
 // === ADD CATEGORY ===
 export const addCategory = async (name, type) => {
-  const token = localStorage.getItem("token");
-
   if (!name || !["INCOME", "EXPENSE"].includes(type)) {
     throw new Error("Invalid category type");
   }
 
-  const res = await fetch(BASE_URL, {
-    method: "POST",
-    headers: {
-      "Content-Type": "application/json",
-      Authorization: `Bearer ${token}`,
-    },
-    body: JSON.stringify({ name, type }),
-  });
-
-  const data = await res.json().catch(() => ({}));
-  if (!res.ok) throw new Error(data.error || data.msg || "Failed to add category");
-
+  const data = await apiFetch("/api/categories", { method: "POST", body: { name, type } });
+  await syncAfterWrite();
   return data; // Expected { id, name, type }
 };
 
 // === DELETE CATEGORY ===
 export const deleteCategory = async (id) => {
-  const token = localStorage.getItem("token");
-
-  const res = await fetch(`${BASE_URL}/${id}`, {
-    method: "DELETE",
-    headers: {
-      "Content-Type": "application/json",
-      Authorization: `Bearer ${token}`,
-    },
-  });
-
-  const data = await res.json().catch(() => ({}));
-  if (!res.ok) throw new Error(data.error || data.msg || "Failed to delete category");
-
+  const data = await apiFetch(`/api/categories/${id}`, { method: "DELETE" });
+  await syncAfterWrite();
   return data;
 };
@@ -1,19 +1,13 @@
-export async function fetchDashboardData(token, monthYear) {
-  try {
-    const res = await fetch(`http://127.0.0.1:5000/api/dashboard?month=${monthYear}`, {
-      headers: {
-        "Content-Type": "application/json",
-        Authorization: `Bearer ${token}`,
-      },
-    });
+import { cachedGet } from "./apiClient";
 
-    if (!res.ok) {
-      const error = await res.text();
-      throw new Error(error || `Error: ${res.status}`);
-    }
+export const dashboardPath = (monthYear) => `/api/dashboard?month=${monthYear}`;
+export const DASHBOARD_QUERY = { tags: ["transactions", "accounts", "categories", "budgets"], persist: true };
 
-    const data = await res.json();
-    return data;
+// Cached per month: a stale copy is returned at once and refreshed in the
+// background (subscribe to dashboardPath(monthYear) for the fresh one)
+export async function fetchDashboardData(monthYear) {
+  try {
+    return await cachedGet(dashboardPath(monthYear), DASHBOARD_QUERY);
   } catch (err) {
     console.error("Dashboard fetch failed:", err);
     throw err;
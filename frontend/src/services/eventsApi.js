@@ -0,0 +1,73 @@
+import { sync } from "./syncStore";
+
+const EVENTS_URL = "http://127.0.0.1:5000/api/events";
+const RECONNECT_DELAY = 3000;
+
+// Parse "id:/event:/data:" frames out of the text received so far; returns the unparsed tail
+const parseFrames = (buffer, onFrame) => {
+  const frames = buffer.split("\n\n");
+  const rest = frames.pop();
+  frames.forEach((frame) => {
+    const event = { id: null, type: "message", data: "" };
+    frame.split("\n").forEach((line) => {
+      if (line.startsWith("id: ")) event.id = line.slice(4);
+      else if (line.startsWith("event: ")) event.type = line.slice(7);
+      else if (line.startsWith("data: ")) event.data += line.slice(6);
+    });
+    // A frame with only an id (sent when the stream opens) moves the resume point
+    if (event.data || event.id) onFrame(event);
+  });
+  return rest;
+};
+
+// === SUBSCRIBE TO PUSH EVENTS ===
+// EventSource cannot send the Authorization header, so the stream is read
+// with fetch. Reconnects resume from the last event id; returns an unsubscribe
+// function. handlers: { transaction, transaction_deleted, balance, budget_status }
+export const subscribeEvents = (handlers) => {
+  let lastEventId = null;
+  let controller = null;
+  let stopped = false;
+
+  const connect = async () => {
+    const token = localStorage.getItem("token");
+    controller = new AbortController();
+    try {
+      const res = await fetch(EVENTS_URL, {
+        headers: {
+          Authorization: `Bearer ${token}`,
+          ...(lastEventId ? { "Last-Event-ID": lastEventId } : {}),
+        },
+        signal: controller.signal,
+      });
+      if (!res.ok) throw new Error(`Event stream failed: ${res.status}`);
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer = parseFrames(buffer + decoder.decode(value, { stream: true }), (event) => {
+          lastEventId = event.id || lastEventId;
+          const handler = handlers[event.type];
+          if (handler && event.data) handler(JSON.parse(event.data));
+        });
+      }
+    } catch (err) {
+      if (stopped) return;
+      console.error("❌ Event stream error:", err);
+    }
+    if (!stopped) {
+      // Catch up on anything the stream could not replay, then reconnect
+      sync().catch(() => {});
+      setTimeout(connect, RECONNECT_DELAY);
+    }
+  };
+
+  connect();
+  return () => {
+    stopped = true;
+    if (controller) controller.abort();
+  };
+};
@@ -1,4 +1,13 @@
 // src/services/loginApi.js
+import { clearApiCache } from "./apiClient";
+import { clearSyncStore } from "./syncStore";
+
+// Cached responses and synced rows of the user leaving the browser
+const clearUserData = async () => {
+  clearSyncStore();
+  await clearApiCache();
+};
+
 export async function loginUser(username, password) {
   try {
     const res = await fetch("http://127.0.0.1:5000/api/login", {
@@ -15,6 +24,9 @@ export async function loginUser(username, password) {
 
     // 🟢 Store the JWT token
     if (data.token) {
+      // Another user signing in on this browser must not see the last one's data
+      const previous = localStorage.getItem("user_id");
+      if (previous !== null && previous !== String(data.user_id)) await clearUserData();
       localStorage.setItem("token", data.token);
       localStorage.setItem("user_id", data.user_id);
       localStorage.setItem("username", data.username);
@@ -26,3 +38,10 @@ export async function loginUser(username, password) {
     throw err;
   }
 }
+
+export async function logout() {
+  await clearUserData();
+  localStorage.removeItem("token");
+  localStorage.removeItem("user_id");
+  localStorage.removeItem("username");
+}
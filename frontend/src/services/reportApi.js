@@ -1,25 +1,18 @@
-const API_BASE_URL = "http://127.0.0.1:5000"; // Update if your Flask server is hosted elsewhere
+import { cachedGet } from "./apiClient";
+
+export const reportPath = (month, accountId = null) =>
+  accountId ? `/api/report?month=${month}&accountId=${accountId}` : `/api/report?month=${month}`;
 
 /**
- * Fetch spending report by month and optional account
+ * Fetch spending report by month and optional account (cached until a
+ * transaction, budget or category changes)
  * @param {string} month - Format: "YYYY-MM"
  * @param {number} [accountId] - Optional account filter
  * @returns {Promise<Array>} - Array of report objects
  */
 export async function fetchReport(month, accountId = null) {
   try {
-    let url = `${API_BASE_URL}/api/report?month=${month}`;
-    if (accountId) {
-      url += `&accountId=${accountId}`;
-    }
-
-    const response = await fetch(url);
-    if (!response.ok) {
-      throw new Error(`API error: ${response.status}`);
-    }
-
-    const data = await response.json();
-    return data;
+    return await cachedGet(reportPath(month, accountId), { tags: ["transactions", "budgets", "categories"], persist: true });
   } catch (error) {
     console.error("Failed to fetch report:", error);
     throw error;
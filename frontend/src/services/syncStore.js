@@ -0,0 +1,141 @@
+import { apiFetch, invalidate } from "./apiClient";
+
+const ENTITIES = ["transactions", "accounts", "categories", "budgets"];
+// Reads within this long of the last sync skip the network (mutations always sync)
+const FRESH_MS = 10000;
+
+// Local copy of the user's rows, kept current by applying GET /api/sync deltas.
+// Persisted per user in localStorage so a reload only fetches what changed.
+let store = null;
+let inFlight = null;
+let queued = null;
+const listeners = new Set();
+
+const currentUser = () => localStorage.getItem("user_id");
+const storageKey = (userId) => `syncStore:${userId}`;
+// Kept apart from the store so an unchanged sync does not rewrite all rows
+const syncedAtKey = (userId) => `syncStore:${userId}:syncedAt`;
+
+const emptyStore = (userId) => ({
+  userId,
+  version: 0,
+  transactions: {},
+  accounts: {},
+  categories: {},
+  budgets: {},
+});
+
+const loadStore = () => {
+  const userId = currentUser();
+  if (store && store.userId === userId) return store;
+
+  try {
+    store = JSON.parse(localStorage.getItem(storageKey(userId))) || emptyStore(userId);
+  } catch {
+    store = emptyStore(userId);
+  }
+  return store;
+};
+
+const saveStore = () => {
+  try {
+    localStorage.setItem(storageKey(store.userId), JSON.stringify(store));
+  } catch (err) {
+    // Quota exceeded: keep the in-memory copy, the next load does a full sync
+    console.warn("Sync store not persisted:", err);
+  }
+};
+
+// Transactions carry account/category names; follow renames without a refetch
+const relinkNames = (accounts, categories) => {
+  if (!accounts.length && !categories.length) return;
+  Object.values(store.transactions).forEach((tx) => {
+    const account = store.accounts[tx.account_id];
+    const category = store.categories[tx.category_id];
+    if (account) tx.account_name = account.name;
+    if (category) tx.category = category.name;
+  });
+};
+
+// === APPLY A DELTA, RETURN THE ENTITIES THAT CHANGED ===
+const applyDelta = (delta) => {
+  const changed = [];
+  ENTITIES.forEach((entity) => {
+    const { upserts = [], deletes = [] } = delta[entity] || {};
+    if (delta.reset) store[entity] = {};
+    if (!delta.reset && !upserts.length && !deletes.length) return;
+
+    upserts.forEach((row) => {
+      store[entity][row.id] = row;
+    });
+    deletes.forEach((id) => {
+      delete store[entity][id];
+    });
+    changed.push(entity);
+  });
+
+  relinkNames(delta.accounts?.upserts || [], delta.categories?.upserts || []);
+  store.version = delta.version;
+  return changed;
+};
+
+const runSync = async () => {
+  const local = loadStore();
+  const data = await apiFetch(`/api/sync?since=${local.version}`);
+
+  const changed = applyDelta(data);
+  localStorage.setItem(syncedAtKey(store.userId), String(Date.now()));
+  if (changed.length) {
+    saveStore();
+    invalidate(changed);
+    listeners.forEach((listener) => listener(changed));
+  }
+  return changed;
+};
+
+// === SYNC ===
+// Concurrent callers share one request. A call made while a request is
+// already out (e.g. right after a mutation) gets one follow-up request, so
+// it never resolves with data from before its own write.
+export const sync = () => {
+  if (!inFlight) {
+    inFlight = runSync().finally(() => {
+      inFlight = null;
+    });
+    return inFlight;
+  }
+  if (!queued) {
+    queued = inFlight
+      .catch(() => {})
+      .then(() => {
+        queued = null;
+        return sync();
+      });
+  }
+  return queued;
+};
+
+// For reads: no request when the store synced moments ago (e.g. on this page load)
+export const syncIfStale = () => {
+  const syncedAt = Number(localStorage.getItem(syncedAtKey(currentUser()))) || 0;
+  return Date.now() - syncedAt < FRESH_MS ? Promise.resolve([]) : sync();
+};
+
+// Mutations pull their own delta; a failed sync must not fail the write
+export const syncAfterWrite = () => sync().catch((err) => console.error("❌ Sync error:", err));
+
+// === READ FROM THE LOCAL STORE ===
+export const getRows = (entity) => Object.values(loadStore()[entity]);
+
+// listener(changedEntities) runs after every sync that changed something
+export const subscribe = (listener) => {
+  listeners.add(listener);
+  return () => listeners.delete(listener);
+};
+
+export const clearSyncStore = () => {
+  const userId = currentUser();
+  localStorage.removeItem(storageKey(userId));
+  localStorage.removeItem(syncedAtKey(userId));
+  store = emptyStore(userId);
+};
@@ -1,103 +1,59 @@
-const BASE_URL = "http://127.0.0.1:5000/api/transactions";
+import { apiFetch, cachedGet } from "./apiClient";
+import { getRows, syncAfterWrite, syncIfStale } from "./syncStore";
+
+// Same order as GET /api/transactions: newest first
+const newestFirst = (a, b) => (a.date === b.date ? b.id - a.id : a.date < b.date ? 1 : -1);
 
 // === FETCH ALL TRANSACTIONS ===
+// Served from the local sync store; only rows changed since the last sync are downloaded
 export const fetchTransactions = async () => {
-  const token = localStorage.getItem("token");
-
   try {
-    const res = await fetch(BASE_URL, {
-      headers: {
-        "Content-Type": "application/json",
-        Authorization: `Bearer ${token}`,
-      },
-    });
-
-    const data = await res.json().catch(() => []);
-    if (!res.ok) throw new Error(data.error || "Failed to fetch transactions");
-
-    return Array.isArray(data) ? data : [];
+    await syncIfStale();
   } catch (err) {
     console.error("❌ Fetch transactions error:", err);
-    return [];
   }
+  return getRows("transactions").sort(newestFirst);
 };
 
-// === ADD TRANSACTION ===
-export const addTransaction = async (transaction) => {
-  const token = localStorage.getItem("token");
+// === FILTERED LIST (server-side search) ===
+// params: URLSearchParams of GET /api/transactions filters
+export const transactionListPath = (params) => `/api/transactions?${params.toString()}`;
+export const TRANSACTION_LIST_QUERY = { tags: ["transactions", "accounts", "categories"] };
 
-  const res = await fetch(BASE_URL, {
-    method: "POST",
-    headers: {
-      "Content-Type": "application/json",
-      Authorization: `Bearer ${token}`,
-    },
-    body: JSON.stringify(transaction),
-  });
+export const fetchTransactionList = (params) => cachedGet(transactionListPath(params), TRANSACTION_LIST_QUERY);
 
-  const data = await res.json().catch(() => ({}));
-  if (!res.ok) throw new Error(data.error || "Failed to add transaction");
+// === ADD TRANSACTION ===
+export const addTransaction = async (transaction) => {
+  let data;
+  try {
+    data = await apiFetch("/api/transactions", { method: "POST", body: transaction });
+  } catch (err) {
+    // 409: an exact copy of an existing transaction; resend with allow_duplicate to keep it
+    err.duplicateOf = err.data?.duplicate_of;
+    throw err;
+  }
+  await syncAfterWrite();
   return data;
 };
 
 // === DELETE TRANSACTION ===
 export const deleteTransaction = async (id) => {
-  const token = localStorage.getItem("token");
-
-  const res = await fetch(`${BASE_URL}/${id}`, {
-    method: "DELETE",
-    headers: {
-      "Content-Type": "application/json",
-      Authorization: `Bearer ${token}`,
-    },
-  });
-
-  const data = await res.json().catch(() => ({}));
-  if (!res.ok) throw new Error(data.error || "Failed to delete transaction");
+  const data = await apiFetch(`/api/transactions/${id}`, { method: "DELETE" });
+  await syncAfterWrite();
   return data;
 };
 
 // === GET TRANSACTIONS BY ACCOUNT ===
 export const getTransactionsByAccount = async (accountId) => {
-  const token = localStorage.getItem("token");
-
-  try {
-    const res = await fetch(`${BASE_URL}?accountId=${accountId}`, {
-      headers: {
-        "Content-Type": "application/json",
-        Authorization: `Bearer ${token}`,
-      },
-    });
-
-    const data = await res.json().catch(() => []);
-    if (!res.ok) throw new Error(data.error || "Failed to fetch transactions");
-
-    return Array.isArray(data) ? data : [];
-  } catch (err) {
-    console.error("❌ Error fetching transactions by account:", err);
-    return [];
-  }
+  const transactions = await fetchTransactions();
+  return transactions.filter((tx) => String(tx.account_id) === String(accountId));
 };
 
 // === UPDATE TRANSACTION ===
 export async function updateTransaction(id, updatedData) {
-  const token = localStorage.getItem("token");
-
   try {
-    const res = await fetch(`http://127.0.0.1:5000/api/transactions/${id}`, {
-      method: "PUT",
-      headers: {
-        "Content-Type": "application/json",
-        Authorization: `Bearer ${token}`,
-      },
-      body: JSON.stringify(updatedData),
-    });
-
-    const data = await res.json();
-    if (!res.ok) {
-      throw new Error(data.error || "Failed to update transaction");
-    }
-
+    const data = await apiFetch(`/api/transactions/${id}`, { method: "PUT", body: updatedData });
+    await syncAfterWrite();
     return data; // return updated transaction
   } catch (err) {
     console.error("Error updating transaction:", err);